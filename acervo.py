@@ -0,0 +1,563 @@
+"""
+Acervo de relatórios em SQLite, no lugar dos arquivos analise_<data>.json em
+relatorios/ (dois uploads no mesmo segundo sobrescreviam um ao outro, e a
+pasta não podia ser consultada).
+
+Cada relatório recebe um id único e fica guardado com o JSON completo e as
+colunas indexadas: matrícula (só dígitos), cartório e diagnóstico
+(normalizados sem acento, em maiúsculas), CPFs citados (tabela própria) e data.
+Consultas por qualquer um desses campos e a paginação (por cursor, nunca por
+OFFSET) usam índice, então ficam O(log n) mesmo com centenas de milhares de
+relatórios. A ordem e a retenção são pela data do relatório (criado_em), não
+pela ordem de gravação: relatórios importados (reindexar) entram depois, com a
+data do arquivo original.
+
+As gravações passam por uma fila com uma única thread escritora por
+processo: os relatórios que chegam juntos são gravados numa só transação, e
+quem chamou `salvar` espera o commit (o relatório já pode ser baixado quando
+a resposta sai). O banco fica em WAL, então leituras não esperam escritas e
+vários processos podem compartilhar o arquivo.
+
+O texto extraído de cada PDF também fica num índice FTS5 (sem acento,
+unicode61) para a busca textual: um texto por PDF (pelo SHA-256), ligado ao
+relatório mais recente dele, com trechos destacados e ordem por bm25. CPFs,
+números de processo e matrículas batem com ou sem pontuação.
+
+Para a análise incremental (atos.py), cada matrícula (cartório + número)
+guarda o cabeçalho analisado e a análise de cada ato R./AV. já visto, com o
+hash do texto do ato analisado: um ato relido (OCR refeito, certidão
+corrigida) com outro texto é analisado de novo e a análise nova substitui a
+antiga.
+
+Uso (linha de comando):
+    python acervo.py reindexar [--uploads uploads] [--relatorios relatorios]
+    python acervo.py buscar "123.456.789-00 penhora"
+    python acervo.py limpar
+
+Variáveis de ambiente:
+  RELATORIOS_DB             arquivo SQLite (padrão: relatorios.db)
+  RELATORIOS_RETENCAO_DIAS  dias que um relatório fica guardado (padrão: 365; 0 guarda para sempre)
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+import unicodedata
+from contextlib import closing
+from concurrent.futures import Future
+from datetime import datetime
+
+RELATORIOS_DB = os.environ.get("RELATORIOS_DB", "relatorios.db")
+RELATORIOS_RETENCAO_DIAS = float(os.environ.get("RELATORIOS_RETENCAO_DIAS", "365"))
+
+LISTA_MAX = 200          # itens por página em listar() e buscar()
+_ESCRITA_MAX = 200       # relatórios por transação da thread escritora
+_LIMPEZA_S = 3600        # intervalo entre limpezas da retenção
+
+_CPF = re.compile(r'\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b')
+_NUMERO = re.compile(r'\d[\d.\-/]*\d')
+_TERMO = re.compile(r'"[^"]*"\*?|\S+')
+_SO_NUMERO = re.compile(r'[\d.\-/]+')
+
+_fila = queue.Queue()
+_lock = threading.Lock()
+_escritor = None         # (pid, thread) da thread escritora deste processo
+
+
+# ---------------- BANCO ----------------
+def _conectar():
+    con = sqlite3.connect(RELATORIOS_DB, timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA busy_timeout=30000")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def _criar_tabelas():
+    with closing(_conectar()) as con:
+        # A listagem vai por (criado_em, seq): os índices dos filtros levam criado_em
+        # e já contêm o seq (rowid), então "WHERE matricula = ? ORDER BY criado_em DESC,
+        # seq DESC" com o cursor é uma faixa do índice. O seq só desempata: um relatório
+        # importado tem seq novo e criado_em antigo
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS relatorios (
+                seq INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                nome TEXT NOT NULL UNIQUE,
+                criado_em REAL NOT NULL,
+                matricula TEXT,
+                cartorio TEXT,
+                diagnostico TEXT,
+                origem TEXT,
+                arquivo TEXT,
+                dados TEXT NOT NULL
+            )""")
+        for campo in ("matricula", "cartorio", "diagnostico"):
+            # Bancos antigos: índice só do campo, da ordem por seq
+            con.execute(f"DROP INDEX IF EXISTS ix_relatorios_{campo}")
+            con.execute(f"CREATE INDEX IF NOT EXISTS ix_relatorios_{campo}_criado ON relatorios ({campo}, criado_em)")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_relatorios_criado ON relatorios (criado_em)")
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS relatorio_cpfs (
+                cpf TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (cpf, seq)
+            ) WITHOUT ROWID""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_relatorio_cpfs_seq ON relatorio_cpfs (seq)")
+        # Busca textual: um texto por PDF (sha256), ligado ao relatório mais recente dele
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS textos (
+                seq INTEGER PRIMARY KEY,
+                sha256 TEXT,
+                relatorio_seq INTEGER,
+                arquivo TEXT,
+                criado_em REAL NOT NULL
+            )""")
+        con.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_textos_sha256 ON textos (sha256)")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_textos_criado ON textos (criado_em)")
+        # rowid = textos.seq; "numeros" guarda CPFs, processos etc. só com dígitos.
+        # º/ª/° separam palavras ("nº123.456" vira "n" + "123"...)
+        con.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS textos_fts USING fts5(
+                texto, numeros,
+                tokenize = "unicode61 remove_diacritics 2 separators 'ºª°'"
+            )""")
+        # Análise incremental: cabeçalho por matrícula e análise de cada ato já visto
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS matriculas (
+                chave TEXT PRIMARY KEY,
+                cabecalho TEXT NOT NULL,
+                atualizado_em REAL NOT NULL
+            )""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_matriculas_atualizado ON matriculas (atualizado_em)")
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS atos (
+                chave TEXT NOT NULL,
+                numero INTEGER NOT NULL,
+                analise TEXT NOT NULL,
+                hash TEXT,
+                PRIMARY KEY (chave, numero)
+            ) WITHOUT ROWID""")
+        # Bancos antigos, sem o hash do texto: essas análises são refeitas no próximo uso
+        if "hash" not in {c[1] for c in con.execute("PRAGMA table_info(atos)")}:
+            con.execute("ALTER TABLE atos ADD COLUMN hash TEXT")
+
+
+_criar_tabelas()
+
+
+# ---------------- NORMALIZAÇÃO ----------------
+def _digitos(valor):
+    return re.sub(r'\D', '', str(valor or "")) or None
+
+
+def normalizar(valor):
+    """Chave de busca de cartório/diagnóstico: sem acento, maiúsculas, espaços simples."""
+    if not valor:
+        return None
+    s = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(s.upper().split()) or None
+
+
+def _numeros(texto):
+    # "123.456.789-00" -> "12345678900": a busca acha com ou sem pontuação
+    return " ".join(d for d in (_digitos(n) for n in _NUMERO.findall(texto)) if len(d) >= 6)
+
+
+def _cpfs(texto_json):
+    # Pega os CPFs de qualquer campo (Proprietários da IA ou da regex, ônus...)
+    return sorted({_digitos(c) for c in _CPF.findall(texto_json)})
+
+
+# ---------------- ESCRITA (FILA + THREAD ÚNICA) ----------------
+def _escrever(operacao, *args):
+    """Roda operacao(con, *args) na thread escritora; devolve o resultado depois do commit."""
+    futuro = Future()
+    _garantir_escritor()
+    _fila.put((operacao, args, futuro))
+    return futuro.result()
+
+
+def salvar(dados, nome=None, arquivo=None, origem=None, texto=None, sha256=None, criado_em=None):
+    """
+    Grava o relatório `dados` e devolve (id, nome). `nome` é o nome de
+    download (padrão: analise_<data>_<id curto>.json, único), `arquivo` o PDF
+    de origem e `origem` o caminho que produziu o resultado (ia/regex/vazio).
+    `texto` (o texto extraído do PDF de hash `sha256`) entra no índice de
+    busca na mesma transação. Bloqueia até o commit.
+    """
+    relatorio_id = uuid.uuid4().hex
+    agora = criado_em or time.time()
+    nome = nome or f"analise_{datetime.fromtimestamp(agora).strftime('%Y%m%d_%H%M%S')}_{relatorio_id[:8]}.json"
+    json_texto = json.dumps(dados, ensure_ascii=False, indent=2)
+    linha = (relatorio_id, nome, agora, _digitos(dados.get("Matrícula")), normalizar(dados.get("Cartório")),
+             normalizar(dados.get("Diagnóstico")), origem, arquivo, json_texto)
+    _escrever(_inserir_relatorio, linha, _cpfs(json_texto), texto, sha256)
+    return relatorio_id, nome
+
+
+def indexar_texto(texto, arquivo=None, sha256=None):
+    """Põe no índice de busca o texto de um PDF sem relatório no acervo (app_gemini_new, reindexação)."""
+    return _escrever(_inserir_texto, texto, arquivo, sha256, None, time.time())
+
+
+def guardar_atos(chave, cabecalho, analises):
+    """
+    Grava o cabeçalho e as análises {número: (hash do texto, análise)} dos
+    atos da matrícula `chave`.
+    """
+    return _escrever(_inserir_atos, chave, json.dumps(cabecalho, ensure_ascii=False),
+                     [(chave, n, json.dumps(a, ensure_ascii=False), h) for n, (h, a) in analises.items()],
+                     time.time())
+
+
+def _garantir_escritor():
+    # Uma thread por processo (depois de um fork, o filho sobe a sua)
+    global _escritor
+    pid = os.getpid()
+    if _escritor is not None and _escritor[0] == pid:
+        return
+    with _lock:
+        if _escritor is None or _escritor[0] != pid:
+            t = threading.Thread(target=_loop_escritor, name="acervo-escritor", daemon=True)
+            t.start()
+            _escritor = (pid, t)
+
+
+def _inserir_relatorio(con, linha, cpfs, texto, sha256):
+    # Mesmo nome de download (ex.: job de lote repetido) substitui o anterior, como o arquivo fazia
+    con.execute("DELETE FROM relatorio_cpfs WHERE seq IN (SELECT seq FROM relatorios WHERE nome = ?)",
+                (linha[1],))
+    con.execute("DELETE FROM relatorios WHERE nome = ?", (linha[1],))
+    seq = con.execute(
+        "INSERT INTO relatorios (id, nome, criado_em, matricula, cartorio, diagnostico, origem, "
+        "arquivo, dados) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", linha).lastrowid
+    con.executemany("INSERT OR IGNORE INTO relatorio_cpfs (cpf, seq) VALUES (?, ?)",
+                    [(cpf, seq) for cpf in cpfs])
+    if texto:
+        _inserir_texto(con, texto, linha[7], sha256, seq, linha[2])
+    return seq
+
+
+def _inserir_texto(con, texto, arquivo, sha256, relatorio_seq, criado_em):
+    existente = con.execute("SELECT seq FROM textos WHERE sha256 = ?", (sha256,)).fetchone() if sha256 else None
+    if existente:
+        # O mesmo PDF de novo tem o mesmo texto: só passa a apontar para o relatório mais recente
+        con.execute("UPDATE textos SET relatorio_seq = COALESCE(?, relatorio_seq), arquivo = ?, criado_em = ? "
+                    "WHERE seq = ?", (relatorio_seq, arquivo, criado_em, existente[0]))
+        return existente[0]
+    seq = con.execute("INSERT INTO textos (sha256, relatorio_seq, arquivo, criado_em) VALUES (?, ?, ?, ?)",
+                      (sha256, relatorio_seq, arquivo, criado_em)).lastrowid
+    con.execute("INSERT INTO textos_fts (rowid, texto, numeros) VALUES (?, ?, ?)", (seq, texto, _numeros(texto)))
+    return seq
+
+
+def _inserir_atos(con, chave, cabecalho, linhas, agora):
+    con.execute("INSERT INTO matriculas (chave, cabecalho, atualizado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT (chave) DO UPDATE SET atualizado_em = excluded.atualizado_em",
+                (chave, cabecalho, agora))
+    # Ato já analisado com o mesmo texto (outra certidão processada ao mesmo tempo)
+    # fica como estava; com outro texto, vale a análise nova
+    con.executemany("INSERT INTO atos (chave, numero, analise, hash) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (chave, numero) DO UPDATE SET analise = excluded.analise, hash = excluded.hash "
+                    "WHERE atos.hash IS NOT excluded.hash", linhas)
+
+
+def _gravar(con, pendentes):
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        resultados = [operacao(con, *args) for operacao, args, _ in pendentes]
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return resultados
+
+
+def _loop_escritor():
+    ultima_limpeza = 0.0
+    with closing(_conectar()) as con:
+        while True:
+            try:
+                pendentes = [_fila.get(timeout=60)]
+            except queue.Empty:
+                pendentes = []
+            while pendentes and len(pendentes) < _ESCRITA_MAX:
+                try:
+                    pendentes.append(_fila.get_nowait())
+                except queue.Empty:
+                    break
+            if pendentes:
+                try:
+                    resultados = _gravar(con, pendentes)
+                except Exception:
+                    # Um item com problema não derruba os outros da mesma transação
+                    for item in pendentes:
+                        try:
+                            item[2].set_result(_gravar(con, [item])[0])
+                        except Exception as e:
+                            item[2].set_exception(e)
+                else:
+                    for (_, _, futuro), resultado in zip(pendentes, resultados):
+                        futuro.set_result(resultado)
+            if RELATORIOS_RETENCAO_DIAS > 0 and time.time() - ultima_limpeza > _LIMPEZA_S:
+                try:
+                    _limpar(con)
+                except Exception as e:
+                    print(f"[WARN] Falha na limpeza do acervo de relatórios: {e}")
+                ultima_limpeza = time.time()
+
+
+def limpar():
+    """Apaga relatórios mais antigos que RELATORIOS_RETENCAO_DIAS; devolve quantos."""
+    with closing(_conectar()) as con:
+        return _limpar(con)
+
+
+def _limpar(con):
+    limite = time.time() - RELATORIOS_RETENCAO_DIAS * 86400
+    # Pela data (índice de criado_em), não por faixa de seq: importados têm seq novo e data antiga
+    con.execute("BEGIN IMMEDIATE")
+    con.execute("DELETE FROM relatorio_cpfs WHERE seq IN (SELECT seq FROM relatorios WHERE criado_em < ?)",
+                (limite,))
+    apagados = con.execute("DELETE FROM relatorios WHERE criado_em < ?", (limite,)).rowcount
+    con.execute("DELETE FROM textos_fts WHERE rowid IN (SELECT seq FROM textos WHERE criado_em < ?)", (limite,))
+    textos = con.execute("DELETE FROM textos WHERE criado_em < ?", (limite,)).rowcount
+    con.execute("DELETE FROM atos WHERE chave IN (SELECT chave FROM matriculas WHERE atualizado_em < ?)",
+                (limite,))
+    con.execute("DELETE FROM matriculas WHERE atualizado_em < ?", (limite,))
+    con.execute("COMMIT")
+    if apagados or textos:
+        print(f"[INFO] Retenção: {apagados} relatório(s) e {textos} texto(s) apagado(s) do acervo.")
+    return apagados
+
+
+# ---------------- LEITURA ----------------
+_RESUMO = "seq, id, nome, criado_em, matricula, cartorio, diagnostico, origem, arquivo"
+
+
+def _resumo(linha):
+    return {
+        "id": linha["id"],
+        "nome": linha["nome"],
+        "criado_em": linha["criado_em"],
+        "matricula": linha["matricula"],
+        "cartorio": linha["cartorio"],
+        "diagnostico": linha["diagnostico"],
+        "origem": linha["origem"],
+        "arquivo": linha["arquivo"],
+    }
+
+
+def atos_analisados(chave):
+    """(cabeçalho ou None, {número: (hash do texto, análise)}) da matrícula `chave`."""
+    with closing(_conectar()) as con:
+        linha = con.execute("SELECT cabecalho FROM matriculas WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None, {}
+        analises = {n: (h, json.loads(a)) for n, a, h in
+                    con.execute("SELECT numero, analise, hash FROM atos WHERE chave = ?", (chave,))}
+    return json.loads(linha[0]), analises
+
+
+def obter_json(id_ou_nome):
+    """(nome, JSON gravado) do relatório pelo id ou pelo nome de download, ou None."""
+    with closing(_conectar()) as con:
+        linha = con.execute("SELECT nome, dados FROM relatorios WHERE id = ? OR nome = ?",
+                            (id_ou_nome, id_ou_nome)).fetchone()
+    return (linha["nome"], linha["dados"]) if linha else None
+
+
+def obter(id_ou_nome):
+    """Resumo do relatório com o JSON completo em "relatorio", ou None."""
+    with closing(_conectar()) as con:
+        linha = con.execute(f"SELECT {_RESUMO}, dados FROM relatorios WHERE id = ? OR nome = ?",
+                            (id_ou_nome, id_ou_nome)).fetchone()
+    if linha is None:
+        return None
+    return dict(_resumo(linha), relatorio=json.loads(linha["dados"]))
+
+
+def listar(matricula=None, cartorio=None, cpf=None, diagnostico=None, desde=None, ate=None,
+           limite=50, cursor=None):
+    """
+    Página de resumos, do mais recente para o mais antigo, filtrada pelos
+    campos indexados (`desde`/`ate` em epoch). Devolve (itens, próximo cursor
+    ou None); o cursor é opaco e vai no pedido da página seguinte.
+    """
+    condicoes, params = [], []
+    if matricula:
+        condicoes.append("matricula = ?")
+        params.append(_digitos(matricula))
+    if cartorio:
+        condicoes.append("cartorio = ?")
+        params.append(normalizar(cartorio))
+    if diagnostico:
+        condicoes.append("diagnostico = ?")
+        params.append(normalizar(diagnostico))
+    if cpf:
+        condicoes.append("seq IN (SELECT seq FROM relatorio_cpfs WHERE cpf = ?)")
+        params.append(_digitos(cpf))
+    if desde is not None:
+        condicoes.append("criado_em >= ?")
+        params.append(float(desde))
+    if ate is not None:
+        condicoes.append("criado_em < ?")
+        params.append(float(ate))
+    if cursor:
+        # "<criado_em>:<seq>" do último item da página anterior
+        data, _, seq = str(cursor).partition(":")
+        condicoes.append("(criado_em < ? OR (criado_em = ? AND seq < ?))")
+        params += [float(data), float(data), int(seq)]
+    limite = max(1, min(int(limite), LISTA_MAX))
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    with closing(_conectar()) as con:
+        linhas = con.execute(f"SELECT {_RESUMO} FROM relatorios {where} ORDER BY criado_em DESC, seq DESC LIMIT ?",
+                             params + [limite + 1]).fetchall()
+    ultimo = linhas[limite - 1] if len(linhas) > limite else None
+    proximo = f"{ultimo['criado_em']!r}:{ultimo['seq']}" if ultimo else None
+    return [_resumo(ln) for ln in linhas[:limite]], proximo
+
+
+# ---------------- BUSCA TEXTUAL ----------------
+def consulta_fts(consulta):
+    """
+    Expressão FTS5 para a busca digitada: todos os termos (E), "frases entre
+    aspas" e prefixo com *. Termos numéricos (CPF, processo, matrícula) também
+    batem só pelos dígitos.
+    """
+    partes = []
+    for termo in _TERMO.findall(consulta or ""):
+        prefixo = "*" if termo.endswith("*") else ""
+        termo = termo.rstrip("*").strip('"').replace('"', "").strip()
+        if not termo:
+            continue
+        frase = f'"{termo}"{prefixo}'
+        digitos = _digitos(termo)
+        if _SO_NUMERO.fullmatch(termo) and digitos and len(digitos) >= 6:
+            partes.append(f'({frase} OR numeros : "{digitos}"{prefixo})')
+        else:
+            partes.append(frase)
+    return " AND ".join(partes)
+
+
+def buscar(consulta, limite=20):
+    """
+    Textos que contêm todos os termos, do mais relevante (bm25) para o menos,
+    com um trecho destacado («termo») e o relatório mais recente do PDF.
+    """
+    expressao = consulta_fts(consulta)
+    if not expressao:
+        return []
+    limite = max(1, min(int(limite), LISTA_MAX))
+    with closing(_conectar()) as con:
+        try:
+            linhas = con.execute("""
+                SELECT t.arquivo AS pdf, t.sha256, t.criado_em AS indexado_em,
+                       snippet(textos_fts, 0, '«', '»', '…', 16) AS trecho,
+                       bm25(textos_fts, 1.0, 0.5) AS pontuacao,
+                       r.id, r.nome, r.matricula, r.cartorio, r.diagnostico
+                FROM textos_fts
+                JOIN textos t ON t.seq = textos_fts.rowid
+                LEFT JOIN relatorios r ON r.seq = t.relatorio_seq
+                WHERE textos_fts MATCH ?
+                ORDER BY pontuacao
+                LIMIT ?""", (expressao, limite)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Busca inválida: {e}") from e
+    return [{
+        "trecho": " ".join(ln["trecho"].split()),
+        "pontuacao": round(-ln["pontuacao"], 3),
+        "arquivo": ln["pdf"],
+        "sha256": ln["sha256"],
+        "indexado_em": ln["indexado_em"],
+        "relatorio_id": ln["id"],
+        "nome": ln["nome"],
+        "matricula": ln["matricula"],
+        "cartorio": ln["cartorio"],
+        "diagnostico": ln["diagnostico"],
+    } for ln in linhas]
+
+
+# ---------------- REINDEXAÇÃO (CARGA DO QUE JÁ EXISTIA) ----------------
+def reindexar(pasta_uploads="uploads", pasta_relatorios="relatorios"):
+    """
+    Importa os relatórios JSON antigos de `pasta_relatorios` (menos os
+    consolidados de lote) e indexa o texto de cada PDF de `pasta_uploads` que
+    ainda não está no índice. A extração usa os parâmetros do app.py, então
+    PDFs já processados saem do cache de extração sem OCR.
+    """
+    from cache import hash_arquivo
+    from ocr import extrair_paginas
+
+    importados = indexados = 0
+    with closing(_conectar()) as con:
+        nomes = {ln[0] for ln in con.execute("SELECT nome FROM relatorios")}
+        hashes = {ln[0] for ln in con.execute("SELECT sha256 FROM textos WHERE sha256 IS NOT NULL")}
+
+    for nome in sorted(os.listdir(pasta_relatorios)) if os.path.isdir(pasta_relatorios) else []:
+        caminho = os.path.join(pasta_relatorios, nome)
+        if not nome.endswith(".json") or nome.startswith("lote_") or nome in nomes:
+            continue
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Relatório ignorado ({nome}): {e}")
+            continue
+        if isinstance(dados, dict):
+            salvar(dados, nome=nome, origem="importado", criado_em=os.path.getmtime(caminho))
+            importados += 1
+
+    for raiz, _, arquivos in os.walk(pasta_uploads):
+        for nome in sorted(arquivos):
+            if not nome.lower().endswith(".pdf"):
+                continue
+            caminho = os.path.join(raiz, nome)
+            sha256 = hash_arquivo(caminho)
+            if sha256 in hashes:
+                continue
+            try:
+                paginas = extrair_paginas(caminho, min_chars=51, dpi=300, lang="por", config="--psm 4",
+                                          sha256=sha256)
+            except Exception as e:
+                print(f"[WARN] PDF ignorado ({caminho}): {e}")
+                continue
+            texto = "\n".join(p["texto"] for p in paginas).strip()
+            if texto:
+                indexar_texto(texto, arquivo=nome, sha256=sha256)
+                hashes.add(sha256)
+                indexados += 1
+                print(f"[INFO] Indexado: {caminho}")
+    print(f"[INFO] Reindexação: {importados} relatório(s) importado(s), {indexados} PDF(s) indexado(s).")
+    return importados, indexados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Acervo de relatórios e índice de busca.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    r = comandos.add_parser("reindexar", help="importa relatórios antigos e indexa os PDFs de uploads/")
+    r.add_argument("--uploads", default="uploads")
+    r.add_argument("--relatorios", default="relatorios")
+    b = comandos.add_parser("buscar", help="busca textual no acervo")
+    b.add_argument("consulta")
+    b.add_argument("--limite", type=int, default=10)
+    comandos.add_parser("limpar", help="aplica a retenção agora")
+    args = parser.parse_args()
+
+    if args.comando == "reindexar":
+        reindexar(args.uploads, args.relatorios)
+    elif args.comando == "buscar":
+        for item in buscar(args.consulta, args.limite):
+            print(f"{item['pontuacao']:>8.2f}  {item['matricula'] or '-':<10} {item['arquivo'] or '-'}")
+            print(f"          {item['trecho']}")
+    else:
+        limpar()
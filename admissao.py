@@ -0,0 +1,65 @@
+"""
+Limite de admissão do processo, o mesmo para todos os pipelines carregados
+nele (app.py, app_gemini_new.py, os dois juntos em wsgi.py): quantas
+certidões podem estar na extração (pdfplumber/OCR) e quantas chamadas à IA
+podem estar em andamento ao mesmo tempo, somando /upload, lotes, /analyze e
+jobs. Quem passa do limite espera a vez; o tempo de espera vai para as
+métricas (espera_cpu, espera_ia).
+
+Com vários workers do gunicorn o limite vale por worker; para um teto único
+de CPU na máquina, um worker com threads (gthread), como em gunicorn.conf.py.
+
+Variáveis de ambiente:
+  CPU_CONCORRENCIA  certidões na extração ao mesmo tempo (padrão: 2)
+  IA_CONCORRENCIA   chamadas à IA em andamento ao mesmo tempo (padrão: 4)
+"""
+
+import os
+import time
+import threading
+
+from metricas import observar
+
+CPU_CONCORRENCIA = int(os.environ.get("CPU_CONCORRENCIA", "2"))
+IA_CONCORRENCIA = int(os.environ.get("IA_CONCORRENCIA", "4"))
+
+
+class Limite:
+    """Semáforo usado com `with`, contando quem está dentro e quem espera."""
+
+    def __init__(self, nome, vagas):
+        self.nome = nome
+        self.vagas = vagas
+        self._semaforo = threading.BoundedSemaphore(vagas)
+        self._lock = threading.Lock()
+        self.em_uso = 0
+        self.aguardando = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.aguardando += 1
+        inicio = time.perf_counter()
+        self._semaforo.acquire()
+        with self._lock:
+            self.aguardando -= 1
+            self.em_uso += 1
+        observar(f"espera_{self.nome}", time.perf_counter() - inicio)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.em_uso -= 1
+        self._semaforo.release()
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {"vagas": self.vagas, "em_uso": self.em_uso, "aguardando": self.aguardando}
+
+
+cpu = Limite("cpu", CPU_CONCORRENCIA)
+ia = Limite("ia", IA_CONCORRENCIA)
+
+
+def stats():
+    return {"cpu": cpu.stats(), "ia": ia.stats(), "pid": os.getpid()}
@@ -1,241 +1,100 @@
+import io
 import os
 import json
-import re
-import requests
-import pdfplumber
-import pytesseract
-import platform
-from pdf2image import convert_from_path
-from datetime import datetime
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import time
+from flask import Flask, Response, request, jsonify, render_template, send_file, send_from_directory, url_for
 from werkzeug.utils import secure_filename
-from collections import Counter
 from flask_cors import CORS
 
+import acervo
+import admissao
+import atos
+from ocr import extrair_paginas
+from cache import cache_extracao, cache_ia, voos_ia, hash_arquivo
+from cliente_ia import stats_pool
+import provedores
+from provedores import disjuntor_groq
+import jobs
+import lote
+import metricas
+import partida
+import recebimento
+from metricas import medir
+from progresso import emitir
+from certidao import (POPPLER_PATH, PARAMETROS_EXTRACAO, TEXTO_MINIMO, GROQ_ORCAMENTO_TOKENS,
+                      texto_legivel, montar_prompt, concluir_certidao)
+
 # --- CONFIGURAÇÃO ---
 app = Flask(__name__)
 CORS(app)  # Habilita CORS (útil para testes via browser)
-
-# --- DETECÇÃO DE AMBIENTE (Windows vs Linux) ---
-sistema_operacional = platform.system()
-
-if sistema_operacional == "Windows":
-    print(">>> Ambiente detectado: WINDOWS (Local)")
-    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-    # Ajuste abaixo para o caminho real do poppler no seu PC se necessário
-    poppler_dir = r"C:\poppler\Library\bin"
-    if os.path.exists(poppler_dir) and poppler_dir not in os.environ.get('PATH', ''):
-        os.environ['PATH'] += ";" + poppler_dir
-    POPPLER_PATH = poppler_dir
-else:
-    print(">>> Ambiente detectado: LINUX (Servidor)")
-    pytesseract.pytesseract.tesseract_cmd = '/usr/bin/tesseract'  # padrão Linux
-    POPPLER_PATH = None  # No Linux, normalmente não precisa informar o caminho
-
-# --- CHAVE GROQ (LEIA DE VARIÁVEL DE AMBIENTE, COM FALLBACK SE VOCÊ JÁ A PASSOU) ---
-# É fortemente recomendado setar GROQ_API_KEY como variável de ambiente no Render:
-# Ex.: GROQ_API_KEY = 'gsk_...'
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "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")
+# Uploads acima do limite são recusados com 413 antes de o corpo ser lido (UPLOAD_MAX_MB)
+app.config['MAX_CONTENT_LENGTH'] = recebimento.UPLOAD_MAX_BYTES
 
 # --- PASTAS ---
-UPLOAD_FOLDER = 'uploads'
+UPLOAD_FOLDER = recebimento.UPLOAD_DIR  # a mesma do app_gemini_new (wsgi.py monta os dois)
 REPORT_FOLDER = 'relatorios'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(REPORT_FOLDER, exist_ok=True)
 
-# ---------------- LEITURA (TENTA PDFPLUMBER ANTES DO OCR) ----------------
-def extrair_texto(caminho_pdf):
+# --- CONCORRÊNCIA ---
+# Certidões na extração e chamadas à IA ao mesmo tempo: admissao.py, um limite
+# só para /upload, lotes e, no mesmo processo, o app_gemini_new.
+
+# ---------------- LEITURA (PDFPLUMBER POR PÁGINA, OCR SÓ ONDE FALTA TEXTO) ----------------
+# Parâmetros da extração, páginas ilegíveis e a conclusão do relatório ficam em
+# certidao.py (o asgi.py usa o mesmo, sem importar este app e seus workers de jobs)
+
+def extrair_texto_por_pagina(caminho_pdf, sha256=None):
     """
-    Tenta extrair texto diretamente do PDF (pdfplumber). Se vazio ou pouca coisa,
-    faz OCR página-a-página com pytesseract + pdf2image.
+    Lê cada página pelo pdfplumber quando ela tem camada de texto (mais de 50
+    caracteres) e faz OCR com pytesseract + pdf2image só nas páginas de imagem.
+    Retorna lista de {"pagina", "metodo", "texto"} (as de OCR com "confianca"
+    e "dpi"). `sha256` (calculado no upload) evita reler o PDF só para achar a
+    entrada do cache.
     """
     print(f"[INFO] Lendo PDF: {caminho_pdf}")
-    texto = ""
+    paginas = extrair_paginas(caminho_pdf, poppler_path=POPPLER_PATH, sha256=sha256, **PARAMETROS_EXTRACAO)
+    n_ocr = sum(1 for p in paginas if p["metodo"] == "ocr")
+    print(f"[INFO] Extração finalizada. {len(paginas)} páginas ({n_ocr} via OCR).")
+    return paginas
 
-    # 1) Tenta pdfplumber (funciona quando o PDF já tem texto)
-    try:
-        with pdfplumber.open(caminho_pdf) as pdf:
-            paginas = []
-            for p in pdf.pages:
-                t = p.extract_text() or ""
-                paginas.append(t)
-            texto_plumber = "\n".join(paginas).strip()
-            if texto_plumber and len(texto_plumber) > 50:
-                print("[INFO] Texto extraído via pdfplumber (sem OCR).")
-                return texto_plumber
-    except Exception as e:
-        print(f"[WARN] pdfplumber falhou: {e}")
-
-    # 2) Fallback para OCR com pdf2image + pytesseract
-    try:
-        print("[INFO] Usando OCR (pytesseract) — isso pode demorar...")
-        # DPI 300 costuma dar boa qualidade para OCR
-        if POPPLER_PATH and sistema_operacional == "Windows":
-            imagens = convert_from_path(caminho_pdf, dpi=300, poppler_path=POPPLER_PATH)
-        else:
-            imagens = convert_from_path(caminho_pdf, dpi=300)
-        partes = []
-        for img in imagens:
-            # '--psm 4' funciona bem para textos com colunas simples; ajuste se necessário
-            txt = pytesseract.image_to_string(img, lang='por', config='--psm 4')
-            partes.append(txt)
-        texto = "\n".join(partes)
-        print(f"[INFO] OCR finalizado. {len(partes)} páginas processadas.")
-    except Exception as e:
-        print(f"[ERRO] Falha no OCR: {e}")
-        return ""
-
-    return texto
-
-# ---------------- IA (GROQ) ----------------
-def analisar_com_ia(texto):
+def extrair_texto(caminho_pdf):
+    """Texto completo do PDF (páginas unidas por quebra de linha)."""
+    return "\n".join(p["texto"] for p in extrair_texto_por_pagina(caminho_pdf)).strip()
+
+# ---------------- IA (GROQ / GEMINI) ----------------
+# Chave, endpoint e modelo de cada provedor ficam em provedores.py (GROQ_API_KEY, GROQ_URL, GOOGLE_API_KEY...).
+def analisar_com_ia(texto, prompt=None):
     """
-    Tenta enviar um prompt para a API Groq (OpenAI-compatible endpoint).
-    Retorna string JSON produzida pela IA (ou None em caso de falha).
+    Envia o prompt (padrão: montar_prompt(texto)) aos provedores de IA (Groq
+    primeiro; Gemini em hedge ou failover, se configurado). Retorna a primeira
+    resposta com JSON válido (ou None em caso de falha). Prompts idênticos
+    reaproveitam a resposta em cache, e pedidos simultâneos com o mesmo prompt
+    esperam uma única chamada.
     """
-    if not GROQ_API_KEY or GROQ_API_KEY.strip() == "":
-        print("[INFO] Sem chave GROQ configurada.")
+    if not provedores.disponiveis():
+        print("[INFO] Nenhum provedor de IA configurado (GROQ_API_KEY/GOOGLE_API_KEY).")
         return None
 
-    try:
-        # Endpoint compatível OpenAI (fornecido anteriormente); se necessário ajuste ao endpoint real da sua conta Groq
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        # Monta um prompt robusto e com limite de tamanho
-        resumo_texto = (texto[:6000] + "\n...[MEIO DO DOCUMENTO]...\n" + texto[-3000:]) if len(texto) > 9000 else texto
-        prompt = (
-            "Você é um assistente especializado em matrículas e certidões imobiliárias do Rio de Janeiro. "
-            "Extraia um JSON com as chaves: Cartório, Matrícula, Data da Certidão, Endereço, Proprietários (lista com nome e CPF se houver), Ônus (lista), Diagnóstico. "
-            "Retorne apenas JSON válido. Aqui está o texto:\n\n" + resumo_texto
-        )
-
-        payload = {
-            "model": "llama3-70b-8192",  # se esse modelo não existir na sua conta, ajuste conforme disponível
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 1200,
-            "temperature": 0.0
-        }
-
-        resp = requests.post(url, headers=headers, json=payload, timeout=40)
-        if resp.status_code != 200:
-            print(f"[WARN] Groq retornou status {resp.status_code}: {resp.text}")
-            return None
-
-        j = resp.json()
-        # Tenta navegar por formatos diferentes (compatível com OpenAI-like)
-        text_resp = None
-        if isinstance(j, dict):
-            # OpenAI-like
-            try:
-                text_resp = j['choices'][0]['message']['content']
-            except Exception:
-                # Algumas APIs retornam em 'choices'[0]['text']
-                try:
-                    text_resp = j['choices'][0].get('text')
-                except Exception:
-                    text_resp = None
-
-        if not text_resp:
-            print("[WARN] Resposta da IA não contém conteúdo esperado.")
-            return None
-
-        # Retorna a string — quem chama deve tentar json.loads
-        return text_resp.strip()
-
-    except Exception as e:
-        print(f"[ERRO] Falha ao chamar API Groq: {e}")
-        return None
+    prompt = prompt or montar_prompt(texto)
+    emitir("ia_enviada", "Texto enviado para análise da IA")
+    # Uma vaga de admissao.ia por chamada: os lotes de atos de uma certidão vão juntos
+    with admissao.ia, medir("ia"):
+        nome, resposta = provedores.chamar(prompt)
+    if nome:
+        print(f"[INFO] Resposta da IA via {nome}.")
+    return resposta
 
-# ---------------- LÓGICA DE CARTORÁRIO (REGEX) ----------------
-def analisar_inteligencia_registral(texto):
-    print(">>> Iniciando Análise Lógica (Regex)...")
-    texto_limpo = re.sub(r'\s+', ' ', texto).upper()
-
-    # CARTÓRIO
-    cabecalho = texto_limpo[:1000]
-    cartorio = "Registro de Imóveis - RJ"
-    match_cartorio = re.search(r'(\d+)[º°ª]\s*(?:OF[ÍI]CIO|REGISTRO)', cabecalho)
-    if match_cartorio:
-        numero = match_cartorio.group(1)
-        cartorio = f"{numero}º Ofício de Registro de Imóveis - RJ"
-    elif "5º OFÍCIO" in cabecalho:
-        cartorio = "5º Ofício de Registro de Imóveis - RJ"
-    elif "9º OFÍCIO" in cabecalho:
-        cartorio = "9º Ofício de Registro de Imóveis - RJ"
-
-    # DATA DA CERTIDÃO
-    rodape = texto_limpo[-2000:]
-    data_certidao = datetime.now().strftime('%d/%m/%Y')
-    match_data_extenso = re.search(r'RIO DE JANEIRO,?\s*(\d{1,2})\s*DE\s*([A-ZÇ]+)\s*DE\s*(\d{4})', rodape)
-    match_data_simples = re.findall(r'(\d{2}/\d{2}/\d{4})', rodape)
-    if match_data_extenso:
-        dia, mes, ano = match_data_extenso.groups()
-        data_certidao = f"{dia} de {mes} de {ano}"
-    elif match_data_simples:
-        data_certidao = match_data_simples[-1]
-
-    # MATRÍCULA
-    matricula = "Não identificada"
-    candidatos_matricula = re.findall(r'[RAV]\.?(\d{4,7})', texto_limpo)
-    if candidatos_matricula:
-        matricula = Counter(candidatos_matricula).most_common(1)[0][0]
-    else:
-        match_topo = re.search(r'MATR[ÍI]CULA.*?(\d{4,7})', texto_limpo)
-        if match_topo:
-            matricula = match_topo.group(1)
-
-    # PROPRIETÁRIOS
-    proprietarios = []
-    # Busca padrões de "NOME, CPF nnn.nnn.nnn-nn"
-    matches_cpf = re.findall(r'([A-Z\s\.\-]{6,200}?)\s+CPF[:\s]*([\d\.\-]{11,14})', texto_limpo)
-    for nome, cpf in matches_cpf:
-        n = nome.strip().title()
-        proprietarios.append({"nome": n, "cpf": cpf})
-
-    if not proprietarios:
-        # tentativa genérica
-        generic_matches = re.findall(r'(PROPRIET[ÁA]RIO|ADQUIRENTE|PROPRIETARIOS?).{0,40}([A-Z][A-Z\s,]{4,200})', texto_limpo)
-        for gm in generic_matches:
-            n = re.sub(r'CPF.*', '', gm[1]).strip().title()
-            if len(n) > 4:
-                proprietarios.append({"nome": n})
-
-    # ENDEREÇO
-    endereco = "Endereço não localizado"
-    match_end = re.search(r'(?:ENDEREÇOS?|ENDEREÇO|LOCALIZADO EM|SITUADO EM).*?((?:RUA|AVENIDA|AV|TRAVESSA|ALAMEDA|PRAÇA).{1,200}?)\.', texto_limpo)
-    if match_end:
-        endereco = match_end.group(1).strip().title()
-    else:
-        match_end2 = re.search(r'(?:AV\.|RUA|AVENIDA|PRAÇA|TRAVESSA)\s+[A-Z0-9\.\-\/\s]{4,200}', texto_limpo)
-        if match_end2:
-            endereco = match_end2.group(0).strip().title()
-
-    # ÔNUS
-    termos_perigo = ["PENHORA", "HIPOTECA", "INDISPONIBILIDADE", "ARRESTO", "ARRESTOS", "AÇÃO DE EXECUÇÃO", "EXECUÇÃO"]
-    onus_encontrados = []
-    for termo in termos_perigo:
-        if termo in texto_limpo:
-            onus_encontrados.append(termo)
-
-    diagnostico = "Pode Vender (Livre)" if not onus_encontrados else "Atenção (Possíveis Ônus)"
-
-    if not onus_encontrados:
-        onus_encontrados = ["Nada consta (Livre de Ônus Reais)"]
-
-    return {
-        "Cartório": cartorio,
-        "Matrícula": matricula,
-        "Data da Busca": datetime.now().strftime('%d/%m/%Y'),
-        "Data da Certidão": data_certidao,
-        "Endereço": endereco,
-        "Proprietários": proprietarios if proprietarios else [{"nome": "Verificar R.1 na imagem"}],
-        "Ônus Reais": onus_encontrados,
-        "Diagnóstico": diagnostico
-    }
+def analisar_atos_com_ia(texto):
+    """
+    Análise incremental (atos.py): só os atos R./AV. desta matrícula que ainda
+    não foram analisados vão para a IA, e o relatório sai da junção com os já
+    guardados. Retorna (dados ou None se a IA falhar, resumo dos atos), ou None
+    se não se aplica (sem atos numerados/matrícula, sem provedor de IA).
+    """
+    if not provedores.disponiveis():
+        return None
+    return atos.analisar(texto, lambda prompt: analisar_com_ia(texto, prompt=prompt), GROQ_ORCAMENTO_TOKENS)
 
 # ---------------- ROTAS ----------------
 @app.route('/')
@@ -244,6 +103,10 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    """
+    Recebe o PDF e roda o pipeline. Com ?async=1 só grava o arquivo, enfileira
+    um job e responde 202 com o id (acompanhar em GET /jobs/<id>).
+    """
     if 'file' not in request.files:
         return jsonify({"error": "Erro: arquivo não enviado"}), 400
 
@@ -251,42 +114,199 @@ def upload_file():
     if file.filename == '':
         return jsonify({"error": "Erro: nome do arquivo inválido"}), 400
 
-    filename = secure_filename(file.filename)
-    path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(path)
-    print(f"[INFO] Arquivo salvo em: {path}")
-
-    # Extrai texto (pdfplumber -> OCR)
-    texto = extrair_texto(path)
-    if not texto or len(texto.strip()) < 20:
-        print("[WARN] Texto extraído muito curto ou vazio; retornando análise padrão.")
-        dados = analisar_inteligencia_registral(texto)
-    else:
-        # Tenta IA primeiro
-        resposta_ia = analisar_com_ia(texto)
-        if resposta_ia:
-            try:
-                # Remove possíveis blocos de código e tenta carregar JSON
-                cleaned = resposta_ia.strip().replace('```json', '').replace('```', '').strip()
-                dados = json.loads(cleaned)
-                print("[INFO] Dados extraídos via IA (JSON).")
-            except Exception as e:
-                print(f"[WARN] IA retornou mas não é JSON válido: {e}")
-                dados = analisar_inteligencia_registral(texto)
-        else:
-            dados = analisar_inteligencia_registral(texto)
-
-    # Salva relatório
-    nome_relatorio = f"analise_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    caminho_relatorio = os.path.join(REPORT_FOLDER, nome_relatorio)
-    with open(caminho_relatorio, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=2, ensure_ascii=False)
-
-    return jsonify({"relatorio": dados, "arquivo_relatorio": nome_relatorio})
+    # Gravado como uploads/<sha256>.pdf: nomes iguais de clientes diferentes não colidem
+    filename = secure_filename(file.filename) or "certidao.pdf"
+    with medir("upload"):
+        path, sha256, tamanho = recebimento.salvar_upload(file, UPLOAD_FOLDER)
+    print(f"[INFO] Arquivo {filename} ({tamanho} bytes) salvo em: {path}")
+
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        job_id = jobs.enfileirar("upload", {"path": path, "arquivo": filename, "sha256": sha256},
+                                 evento=("arquivo_salvo", {"mensagem": "Arquivo recebido"}))
+        return jsonify({"job_id": job_id, "status_url": url_for("job_status", job_id=job_id)}), 202
+
+    return jsonify(processar_certidao(path, arquivo=filename, sha256=sha256))
+
+def processar_certidao(path, nome_relatorio=None, arquivo=None, sha256=None):
+    """
+    Pipeline completo de um PDF já salvo: extração, IA (ou regex) e relatório.
+    `arquivo` é o nome enviado pelo cliente (padrão: o do caminho) e `sha256`
+    o hash calculado no upload (padrão: calculado aqui).
+    """
+    arquivo = arquivo or os.path.basename(path)
+    with metricas.rastrear(arquivo=arquivo):
+        return _processar_certidao(path, nome_relatorio, arquivo, sha256 or hash_arquivo(path))
+
+def _processar_certidao(path, nome_relatorio, arquivo, sha256):
+    # Extrai texto (pdfplumber por página -> OCR só nas páginas sem texto)
+    with admissao.cpu:
+        paginas = extrair_texto_por_pagina(path, sha256=sha256)
+    texto, ilegiveis = texto_legivel(paginas)
+    dados = resumo_atos = resposta_ia = None
+    if len(texto) >= TEXTO_MINIMO:
+        # Tenta IA primeiro: por ato, reaproveitando os já analisados; senão o documento inteiro
+        incremental = analisar_atos_com_ia(texto)
+        if incremental is not None:
+            dados, resumo_atos = incremental
+        # Sem atos numerados, ato grande demais para um prompt, ou a IA respondeu fora do
+        # formato por ato: vai o documento inteiro
+        refazer = incremental is None or (dados is None and resumo_atos.get("falha") in ("formato", "truncado"))
+        resposta_ia = analisar_com_ia(texto) if refazer else None
+    return concluir_certidao(paginas, ilegiveis, texto, dados, resumo_atos, resposta_ia,
+                             nome_relatorio, arquivo, sha256)
+
+@app.route('/upload/lote', methods=['POST'])
+def upload_lote():
+    """
+    Recebe vários PDFs (campo 'files') e/ou ZIPs com PDFs e processa todos.
+    Responde em NDJSON: uma linha por arquivo, na ordem em que terminam, e por
+    último o relatório consolidado. Com ?async=1 enfileira um job e responde 202;
+    cada arquivo concluído vira um evento "lote_item" no SSE do job.
+    """
+    # Um lote pode ser bem maior que um upload avulso
+    request.max_content_length = lote.LOTE_MAX_BYTES
+    arquivos = request.files.getlist('files') + request.files.getlist('file')
+    if not arquivos:
+        return jsonify({"error": "Erro: nenhum arquivo enviado"}), 400
+
+    lote_id = lote.novo_id()
+    try:
+        with medir("upload"):
+            caminhos = lote.salvar_arquivos(arquivos, os.path.join(UPLOAD_FOLDER, f"lote_{lote_id}"))
+    except lote.LoteInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    print(f"[INFO] Lote {lote_id}: {len(caminhos)} arquivos salvos.")
+
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        job_id = jobs.enfileirar("lote", {"lote": lote_id, "caminhos": caminhos},
+                                 evento=("arquivo_salvo", {"mensagem": f"{len(caminhos)} arquivos recebidos"}))
+        return jsonify({"job_id": job_id, "lote": lote_id, "total": len(caminhos),
+                        "status_url": url_for("job_status", job_id=job_id)}), 202
+
+    def gerar():
+        itens = []
+        for item in _processar_lote(lote_id, caminhos):
+            itens.append(item)
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+        consolidado = lote.consolidar(lote_id, itens, REPORT_FOLDER)
+        yield json.dumps({"consolidado": consolidado}, ensure_ascii=False) + "\n"
+
+    return Response(gerar(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+def _processar_lote(lote_id, caminhos):
+    """Roda processar_certidao em cada arquivo do lote; gera os itens conforme terminam."""
+    def _processar_um(indice, caminho):
+        base = os.path.splitext(os.path.basename(caminho))[0]
+        return processar_certidao(caminho, nome_relatorio=f"analise_lote_{lote_id}_{indice + 1:03d}_{base}.json")
+    return lote.processar(caminhos, _processar_um)
+
+def _job_lote(payload):
+    itens = []
+    total = len(payload["caminhos"])
+    for item in _processar_lote(payload["lote"], payload["caminhos"]):
+        itens.append(item)
+        emitir("lote_item", f"{len(itens)}/{total} arquivos processados", **item)
+    return lote.consolidar(payload["lote"], itens, REPORT_FOLDER)
+
+jobs.registrar("upload", lambda payload: processar_certidao(
+    payload["path"], arquivo=payload.get("arquivo"), sha256=payload.get("sha256")))
+jobs.registrar("lote", _job_lote, lease_s=lote.LOTE_LEASE_S)
+# Com o preload do gunicorn as threads só sobem depois do fork, em cada worker
+partida.no_processo(jobs.iniciar_workers)
+
+@app.errorhandler(413)
+def upload_grande_demais(e):
+    limite = request.max_content_length or recebimento.UPLOAD_MAX_BYTES
+    return jsonify({"error": f"Erro: envio grande demais (máximo {limite // (1024 * 1024)} MB)"}), 413
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.obter(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/eventos')
+def job_eventos(job_id):
+    """Progresso do job em Server-Sent Events (EventSource no navegador)."""
+    ultimo_id = request.headers.get('Last-Event-ID', request.args.get('desde', '0'))
+    return Response(jobs.stream_eventos(job_id, int(ultimo_id or 0)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify({
+        "extracao": cache_extracao.stats(),
+        "ia": dict(cache_ia.stats(), **voos_ia.stats()),
+    })
+
+@app.route('/ia/status')
+def ia_status():
+    """Disjuntor da Groq, pool de conexões, latência/hedge dos provedores e admissão deste worker."""
+    return jsonify({
+        "groq": disjuntor_groq.stats(),
+        "pool": stats_pool(),
+        "provedores": provedores.stats(),
+        "admissao": admissao.stats(),
+        "pid": os.getpid(),
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Histogramas por etapa e contadores do pipeline, no formato do Prometheus."""
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/relatorios')
+def listar_relatorios():
+    """
+    Relatórios do acervo, do mais recente ao mais antigo, filtrados por
+    matricula, cartorio, cpf, diagnostico, desde/ate (epoch). Paginação por
+    cursor: passe o "proximo" da resposta em ?cursor= para a página seguinte.
+    """
+    a = request.args
+    try:
+        itens, proximo = acervo.listar(
+            matricula=a.get('matricula'), cartorio=a.get('cartorio'), cpf=a.get('cpf'),
+            diagnostico=a.get('diagnostico'), desde=a.get('desde', type=float), ate=a.get('ate', type=float),
+            limite=a.get('limite', 50, type=int), cursor=a.get('cursor'))
+    except ValueError:
+        return jsonify({"error": "Parâmetro inválido"}), 400
+    return jsonify({"itens": itens, "proximo": proximo})
+
+@app.route('/relatorios/<relatorio_id>')
+def obter_relatorio(relatorio_id):
+    relatorio = acervo.obter(relatorio_id)
+    if relatorio is None:
+        return jsonify({"error": "Relatório não encontrado"}), 404
+    return jsonify(relatorio)
+
+@app.route('/busca')
+def busca():
+    """
+    Busca textual nos textos extraídos de todas as certidões (?q=, ?limite=).
+    Termos são combinados com E; "frases entre aspas" e prefixo* valem, e
+    CPFs/processos batem com ou sem pontuação.
+    """
+    consulta = request.args.get('q', '').strip()
+    if not consulta:
+        return jsonify({"error": "Informe a busca em ?q="}), 400
+    inicio = time.perf_counter()
+    try:
+        resultados = acervo.buscar(consulta, request.args.get('limite', 20, type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"consulta": consulta, "resultados": resultados,
+                    "ms": round((time.perf_counter() - inicio) * 1000, 1)})
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    return send_from_directory(REPORT_FOLDER, filename, as_attachment=True)
+    """Baixa o relatório do acervo (pelo nome ou id); arquivos antigos e consolidados de lote vêm da pasta."""
+    gravado = acervo.obter_json(filename)
+    if gravado is None:
+        return send_from_directory(REPORT_FOLDER, filename, as_attachment=True)
+    nome, conteudo = gravado
+    return send_file(io.BytesIO(conteudo.encode('utf-8')), mimetype='application/json',
+                     as_attachment=True, download_name=nome)
 
 # ---------------- RUN ----------------
 if __name__ == '__main__':
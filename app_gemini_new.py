@@ -9,133 +9,53 @@ Defina a chave com a variável de ambiente GOOGLE_API_KEY (recomendado).
 import os
 import re
 import json
+import importlib.util
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, url_for
 from werkzeug.utils import secure_filename
 
-import pdfplumber
+import acervo
+import admissao
+from cache import cache_extracao, cache_ia, voos_ia, hash_arquivo
+import jobs
+import metricas
+import partida
+import recebimento
+from metricas import medir
+from progresso import emitir
+from selecao import selecionar_texto
 try:
-    import pytesseract
-    from pdf2image import convert_from_path
-    OCR_AVAILABLE = True
+    # pytesseract/pdfplumber só são importados no primeiro PDF (ocr.py)
+    from ocr import ocr_paginas_pdf, extrair_paginas
+    OCR_AVAILABLE = importlib.util.find_spec("pytesseract") is not None
 except Exception:
     OCR_AVAILABLE = False
 
-from google import genai
-
-# ---------------- GenAI client (compatível com variações da lib) ----------------
-
-API_KEY = os.environ.get("GOOGLE_API_KEY") or None
-
-# Tentamos suportar diferentes versões da lib:
-# - versões antigas tinham genai.configure(...) e genai.Model.get(...)
-# - versões novas usam genai.Client() com métodos como generate_text(...)
-genai_client = None
-use_old_api = False
-
-# Detecta e configura
-if hasattr(genai, "configure"):
-    # API antiga
-    if API_KEY:
-        try:
-            genai.configure(api_key=API_KEY)
-            use_old_api = True
-        except Exception:
-            # fallback para continuar
-            use_old_api = True
-    else:
-        use_old_api = True
-else:
-    # API nova: genai.Client
-    try:
-        # some versions accept api_key on constructor, others read env var
-        try:
-            genai_client = genai.Client(api_key=API_KEY) if API_KEY else genai.Client()
-        except TypeError:
-            # fallback: constructor sem argumento (lê env)
-            genai_client = genai.Client()
-    except Exception as e:
-        genai_client = None
+import provedores
+from provedores import extrair_json
 
-def _extract_response_text(resp):
-    """Extrai o conteúdo de texto de várias formas possíveis de resposta."""
-    if resp is None:
-        return ""
-    if hasattr(resp, "text"):
-        return getattr(resp, "text")
-    if isinstance(resp, dict):
-        if "candidates" in resp and isinstance(resp["candidates"], (list, tuple)) and resp["candidates"]:
-            c = resp["candidates"][0]
-            if isinstance(c, dict) and "content" in c:
-                return c["content"]
-            return str(c)
-        if "output" in resp:
-            out = resp["output"]
-            if isinstance(out, (list, tuple)):
-                parts = []
-                for o in out:
-                    if isinstance(o, dict):
-                        parts.append(o.get("content", "") or o.get("text", ""))
-                    else:
-                        parts.append(str(o))
-                return "\n".join(p for p in parts if p)
-            return str(out)
-    if hasattr(resp, "output"):
-        out = getattr(resp, "output")
-        try:
-            parts = []
-            for o in out:
-                if isinstance(o, dict):
-                    parts.append(o.get("content", "") or o.get("text", ""))
-                else:
-                    parts.append(str(o))
-            return "\n".join(p for p in parts if p)
-        except Exception:
-            return str(out)
-    return str(resp)
+# ---------------- GenAI (via camada de provedores) ----------------
+GEMINI_ORCAMENTO_TOKENS = int(os.environ.get("GEMINI_ORCAMENTO_TOKENS", "6000"))
+# Gemini primeiro; os demais provedores configurados entram no hedge/failover
+ORDEM_PROVEDORES = ["gemini"] + [p for p in provedores.IA_PROVEDORES if p != "gemini"]
 
 def call_gemini(prompt_text):
     """
-    Chama o modelo usando a API disponível:
-     - Se 'use_old_api' for True, tenta genai.Model.get(...).generate_text(...) (compatibilidade).
-     - Senão, tenta genai_client.generate_text(...)
-    Retorna string bruta da resposta (texto).
+    Consulta o Gemini pela camada de provedores: cache, agrupamento de pedidos
+    idênticos e, se houver outro provedor configurado, hedge/failover para ele.
+    Retorna o texto da primeira resposta com JSON válido.
     """
-    if use_old_api:
-        try:
-            model = genai.Model.get("models/text-bison-001") if hasattr(genai.Model, "get") else genai.Model("models/text-bison-001")
-            if hasattr(model, "generate_text"):
-                resp = model.generate_text(prompt_text, temperature=0.2, max_tokens=1500)
-                return _extract_response_text(resp)
-            if hasattr(model, "generate"):
-                resp = model.generate(prompt_text)
-                return _extract_response_text(resp)
-        except Exception:
-            pass
-
-    if genai_client is not None:
-        try:
-            model_names = ["models/text-bison-001", "text-bison-001", "text-bison"]
-            last_exc = None
-            for model_name in model_names:
-                try:
-                    resp = genai_client.generate_text(model=model_name, input=prompt_text,
-                                                      temperature=0.2, max_output_tokens=1500)
-                    return _extract_response_text(resp)
-                except Exception as e:
-                    last_exc = e
-                    continue
-            raise last_exc
-        except Exception as e_new:
-            raise RuntimeError(f"Erro ao chamar GenAI (nova API): {e_new}")
-
-    raise RuntimeError("Nenhuma API GenAI compatível encontrada (nenhum client inicializado). Verifique a biblioteca 'google-genai' ou 'google.generativeai'.")
+    nome, resposta = provedores.chamar(prompt_text, ordem=ORDEM_PROVEDORES)
+    if resposta is None:
+        raise RuntimeError("Nenhum provedor de IA devolveu JSON válido.")
+    print(f"[INFO] Resposta da IA via {nome}.")
+    return resposta
 
 # ---------------- Resto do código ----------------
 
 app = Flask(__name__)
 
-UPLOAD_FOLDER = "uploads"
+UPLOAD_FOLDER = recebimento.UPLOAD_DIR  # a mesma do app.py (wsgi.py monta os dois)
 REPORT_FOLDER = "relatorios"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(REPORT_FOLDER, exist_ok=True)
@@ -151,6 +71,7 @@ def normalize_text(t: str) -> str:
 
 def extract_text_pdf(path):
     try:
+        import pdfplumber
         with pdfplumber.open(path) as pdf:
             return "\n".join(page.extract_text() or "" for page in pdf.pages)
     except Exception:
@@ -159,33 +80,22 @@ def extract_text_pdf(path):
 def ocr_pdf(path, dpi=300):
     if not OCR_AVAILABLE:
         return ""
-    pages = convert_from_path(path, dpi=dpi)
-    text = ""
-    for img in pages:
-        text += pytesseract.image_to_string(img, lang="por") + "\n"
-    return text
-
-def extract_relevant_text(text, max_chars=70000, context_lines=3):
-    if not text:
-        return ""
-    text = normalize_text(text)
-    if len(text) <= max_chars:
-        return text
-    lines = text.splitlines()
-    keywords = ['matrícula','matricula','propriet','ônus','onus','cartório','cartorio','data','endereço','endereco','fração','fracao','cpf','proprietário','proprietario']
-    indices = set()
-    for i, ln in enumerate(lines):
-        low = ln.lower()
-        if any(k in low for k in keywords):
-            for j in range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)):
-                indices.add(j)
-    top_chunk = "\n".join(lines[:120])
-    bottom_chunk = "\n".join(lines[-80:])
-    selected_lines = [lines[i] for i in sorted(indices)]
-    reduced = "\n".join([top_chunk, "\n".join(selected_lines), bottom_chunk])
-    if len(reduced) > max_chars:
-        return reduced[:max_chars]
-    return reduced
+    return "".join(t + "\n" for _, t in ocr_paginas_pdf(path, dpi=dpi, lang="por"))
+
+def extract_pages(path, sha256=None):
+    """
+    Extração por página: camada de texto onde houver e OCR só nas páginas de
+    imagem. Retorna lista de {"pagina", "metodo", "texto"}.
+    """
+    if OCR_AVAILABLE:
+        return extrair_paginas(path, lang="por", sha256=sha256)
+    try:
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return [{"pagina": n, "metodo": "texto", "texto": page.extract_text() or ""}
+                    for n, page in enumerate(pdf.pages, start=1)]
+    except Exception:
+        return []
 
 def build_prompt(text):
     return f"""
@@ -202,10 +112,10 @@ TEXTO:
 """
 
 def parse_json_response(text):
-    try:
-        return json.loads(text)
-    except Exception as e:
-        raise ValueError(f"Erro ao parsear JSON da resposta: {e}\nResposta bruta: {text}")
+    data = extrair_json(text)
+    if data is None:
+        raise ValueError(f"Erro ao parsear JSON da resposta.\nResposta bruta: {text}")
+    return data
 
 def format_report(data):
     props = ", ".join([f"{p.get('nome','N/A')} ({p.get('porcentagem','N/A')})" for p in data.get('proprietarios', [])]) or "Não encontrado"
@@ -240,54 +150,135 @@ Gerado automaticamente pelo Analisador Inteligente com GenAI.
 """
 
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = recebimento.UPLOAD_MAX_BYTES
+
+@app.errorhandler(413)
+def too_large(e):
+    return jsonify({"error": f"Arquivo grande demais (máximo {recebimento.UPLOAD_MAX_BYTES // (1024 * 1024)} MB)"}), 413
 
 @app.route("/", methods=["GET"])
 def home():
     return "API: POST /analyze (form-data field 'file')"
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({
+        "extracao": cache_extracao.stats(),
+        "ia": dict(cache_ia.stats(), **voos_ia.stats())
+    })
+
+@app.route("/ia/status", methods=["GET"])
+def ia_status():
+    return jsonify(provedores.stats())
+
+@app.route("/busca", methods=["GET"])
+def busca():
+    """Busca textual nos textos extraídos (?q=, ?limite=); mesmo índice do app.py."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Informe a busca em ?q="}), 400
+    try:
+        return jsonify({"consulta": query, "resultados": acervo.buscar(query, request.args.get("limite", 20, type=int))})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
+    """Analisa o PDF enviado. Com ?async=1 enfileira um job e responde 202 com o id."""
     if "file" not in request.files:
         return jsonify({"error": "Campo 'file' ausente"}), 400
     f = request.files["file"]
     filename = secure_filename(f.filename)
     if not filename:
         return jsonify({"error": "Nome de arquivo inválido"}), 400
-    path = os.path.join(UPLOAD_FOLDER, filename)
-    f.save(path)
-
-    text = extract_text_pdf(path)
-    if len(text.strip()) < 200 and OCR_AVAILABLE:
-        try:
-            text = ocr_pdf(path)
-        except Exception as e:
-            return jsonify({"error": f"OCR falhou: {e}"}), 500
+    # Gravado como uploads/<sha256>.pdf (sem colisão entre nomes iguais)
+    with medir("upload"):
+        path, sha256, _ = recebimento.salvar_upload(f, UPLOAD_FOLDER)
+
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        job_id = jobs.enfileirar("analyze", {"path": path, "filename": filename, "sha256": sha256},
+                                 evento=("arquivo_salvo", {"mensagem": "Arquivo recebido"}))
+        return jsonify({"job_id": job_id, "status_url": url_for("job_status", job_id=job_id)}), 202
+
+    body, status = analyze_file(path, filename, sha256)
+    return jsonify(body), status
+
+def analyze_file(path, filename, sha256=None):
+    """Pipeline de um PDF já salvo. Retorna (corpo da resposta, status HTTP)."""
+    with metricas.rastrear(arquivo=filename):
+        return _analyze_file(path, filename, sha256 or hash_arquivo(path))
+
+def _analyze_file(path, filename, sha256):
+    # Mesmo limite de extração e de IA do app.py quando os dois estão no processo (wsgi.py)
+    with admissao.cpu:
+        pages = extract_pages(path, sha256)
+    text = "\n".join(p["texto"] for p in pages)
+    if text.strip():
+        acervo.indexar_texto(text.strip(), arquivo=filename, sha256=sha256)
+    if len(text.strip()) < 200 and any(p["metodo"] == "falha_ocr" for p in pages):
+        metricas.contar("certidao_resultado_total", caminho="vazio")
+        return {"error": "OCR falhou"}, 500
 
     text = normalize_text(text)
-    text = extract_relevant_text(text)
+    text = selecionar_texto(text, GEMINI_ORCAMENTO_TOKENS)
 
     prompt = build_prompt(text)
+    emitir("ia_enviada", "Texto enviado para análise da IA (Gemini)")
     try:
-        raw_response = call_gemini(prompt)
-        data = parse_json_response(raw_response)
+        with admissao.ia, medir("ia"):
+            raw_response = call_gemini(prompt)
+        with medir("json"):
+            data = parse_json_response(raw_response)
     except Exception as e:
-        return jsonify({"error": str(e), "raw_response": raw_response if 'raw_response' in locals() else None}), 500
+        metricas.contar("certidao_resultado_total", caminho="erro")
+        return {"error": str(e), "raw_response": raw_response if 'raw_response' in locals() else None}, 500
 
+    metricas.contar("certidao_resultado_total", caminho="ia")
     report = format_report(data)
 
     out_name = f"relatorio_{os.path.splitext(filename)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     out_path = os.path.join(REPORT_FOLDER, out_name)
-    with open(out_path, "w", encoding="utf-8") as f_out:
+    with medir("relatorio"), open(out_path, "w", encoding="utf-8") as f_out:
         f_out.write(report)
+    emitir("relatorio", "Relatório gravado", arquivo=out_name)
 
-    return jsonify({
+    return {
         "relatorio_texto": report,
         "arquivo_relatorio": out_name,
-        "dados_estruturados": data
-    })
+        "dados_estruturados": data,
+        "extracao": [{"pagina": p["pagina"], "metodo": p["metodo"], "confianca": p.get("confianca")}
+                     for p in pages]
+    }, 200
+
+def _job_analyze(payload):
+    body, status = analyze_file(payload["path"], payload["filename"], payload.get("sha256"))
+    if status != 200:
+        raise jobs.FalhaJob(body)
+    return body
+
+jobs.registrar("analyze", _job_analyze)
+partida.no_processo(jobs.iniciar_workers)
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.obter(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/eventos", methods=["GET"])
+def job_events(job_id):
+    """Progresso do job em Server-Sent Events."""
+    last_id = request.headers.get("Last-Event-ID", request.args.get("desde", "0"))
+    return Response(jobs.stream_eventos(job_id, int(last_id or 0)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__ == "__main__":
-    UPLOAD_FOLDER = "uploads"
+    UPLOAD_FOLDER = recebimento.UPLOAD_DIR
     REPORT_FOLDER = "relatorios"
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     os.makedirs(REPORT_FOLDER, exist_ok=True)
@@ -0,0 +1,244 @@
+"""
+Modo assíncrono da API de certidões (o mesmo pipeline de app.py), para
+muitos uploads esperando a IA ao mesmo tempo.
+
+Em app.py cada upload ocupa uma thread do gunicorn do começo ao fim, e quase
+todo esse tempo é espera pela rede (a Groq leva segundos por certidão). Aqui
+a requisição e as chamadas à IA rodam num event loop (ASGI): a espera pela
+IA é uma corrotina parada no httpx.AsyncClient (cliente_ia.py), então
+centenas de certidões podem aguardar a resposta num processo só. O que é
+CPU (pdfplumber, rasterização e Tesseract) vai para um pool de processos de
+tamanho fixo, o executor de documentos de ocr.py, uma certidão por processo,
+com o mesmo cache de extração em disco dos outros modos. Assim a CPU fica
+limitada aos núcleos e a IA, só por ASGI_IA_CONCORRENCIA.
+
+Rotas (só a API; a página, os lotes e os jobs continuam no app.py/wsgi.py):
+
+  POST /upload     mesmo contrato do /upload síncrono (campo 'file')
+  GET  /ia/status  provedores, disjuntor da Groq e ocupação deste processo
+  GET  /metrics    métricas do processo (Prometheus)
+  GET  /           verificação de saúde
+
+O leitor do multipart é o do werkzeug (em thread), sem dependência de
+framework; o servidor é qualquer um ASGI:
+
+    uvicorn asgi:app --port 10000
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+As etapas comuns com o app.py (parâmetros da extração, prompt, relatório)
+vêm de certidao.py: importar o app.py aqui subiria os workers da fila de
+jobs, que este modo não usa, antes do fork do executor de documentos.
+
+A vazão contra um LLM lento está em bench/bench_assincrono.py.
+
+Variáveis de ambiente:
+  ASGI_PROCESSOS        processos do executor de documentos (padrão: OCR_WORKERS, os núcleos)
+  ASGI_IA_CONCORRENCIA  chamadas à IA em andamento ao mesmo tempo (padrão: 64)
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+import functools
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+from werkzeug.utils import secure_filename
+
+import atos
+import certidao
+import metricas
+import ocr
+import provedores
+import recebimento
+from cliente_ia import fechar_cliente_async
+from metricas import medir
+
+ASGI_PROCESSOS = int(os.environ.get("ASGI_PROCESSOS", "0") or 0) or ocr.OCR_WORKERS
+ASGI_IA_CONCORRENCIA = int(os.environ.get("ASGI_IA_CONCORRENCIA", "64"))
+
+_executor = None
+_limite_ia = None  # asyncio.Semaphore, criado dentro do event loop
+_ocupacao = {"documentos": 0, "ia": 0, "aguardando_ia": 0}
+
+
+def executor():
+    """Executor de documentos deste processo (criado no primeiro uso ou no lifespan)."""
+    global _executor
+    if _executor is None:
+        _executor = ocr.executor_documentos(ASGI_PROCESSOS)
+    return _executor
+
+
+async def encerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    await fechar_cliente_async()
+
+
+# ---------------- PIPELINE ----------------
+async def analisar_com_ia(prompt):
+    """app.analisar_com_ia no event loop: a espera pela IA não ocupa thread."""
+    global _limite_ia
+    if _limite_ia is None:
+        _limite_ia = asyncio.Semaphore(ASGI_IA_CONCORRENCIA)
+    _ocupacao["aguardando_ia"] += 1
+    async with _limite_ia:
+        _ocupacao["aguardando_ia"] -= 1
+        _ocupacao["ia"] += 1
+        try:
+            with medir("ia"):
+                nome, resposta = await provedores.chamar_async(prompt)
+        finally:
+            _ocupacao["ia"] -= 1
+    if nome:
+        print(f"[INFO] Resposta da IA via {nome}.")
+    return resposta
+
+
+async def extrair(path, sha256):
+    """Extração da certidão inteira num processo do executor (mesmos parâmetros de app.py)."""
+    _ocupacao["documentos"] += 1
+    try:
+        with medir("extracao"):
+            return await asyncio.get_running_loop().run_in_executor(executor(), functools.partial(
+                ocr.extrair_paginas, path, poppler_path=certidao.POPPLER_PATH, sha256=sha256,
+                **certidao.PARAMETROS_EXTRACAO))
+    finally:
+        _ocupacao["documentos"] -= 1
+
+
+async def processar_certidao(path, arquivo, sha256):
+    """app.processar_certidao: extração no executor, IA no event loop, o resto em thread."""
+    with metricas.rastrear(arquivo=arquivo):
+        paginas = await extrair(path, sha256)
+        texto, ilegiveis = certidao.texto_legivel(paginas)
+        dados = resumo_atos = resposta_ia = None
+        if len(texto) >= certidao.TEXTO_MINIMO and provedores.disponiveis():
+            incremental = await atos.analisar_async(texto, analisar_com_ia, certidao.GROQ_ORCAMENTO_TOKENS)
+            if incremental is not None:
+                dados, resumo_atos = incremental
+            refazer = incremental is None or (dados is None and resumo_atos.get("falha") in ("formato", "truncado"))
+            if refazer:
+                resposta_ia = await analisar_com_ia(certidao.montar_prompt(texto))
+        return await asyncio.to_thread(certidao.concluir_certidao, paginas, ilegiveis, texto, dados,
+                                       resumo_atos, resposta_ia, None, arquivo, sha256)
+
+
+# ---------------- HTTP ----------------
+async def _responder(send, status, corpo, tipo="application/json"):
+    if not isinstance(corpo, (bytes, str)):
+        corpo = json.dumps(corpo, ensure_ascii=False)
+    if isinstance(corpo, str):
+        corpo = corpo.encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", tipo.encode()), (b"content-length", str(len(corpo)).encode())]})
+    await send({"type": "http.response.body", "body": corpo})
+
+
+async def _ler_corpo(receive, limite):
+    """Corpo num SpooledTemporaryFile (memória até 500 KB, disco depois); None se passar de `limite`."""
+    corpo = tempfile.SpooledTemporaryFile(max_size=500 * 1024)
+    tamanho = 0
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "http.disconnect":
+            corpo.close()
+            raise ConnectionResetError("cliente desconectou")
+        parte = mensagem.get("body", b"")
+        tamanho += len(parte)
+        if tamanho > limite:
+            corpo.close()
+            return None, tamanho
+        corpo.write(parte)
+        if not mensagem.get("more_body"):
+            corpo.seek(0)
+            return corpo, tamanho
+
+
+async def upload(scope, receive, send):
+    cabecalhos = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+    limite = recebimento.UPLOAD_MAX_BYTES
+    muito_grande = {"error": f"Erro: envio grande demais (máximo {limite // (1024 * 1024)} MB)"}
+    if int(cabecalhos.get("content-length") or 0) > limite:
+        return await _responder(send, 413, muito_grande)
+    corpo, tamanho = await _ler_corpo(receive, limite)
+    if corpo is None:
+        return await _responder(send, 413, muito_grande)
+
+    with corpo:
+        environ = {"REQUEST_METHOD": "POST", "CONTENT_TYPE": cabecalhos.get("content-type", ""),
+                   "CONTENT_LENGTH": str(tamanho), "wsgi.input": corpo}
+        _, _, arquivos = await asyncio.to_thread(parse_form_data, environ)
+        file = arquivos.get("file")
+        if file is None:
+            return await _responder(send, 400, {"error": "Erro: arquivo não enviado"})
+        if file.filename == "":
+            return await _responder(send, 400, {"error": "Erro: nome do arquivo inválido"})
+
+        filename = secure_filename(file.filename) or "certidao.pdf"
+        try:
+            with medir("upload"):
+                path, sha256, tamanho = await asyncio.to_thread(recebimento.salvar_upload, file,
+                                                                recebimento.UPLOAD_DIR)
+        except RequestEntityTooLarge:
+            return await _responder(send, 413, muito_grande)
+    print(f"[INFO] Arquivo {filename} ({tamanho} bytes) salvo em: {path}")
+    await _responder(send, 200, await processar_certidao(path, filename, sha256))
+
+
+async def ia_status(scope, receive, send):
+    await _responder(send, 200, {
+        "groq": provedores.disjuntor_groq.stats(),
+        "provedores": provedores.stats(),
+        "asgi": dict(_ocupacao, processos=ASGI_PROCESSOS, ia_concorrencia=ASGI_IA_CONCORRENCIA),
+        "pid": os.getpid(),
+    })
+
+
+async def metrics(scope, receive, send):
+    await _responder(send, 200, metricas.exportar(), "text/plain; version=0.0.4")
+
+
+async def index(scope, receive, send):
+    await _responder(send, 200, {"status": "ok", "pid": os.getpid()})
+
+
+ROTAS = {
+    ("POST", "/upload"): upload,
+    ("GET", "/ia/status"): ia_status,
+    ("GET", "/metrics"): metrics,
+    ("GET", "/"): index,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "lifespan.startup":
+            executor()
+            await send({"type": "lifespan.startup.complete"})
+        elif mensagem["type"] == "lifespan.shutdown":
+            await encerrar()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    rota = ROTAS.get((scope["method"], scope["path"].rstrip("/") or "/"))
+    if rota is None:
+        return await _responder(send, 404, {"error": "Rota não encontrada"})
+    try:
+        await rota(scope, receive, send)
+    except ConnectionResetError:
+        print("[WARN] Cliente desconectou antes do fim do envio.")
+    except Exception as e:
+        print(f"[ERRO] {scope['method']} {scope['path']}: {e}")
+        await _responder(send, 500, {"error": f"Erro interno: {e}"})
@@ -0,0 +1,314 @@
+"""
+Análise incremental de uma matrícula, ato por ato.
+
+A mesma matrícula volta várias vezes (uma certidão nova a cada etapa do
+negócio) e, de uma certidão para a outra, só mudam os últimos R./AV. Aqui o
+texto é dividido no preâmbulo (cabeçalho e descrição do imóvel) e nos atos
+numerados (R.1/127.148, AV.2/127148...), e a IA analisa cada ato em separado:
+quem passa a ser proprietário, que ônus o ato constitui e que atos ele
+cancela. As análises ficam no acervo por cartório + matrícula, com o hash do
+texto de cada ato; numa certidão nova só os atos ainda não vistos, ou vistos
+com outro texto (OCR refeito, retificação), vão para a IA.
+
+Atos registrados não mudam depois de lançados (são corrigidos ou cancelados
+por atos posteriores), então o que já foi analisado vale para as próximas
+certidões. O relatório é montado por `consolidar`, uma dobra determinística
+sobre os atos em ordem: proprietários do último ato que transmitiu o imóvel,
+ônus de todos os atos menos os cancelados depois. Analisar a matrícula inteira
+de uma vez ou em etapas dá o mesmo relatório (bench/bench_incremental.py).
+
+Os atos novos vão em lotes que cabem no orçamento de tokens do prompt; o
+primeiro lote de uma matrícula nova leva também o preâmbulo. Os lotes vão
+para a IA todos ao mesmo tempo (threads em `analisar`, corrotinas em
+`analisar_async`), então uma matrícula nova de 10 lotes espera mais ou menos
+uma chamada, não dez; quem limita as chamadas simultâneas é quem chama
+(admissao.ia no app.py, ASGI_IA_CONCORRENCIA no asgi.py). Sem atos
+numerados ou sem cartório/matrícula identificáveis, fica a análise do
+documento inteiro de antes. Um ato que sozinho não cabe no orçamento também
+volta para a análise do documento inteiro: cortado por `selecionar_texto`, a
+análise dele poderia perder um ônus e ficaria guardada para sempre.
+
+A sequência de prompts é a mesma com a IA síncrona (`analisar`) e no event
+loop (`analisar_async`, asgi.py): as duas só levam os prompts de `_passos`
+(uma lista por vez, os lotes que podem ir juntos) para a IA e devolvem as
+respostas na mesma ordem. As leituras e escritas no acervo
+(SQLite) também saem de `_passos` como passos, funções sem argumentos que
+`analisar` executa direto e `analisar_async` numa thread, fora do event loop.
+
+Variáveis de ambiente:
+  ATOS_INCREMENTAL  1 liga (padrão), 0 volta a mandar a certidão inteira para a IA
+"""
+
+import os
+import re
+import asyncio
+import hashlib
+import functools
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import acervo
+from metricas import contar
+from provedores import extrair_json
+from registral import data_certidao
+from selecao import cabe, estimar_tokens, selecionar_texto
+
+ATOS_INCREMENTAL = os.environ.get("ATOS_INCREMENTAL", "1").lower() in ("1", "true", "yes")
+
+# Cabeçalho de ato no começo da linha: "R.1/127.148 -", "AV-12/127148", "R 3 / 127148"
+_CABECALHO = re.compile(r'^[ \t]*(R|AV)[\.\-]?\s?(\d{1,4})\s?/\s?(\d[\d\.]{3,8})', re.IGNORECASE | re.MULTILINE)
+_ROTULO = re.compile(r'(R|AV)?[\.\-\s]*(\d{1,4})', re.IGNORECASE)
+_CARTORIO = re.compile(r'(\d+)\s*[º°ª]\s*(?:OF[ÍI]CIO|REGISTRO)', re.IGNORECASE)
+
+LIVRE = "Pode Vender (Livre)"
+ATENCAO = "Atenção (Possíveis Ônus)"
+NADA_CONSTA = "Nada consta (Livre de Ônus Reais)"
+
+
+# ---------------- DIVISÃO ----------------
+def dividir(texto):
+    """
+    (preâmbulo, atos): atos é a lista de {"numero", "rotulo", "texto"} em
+    ordem. Um cabeçalho só abre ato novo se o número for maior que o do ato
+    anterior; senão (citação que caiu no começo da linha, OCR) é texto do ato.
+    """
+    atos = []
+    cortes = []
+    for m in _CABECALHO.finditer(texto):
+        numero = int(m.group(2))
+        if cortes and numero <= cortes[-1][1]:
+            continue
+        cortes.append((m.start(), numero, f"{m.group(1).upper()}.{numero}"))
+    if not cortes:
+        return texto.strip(), []
+    for i, (inicio, numero, rotulo) in enumerate(cortes):
+        fim = cortes[i + 1][0] if i + 1 < len(cortes) else len(texto)
+        atos.append({"numero": numero, "rotulo": rotulo, "texto": texto[inicio:fim].strip()})
+    return texto[:cortes[0][0]].strip(), atos
+
+
+def chave_matricula(texto, atos):
+    """
+    "5:127148" (número do ofício e matrícula, como vem nos cabeçalhos dos
+    atos), ou None se algum dos dois não aparecer: matrículas são numeradas
+    por cartório, então sem o cartório não dá para reaproveitar nada.
+    """
+    cartorio = _CARTORIO.search(texto[:2000])
+    numeros = Counter(re.sub(r'\D', '', m.group(3)) for m in _CABECALHO.finditer(texto))
+    if not cartorio or not numeros:
+        return None
+    return f"{int(cartorio.group(1))}:{numeros.most_common(1)[0][0]}"
+
+
+def hash_texto(ato):
+    """Hash do texto do ato, sem diferença de espaços e quebras de linha."""
+    return hashlib.sha256(" ".join(ato["texto"].split()).encode("utf-8")).hexdigest()[:32]
+
+
+def numero_do_rotulo(rotulo):
+    m = _ROTULO.search(str(rotulo or ""))
+    return int(m.group(2)) if m else None
+
+
+# ---------------- PROMPT ----------------
+def texto_do_lote(atos, preambulo=None):
+    texto = "\n\n".join(a["texto"] for a in atos)
+    return preambulo + "\n\n" + texto if preambulo else texto
+
+
+def montar_prompt(atos, preambulo=None, orcamento_tokens=2500):
+    """Prompt de análise de um lote de atos (com o preâmbulo no primeiro lote de uma matrícula)."""
+    texto = texto_do_lote(atos, preambulo)
+    cabecalho = (
+        'Inclua também as chaves "Cartório", "Matrícula", "Endereço" e "Proprietários" (lista com nome e '
+        'CPF dos proprietários citados no cabeçalho, antes do primeiro ato). ' if preambulo else ""
+    )
+    return (
+        "Você é um assistente especializado em matrículas e certidões imobiliárias do Rio de Janeiro. "
+        "Abaixo estão atos (registros R. e averbações AV.) de uma matrícula. Para cada ato, na ordem, "
+        'devolva um objeto com: "ato" (rótulo, ex.: "R.5"), "Adquirentes" (lista com nome e CPF de quem '
+        "passa a ser proprietário do imóvel pelo ato; vazia se o ato não transmite o imóvel), "
+        '"Ônus" (lista dos ônus que o ato constitui, ex.: penhora, hipoteca, indisponibilidade; vazia se '
+        'nenhum) e "Cancela" (lista dos rótulos dos atos cujos ônus este ato cancela ou baixa). '
+        + cabecalho +
+        'Retorne apenas JSON válido no formato {"Atos": [...]}. Aqui está o texto:\n\n'
+        + selecionar_texto(texto, orcamento_tokens)
+    )
+
+
+def lotes(atos, orcamento_tokens, reserva=0):
+    """
+    Divide os atos em lotes consecutivos de até `orcamento_tokens` (um ato
+    grande vai sozinho); o primeiro lote deixa `reserva` tokens para o preâmbulo.
+    """
+    lote, usados = [], reserva
+    for ato in atos:
+        tokens = estimar_tokens(ato["texto"])
+        if lote and usados + tokens > orcamento_tokens:
+            yield lote
+            lote, usados = [], 0
+        lote.append(ato)
+        usados += tokens
+    if lote:
+        yield lote
+
+
+# ---------------- CONSOLIDAÇÃO ----------------
+def _lista(valor):
+    if not valor:
+        return []
+    return valor if isinstance(valor, list) else [valor]
+
+
+def _analise(ato, resposta):
+    """Análise normalizada de um ato (o que fica guardado e entra na dobra)."""
+    resposta = resposta or {}
+    return {
+        "ato": ato["rotulo"],
+        "Adquirentes": [p for p in _lista(resposta.get("Adquirentes")) if p],
+        "Ônus": [str(o).strip() for o in _lista(resposta.get("Ônus")) if str(o).strip()],
+        "Cancela": sorted({n for n in map(numero_do_rotulo, _lista(resposta.get("Cancela")))
+                           if n is not None and n < ato["numero"]}),
+    }
+
+
+def interpretar(dados, lote):
+    """{número: análise} dos atos do lote que vieram na resposta `dados` da IA."""
+    por_numero = {}
+    for item in _lista(dados.get("Atos") if isinstance(dados, dict) else None):
+        if isinstance(item, dict):
+            n = numero_do_rotulo(item.get("ato"))
+            if n is not None:
+                por_numero.setdefault(n, item)
+    return {a["numero"]: _analise(a, por_numero[a["numero"]]) for a in lote if a["numero"] in por_numero}
+
+
+def consolidar(cabecalho, analises, data):
+    """
+    Relatório (com "Ônus Reais" e "Diagnóstico" como os da regex,
+    registral.extrair_campos, que a interface e o acervo leem) a partir do
+    cabeçalho e das análises {número: análise}, percorridas em ordem.
+    """
+    proprietarios = _lista(cabecalho.get("Proprietários"))
+    onus = {}  # número do ato -> (rótulo, ônus que ele constituiu)
+    for numero in sorted(analises):
+        analise = analises[numero]
+        for cancelado in analise["Cancela"]:
+            onus.pop(cancelado, None)
+        if analise["Adquirentes"]:
+            proprietarios = analise["Adquirentes"]
+        if analise["Ônus"]:
+            onus[numero] = (analise["ato"], analise["Ônus"])
+    lista_onus = [f"{o} ({rotulo})" for rotulo, itens in (onus[n] for n in sorted(onus)) for o in itens]
+    return {
+        "Cartório": cabecalho.get("Cartório"),
+        "Matrícula": cabecalho.get("Matrícula"),
+        "Data da Certidão": data,
+        "Endereço": cabecalho.get("Endereço"),
+        "Proprietários": proprietarios,
+        "Ônus Reais": lista_onus or [NADA_CONSTA],
+        "Diagnóstico": ATENCAO if lista_onus else LIVRE,
+    }
+
+
+# ---------------- ANÁLISE ----------------
+def analisar(texto, chamar, orcamento_tokens=2500):
+    """
+    Análise incremental: `chamar(prompt)` é a chamada à IA (devolve o texto da
+    resposta ou None). Devolve (relatório, {"atos", "novos", "chamadas"}), com
+    relatório None se a IA falhar (resumo["falha"]: "ia" sem resposta,
+    "formato" se faltou a análise de algum ato, "truncado" se um lote não
+    coube no orçamento e iria cortado para a IA), ou None se o texto não der
+    para dividir em atos, para quem chamou seguir com a análise do documento
+    inteiro.
+    """
+    passos = _passos(texto, orcamento_tokens)
+    try:
+        passo = next(passos)
+        while True:
+            passo = passos.send(passo() if callable(passo) else _chamar_todos(chamar, passo))
+    except StopIteration as fim:
+        return fim.value
+
+
+def _chamar_todos(chamar, prompts):
+    """Respostas de `chamar` para cada prompt, em ordem, com os prompts em threads simultâneas."""
+    if len(prompts) == 1:
+        return [chamar(prompts[0])]
+    with ThreadPoolExecutor(len(prompts), thread_name_prefix="atos") as executor:
+        # Cada thread com uma cópia do contexto (métricas e progresso da certidão)
+        futuros = [executor.submit(contextvars.copy_context().run, chamar, p) for p in prompts]
+        return [f.result() for f in futuros]
+
+
+async def analisar_async(texto, chamar, orcamento_tokens=2500):
+    """`analisar` com `chamar(prompt)` corrotina; o acervo é acessado numa thread."""
+    passos = _passos(texto, orcamento_tokens)
+    try:
+        passo = next(passos)
+        while True:
+            if callable(passo):
+                passo = passos.send(await asyncio.to_thread(passo))
+            else:
+                passo = passos.send(await asyncio.gather(*[chamar(p) for p in passo]))
+    except StopIteration as fim:
+        return fim.value
+
+
+def _passos(texto, orcamento_tokens):
+    """
+    Gerador da análise: produz a lista de prompts dos lotes (ou uma operação
+    no acervo), recebe as respostas (send) e retorna o resultado de `analisar`.
+    """
+    preambulo, atos = dividir(texto)
+    chave = chave_matricula(texto, atos) if atos else None
+    if not ATOS_INCREMENTAL or chave is None:
+        return None
+
+    cabecalho, guardadas = yield functools.partial(acervo.atos_analisados, chave)
+    hashes = {ato["numero"]: hash_texto(ato) for ato in atos}
+    analises = {n: a for n, (h, a) in guardadas.items() if hashes.get(n) == h}
+    novos = [a for a in atos if a["numero"] not in analises]
+    print(f"[INFO] Matrícula {chave}: {len(atos)} ato(s), {len(novos)} novo(s) para a IA.")
+
+    resumo = {"atos": len(atos), "novos": len(novos), "chamadas": 0}
+    novas_analises = {}
+    reserva = estimar_tokens(preambulo) if cabecalho is None else 0
+    envio = []  # (lote, com preâmbulo)
+    for i, lote in enumerate(lotes(novos, orcamento_tokens, reserva)):
+        com_preambulo = cabecalho is None and i == 0
+        if not cabe(texto_do_lote(lote, preambulo if com_preambulo else None), orcamento_tokens):
+            # Ato grande demais para um prompt: a análise dele sairia do texto cortado.
+            # Os lotes antes dele ainda vão, para ficarem guardados
+            print(f"[WARN] {', '.join(a['rotulo'] for a in lote)} não cabe(m) em {orcamento_tokens} "
+                  f"tokens; análise do documento inteiro.")
+            resumo["falha"] = "truncado"
+            break
+        envio.append((lote, com_preambulo))
+
+    respostas = (yield [montar_prompt(lote, preambulo if com_preambulo else None, orcamento_tokens)
+                        for lote, com_preambulo in envio]) if envio else []
+    resumo["chamadas"] = len(envio)
+    for (lote, com_preambulo), resposta in zip(envio, respostas):
+        dados = extrair_json(resposta) if resposta else None
+        recebidas = interpretar(dados, lote) if isinstance(dados, dict) else {}
+        if com_preambulo and recebidas:
+            cabecalho = {k: dados.get(k) for k in ("Cartório", "Matrícula", "Endereço", "Proprietários")}
+        novas_analises.update(recebidas)
+        if len(recebidas) < len(lote):
+            # Ato sem análise poderia esconder um ônus: o relatório não sai por aqui
+            faltando = [a["rotulo"] for a in lote if a["numero"] not in recebidas]
+            print(f"[WARN] IA não devolveu a análise de {len(faltando)} ato(s): {', '.join(faltando[:10])}.")
+            resumo.setdefault("falha", "ia" if resposta is None else "formato")
+
+    # O que veio completo fica guardado mesmo com falha: a próxima tentativa manda menos atos
+    if novas_analises and cabecalho is not None:
+        yield functools.partial(acervo.guardar_atos, chave, cabecalho,
+                                {n: (hashes[n], a) for n, a in novas_analises.items()})
+    if "falha" in resumo or cabecalho is None:
+        return None, resumo
+    contar("atos_analisados_total", len(novas_analises), origem="ia")
+    contar("atos_analisados_total", len(analises), origem="acervo")
+    analises.update(novas_analises)
+    return consolidar(cabecalho, analises, data_certidao(texto)), resumo
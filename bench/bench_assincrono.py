@@ -0,0 +1,176 @@
+"""
+Vazão com muitos uploads simultâneos esperando um LLM lento: o app síncrono
+(gunicorn, uma thread por upload do começo ao fim) contra o modo assíncrono
+(asgi.py: IA no event loop, extração num pool de processos do tamanho dos
+núcleos).
+
+  sync     gunicorn -k sync (sem threads) com --workers processos: um upload por processo
+  gthread  gunicorn.conf.py (1 worker com threads, IA limitada por IA_CONCORRENCIA)
+  asgi     uvicorn asgi:app; sem o uvicorn instalado, o app ASGI no próprio
+           processo do bench pelo httpx.ASGITransport (sem HTTP de verdade,
+           marcado "em processo" na saída)
+
+Cada upload é um PDF de texto de 1 página de uma matrícula diferente (sem
+acerto de cache) e faz uma chamada ao LLM falso (ATOS_INCREMENTAL=0), que
+responde em --llm-latencia segundos. Todos os uploads saem juntos; mede-se o
+tempo até o último terminar, a vazão e a latência de cada upload.
+
+Uso:
+    python bench/bench_assincrono.py [--uploads 32] [--llm-latencia 2] [--workers 2]
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+import fake_llm  # noqa: E402
+from bench_partida import _enviar, _esperar_resposta, _porta_livre, resumo  # noqa: E402
+
+
+def gerar_pdfs(pasta, n):
+    """n PDFs de texto de 1 página, cada um de uma matrícula."""
+    caminhos = []
+    for i in range(n):
+        caminho = os.path.join(pasta, f"certidao_{i:03d}.pdf")
+        corpus.pdf_texto(corpus.gerar_paginas(1, semente=100 + i, matricula=str(200000 + i)), caminho)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def _ambiente(pasta, url_llm):
+    return dict(os.environ, JOBS_DB=os.path.join(pasta, "jobs.db"), CACHE_DIR=os.path.join(pasta, "cache"),
+                RELATORIOS_DB=os.path.join(pasta, "relatorios.db"), UPLOAD_DIR=os.path.join(pasta, "uploads"),
+                GROQ_URL=url_llm, GROQ_API_KEY="bench", IA_PROVEDORES="groq", IA_MODO="unico",
+                ATOS_INCREMENTAL="0", PARTIDA_AQUECER="0",
+                TESSERACT_CMD=shutil.which("tesseract") or "tesseract")
+
+
+def _disparar(url, pdfs):
+    """Todos os uploads ao mesmo tempo; (parede, [latência de cada um])."""
+    def _um(pdf):
+        envio = time.perf_counter()
+        _enviar(url, pdf)
+        return time.perf_counter() - envio
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(len(pdfs)) as clientes:
+        latencias = list(clientes.map(_um, pdfs))
+    return time.perf_counter() - inicio, latencias
+
+
+def rodar_servidor(comando, pdfs, url_llm, log, **env):
+    pasta = tempfile.mkdtemp(prefix="bench_assincrono_")
+    porta = _porta_livre()
+    comando = [c.replace("{porta}", str(porta)) for c in comando]
+    processo = subprocess.Popen(comando, cwd=pasta, env=dict(_ambiente(pasta, url_llm), PORT=str(porta), **env),
+                                stdout=log, stderr=subprocess.STDOUT)
+    try:
+        _esperar_resposta(f"http://127.0.0.1:{porta}/", processo)
+        return _disparar(f"http://127.0.0.1:{porta}/upload", pdfs)
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def rodar_em_processo(pdfs, url_llm):
+    """asgi.py sem servidor: chamado direto pelo httpx.ASGITransport, neste processo."""
+    import httpx
+
+    pasta = tempfile.mkdtemp(prefix="bench_assincrono_")
+    os.environ.update(_ambiente(pasta, url_llm))
+    atual = os.getcwd()
+    os.chdir(pasta)
+    try:
+        import asgi
+
+        async def _todos():
+            transporte = httpx.ASGITransport(app=asgi.app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=300) as cliente:
+                async def _um(pdf):
+                    envio = time.perf_counter()
+                    with open(pdf, "rb") as f:
+                        resp = await cliente.post("/upload", files={"file": (os.path.basename(pdf), f, "application/pdf")})
+                    resp.raise_for_status()
+                    return time.perf_counter() - envio
+                asgi.executor()  # como no lifespan: processos de pé antes dos uploads
+                inicio = time.perf_counter()
+                latencias = await asyncio.gather(*[_um(pdf) for pdf in pdfs])
+                parede = time.perf_counter() - inicio
+            await asgi.encerrar()
+            return parede, latencias
+
+        return asyncio.run(_todos())
+    finally:
+        os.chdir(atual)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=32, help="uploads simultâneos")
+    parser.add_argument("--llm-latencia", type=float, default=2.0, help="latência fixa do LLM falso (s)")
+    parser.add_argument("--workers", type=int, default=2, help="processos do gunicorn no modo sync")
+    parser.add_argument("--modos", default="sync,gthread,asgi")
+    parser.add_argument("--log", help="arquivo para a saída dos servidores (padrão: descartada)")
+    args = parser.parse_args()
+
+    pasta_pdfs = tempfile.mkdtemp(prefix="bench_assincrono_pdfs_")
+    pdfs = gerar_pdfs(pasta_pdfs, args.uploads)
+    servidor, url_llm = fake_llm.iniciar(atraso=args.llm_latencia)
+    log = open(args.log, "w") if args.log else subprocess.DEVNULL
+    gunicorn = [sys.executable, "-m", "gunicorn", "-c", os.path.join(RAIZ, "gunicorn.conf.py"),
+                "--pythonpath", RAIZ]
+    try:
+        import uvicorn  # noqa: F401
+        uvicorn_instalado = True
+    except ImportError:
+        uvicorn_instalado = False
+
+    resultados = {}
+    try:
+        for modo in args.modos.split(","):
+            if modo == "sync":
+                nome = f"sync ({args.workers} workers)"
+                medida = rodar_servidor(gunicorn + ["-k", "sync", "--threads", "1", "--workers", str(args.workers),
+                                                  "app:app"],
+                                        pdfs, url_llm, log)
+            elif modo == "gthread":
+                nome = "gthread (gunicorn.conf.py)"
+                medida = rodar_servidor(gunicorn + ["app:app"], pdfs, url_llm, log)
+            elif uvicorn_instalado:
+                nome = "asgi (uvicorn)"
+                medida = rodar_servidor([sys.executable, "-m", "uvicorn", "--app-dir", RAIZ, "--port", "{porta}",
+                                         "--log-level", "warning", "asgi:app"], pdfs, url_llm, log)
+            else:
+                nome = "asgi (em processo, sem uvicorn)"
+                medida = rodar_em_processo(pdfs, url_llm)
+            resultados[nome] = medida
+    finally:
+        servidor.shutdown()
+        if args.log:
+            log.close()
+        shutil.rmtree(pasta_pdfs, ignore_errors=True)
+
+    print(f"{args.uploads} uploads simultâneos, LLM falso com {args.llm_latencia:g} s, {os.cpu_count()} núcleo(s)")
+    print(f"{'modo':<34}{'parede (s)':>11}{'upl/s':>8}{'p50 (s)':>9}{'p95 (s)':>9}")
+    for nome, (parede, latencias) in resultados.items():
+        r = resumo(latencias)
+        print(f"{nome:<34}{parede:>11.2f}{len(latencias) / parede:>8.2f}{r['mediana_s']:>9.2f}{r['p95_s']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Latência de cauda da camada de provedores (provedores.chamar) com provedores
+falsos locais: compara os modos unico, failover e hedge.
+
+"lento" responde em ~0.3s mas em parte das chamadas demora 2s (cauda ruim) e
+às vezes devolve texto que não é JSON; "rapido" responde sempre em ~0.5s.
+Cada chamada usa um prompt diferente (sem acerto de cache).
+
+Uso:
+    python bench/bench_hedge.py [--chamadas 100] [--cauda 0.04]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# Cache de IA isolado e descartável: o bench não pode reaproveitar respostas
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_hedge_")
+
+import provedores  # noqa: E402
+
+RESPOSTA = json.dumps({"Matrícula": "127148", "Diagnóstico": "Pode Vender (Livre)"})
+
+
+def provedor_falso(latencia, cauda=0.0, latencia_cauda=0.0, invalida=0.0, semente=0):
+    rnd = random.Random(semente)
+
+    def chamar(prompt):
+        atraso = latencia_cauda if rnd.random() < cauda else latencia
+        time.sleep(atraso * rnd.uniform(0.9, 1.1))
+        return "desculpe, não consegui" if rnd.random() < invalida else RESPOSTA
+    return chamar
+
+
+def percentis(amostras):
+    amostras = sorted(amostras)
+    def p(q):
+        return amostras[min(len(amostras) - 1, int(q / 100 * len(amostras)))]
+    return p(50), p(95), p(99), amostras[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chamadas", type=int, default=100)
+    parser.add_argument("--cauda", type=float, default=0.04, help="fração de chamadas lentas do primário")
+    args = parser.parse_args()
+
+    print(f"{'modo':<10}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'máx (s)':>9}{'falhas':>8}  vitórias")
+    for modo in ("unico", "failover", "hedge"):
+        provedores._provedores.clear()
+        provedores.registrar_provedor(
+            "lento", provedor_falso(0.3, args.cauda, 2.0, invalida=0.02, semente=1), "lento", 0)
+        provedores.registrar_provedor("rapido", provedor_falso(0.5, semente=2), "rapido", 0)
+        # Aquecimento: o histograma precisa de amostras para o p95 valer como atraso de hedge
+        for i in range(provedores.IA_HEDGE_AMOSTRAS):
+            provedores._provedores["lento"].chamar(f"aquecimento {modo} {i}")
+
+        tempos, falhas = [], 0
+        for i in range(args.chamadas):
+            inicio = time.monotonic()
+            nome, _ = provedores.chamar(f"prompt {modo} {i}", ordem=["lento", "rapido"], modo=modo)
+            tempos.append(time.monotonic() - inicio)
+            falhas += nome is None
+        p50, p95, p99, maximo = percentis(tempos)
+        vitorias = {n: p.vitorias for n, p in provedores._provedores.items()}
+        print(f"{modo:<10}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{maximo:>9.2f}{falhas:>8}  {vitorias}")
+    print(f"atraso de hedge do primário: {provedores._provedores['lento'].atraso_hedge():.2f}s")
+
+
+if __name__ == "__main__":
+    main()
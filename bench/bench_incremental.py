@@ -0,0 +1,144 @@
+"""
+Confere e mede a análise incremental por ato (atos.py) sobre o corpus
+sintético (bench/corpus.py).
+
+A mesma matrícula é analisada de dois jeitos: de uma vez, só a certidão
+final, e em etapas, com certidões que vão ganhando atos (como nas etapas de
+um negócio). O relatório final tem de ser idêntico nos dois casos; o script
+sai com código 1 se não for. Também mostra, na última etapa, os tokens de
+prompt e as chamadas à IA contra a análise completa e contra o prompt do
+documento inteiro (certidao.montar_prompt).
+
+A "IA" aqui é determinística: lê cada ato do prompt com regras fixas e
+responde no formato pedido, com a latência simulada de --llm-latencia.
+
+Uso:
+    python bench/bench_incremental.py [--paginas 20] [--etapas 3] [--atos-por-etapa 2]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_TEMP = tempfile.mkdtemp(prefix="bench_incremental_")
+os.environ["RELATORIOS_DB"] = os.path.join(_TEMP, "relatorios.db")
+os.environ["ATOS_INCREMENTAL"] = "1"
+
+import corpus  # noqa: E402
+import atos  # noqa: E402
+from selecao import estimar_tokens, selecionar_texto  # noqa: E402
+
+ORCAMENTO = int(os.environ.get("GROQ_ORCAMENTO_TOKENS", "2500"))
+
+_PESSOA = re.compile(r'(?:\d\)|PROPRIETÁRIA: )([^,;]+), [^;]*?CPF nº([\d\.\-]+)')
+_CANCELADO = re.compile(r'objeto do (R|AV)\.(\d+)')
+
+
+# ---------------- IA DETERMINÍSTICA ----------------
+def _responder(prompt):
+    texto = prompt.split("Aqui está o texto:\n\n", 1)[1]
+    preambulo, lista = atos.dividir(texto)
+    resposta = {"Atos": []}
+    for ato in lista:
+        t = " ".join(ato["texto"].split())
+        analise = {"ato": ato["rotulo"], "Adquirentes": [], "Ônus": [], "Cancela": []}
+        if "CANCELAMENTO" in t:
+            analise["Cancela"] = [f"{tipo}.{n}" for tipo, n in _CANCELADO.findall(t)]
+        elif "PENHORA:" in t:
+            analise["Ônus"] = ["Penhora"]
+        elif "transmitido a" in t:
+            analise["Adquirentes"] = [{"nome": n.strip().title(), "cpf": c}
+                                      for n, c in _PESSOA.findall(t.split("transmitido a", 1)[1])]
+        resposta["Atos"].append(analise)
+    if "Inclua também as chaves" in prompt:
+        p = " ".join(preambulo.split())
+        resposta.update({
+            "Cartório": re.search(r'(\d+º OFÍCIO[^,]*?IMÓVEIS)', p).group(1).title(),
+            "Matrícula": re.search(r'MATRÍCULA N\.º ([\d\.]+)', p).group(1),
+            "Endereço": "Avenida Nossa Senhora de Copacabana nº360, Apartamento nº1204",
+            "Proprietários": [{"nome": n.strip().title(), "cpf": c} for n, c in _PESSOA.findall(p)],
+        })
+    return "```json\n" + json.dumps(resposta, ensure_ascii=False) + "\n```"
+
+
+class IA:
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.chamadas = 0
+        self.tokens = 0
+        self._lock = threading.Lock()  # os lotes de uma certidão chegam em threads simultâneas
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.chamadas += 1
+            self.tokens += estimar_tokens(prompt)
+        time.sleep(self.latencia)
+        return _responder(prompt)
+
+
+# ---------------- CERTIDÕES ----------------
+def certidoes(paginas, matricula, etapas, atos_por_etapa):
+    """Textos da mesma matrícula com os últimos atos cortados: a última é a certidão completa."""
+    texto = "\n".join("\n".join(p) for p in corpus.gerar_paginas(paginas, matricula=matricula))
+    corpo, rodape = texto.split("CERTIFICO", 1)
+    preambulo, lista = atos.dividir(corpo)
+    versoes = []
+    for etapa in range(etapas - 1, -1, -1):
+        incluidos = lista[:len(lista) - etapa * atos_por_etapa]
+        versoes.append("\n\n".join([preambulo] + [a["texto"] for a in incluidos] + ["CERTIFICO" + rodape]))
+    return versoes
+
+
+def analisar(texto, latencia):
+    ia = IA(latencia)
+    inicio = time.perf_counter()
+    dados, resumo = atos.analisar(texto, ia, ORCAMENTO)
+    return dados, resumo, ia, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--etapas", type=int, default=3)
+    parser.add_argument("--atos-por-etapa", type=int, default=2)
+    parser.add_argument("--llm-latencia", type=float, default=0.5, help="segundos por chamada à IA")
+    args = parser.parse_args()
+
+    # Matrículas diferentes para as duas análises não dividirem o que fica guardado
+    completa = certidoes(args.paginas, "127.148", args.etapas, args.atos_por_etapa)[-1]
+    dados_completa, resumo_completa, ia_completa, s_completa = analisar(completa, args.llm_latencia)
+
+    print(f"{'etapa':<8}{'atos':>6}{'novos':>7}{'chamadas':>10}{'tokens':>9}{'s':>8}")
+    for i, texto in enumerate(certidoes(args.paginas, "127.149", args.etapas, args.atos_por_etapa), start=1):
+        dados, resumo, ia, segundos = analisar(texto, args.llm_latencia)
+        print(f"{i:<8}{resumo['atos']:>6}{resumo['novos']:>7}{ia.chamadas:>10}{ia.tokens:>9}{segundos:>8.2f}")
+
+    print()
+    documento = estimar_tokens(selecionar_texto(completa, ORCAMENTO))
+    print(f"certidão completa de uma vez: {ia_completa.chamadas} chamada(s), {ia_completa.tokens} tokens, "
+          f"{s_completa:.2f} s")
+    print(f"última etapa, incremental:    {ia.chamadas} chamada(s), {ia.tokens} tokens, {segundos:.2f} s")
+    print(f"prompt do documento inteiro:  1 chamada, ~{documento} tokens de texto (cortado no orçamento)")
+
+    dados["Matrícula"] = dados_completa["Matrícula"]
+    if dados != dados_completa:
+        print("\nDIFERENÇA entre a análise completa e a incremental:")
+        for chave in dados_completa:
+            if dados.get(chave) != dados_completa[chave]:
+                print(f"  {chave}: {dados_completa[chave]!r} != {dados.get(chave)!r}")
+        sys.exit(1)
+    print(f"\nRelatório idêntico ao da análise completa ({len(set(dados['Ônus Reais']) - {atos.NADA_CONSTA})} ônus ativo(s), "
+          f"{len(dados['Proprietários'])} proprietário(s)).")
+
+
+if __name__ == "__main__":
+    main()
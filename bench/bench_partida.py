@@ -0,0 +1,174 @@
+"""
+Tempo de partida do app: o `import app` (com os módulos mais caros pelo
+-X importtime, partida.perfil) e o tempo até a primeira resposta de um
+gunicorn recém-iniciado, nos dois modos de partida:
+
+  frio      sem preload e sem aquecimento: o worker importa o app e o primeiro
+            upload paga pdfplumber/pdf2image, pool de OCR, modelo e conexão com a IA
+  aquecido  gunicorn.conf.py como no Dockerfile: preload no mestre e
+            aquecimento de cada worker antes do tráfego (partida.py)
+
+Em cada repetição o gunicorn sobe do zero (cache, acervo e uploads novos):
+
+  pronto           do início do processo até a primeira resposta (GET /, como o
+                   health check da plataforma antes de mandar tráfego)
+  primeiro_upload  latência do primeiro upload depois disso (PDF de imagem de
+                   1 página do corpus: OCR + IA falsa)
+  segundo_upload   latência de um segundo upload (outro PDF), com tudo quente
+
+Precisa do gunicorn; os números de OCR só têm sentido com tesseract e
+poppler reais. bench_pipeline.py inclui estes resultados (partida/...) no
+JSON que compara execuções.
+
+Uso:
+    python bench/bench_partida.py [--repeticoes 3] [--workers 1] [--llm-latencia 0.2]
+"""
+
+import os
+import sys
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+
+import requests
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+import fake_llm  # noqa: E402
+import partida  # noqa: E402
+
+MODOS = {
+    "frio": {"PARTIDA_PRELOAD": "0", "PARTIDA_AQUECER": "0"},
+    "aquecido": {"PARTIDA_PRELOAD": "1", "PARTIDA_AQUECER": "1"},
+}
+
+
+def resumo(tempos):
+    tempos = sorted(tempos)
+    p95 = tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))]
+    return {"mediana_s": round(median(tempos), 6), "p95_s": round(p95, 6), "n": len(tempos)}
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar_resposta(url, processo, limite_s=120):
+    fim = time.monotonic() + limite_s
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError(f"gunicorn saiu com código {processo.returncode}")
+        try:
+            # Conexão aceita fica na fila do socket até o worker estar pronto
+            if requests.get(url, timeout=limite_s).status_code == 200:
+                return
+        except requests.ConnectionError:
+            time.sleep(0.005)
+    raise RuntimeError("gunicorn não respondeu a tempo")
+
+
+def _enviar(url, caminho):
+    with open(caminho, "rb") as f:
+        resp = requests.post(url, files={"file": (os.path.basename(caminho), f, "application/pdf")},
+                             timeout=300)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def uma_partida(modo, pdfs, url_llm, workers, log):
+    """Sobe o gunicorn no `modo`, espera a primeira resposta e mede dois uploads; {medida: segundos}."""
+    pasta = tempfile.mkdtemp(prefix="bench_partida_")
+    porta = _porta_livre()
+    env = dict(os.environ, **MODOS[modo],
+               PORT=str(porta), WEB_CONCURRENCY=str(workers),
+               JOBS_DB=os.path.join(pasta, "jobs.db"), CACHE_DIR=os.path.join(pasta, "cache"),
+               RELATORIOS_DB=os.path.join(pasta, "relatorios.db"),
+               GROQ_URL=url_llm, GROQ_API_KEY="bench", IA_PROVEDORES="groq",
+               TESSERACT_CMD=shutil.which("tesseract") or "tesseract")
+    comando = [sys.executable, "-m", "gunicorn", "-c", os.path.join(RAIZ, "gunicorn.conf.py"),
+               "--pythonpath", RAIZ, "app:app"]
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, cwd=pasta, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        _esperar_resposta(f"http://127.0.0.1:{porta}/", processo)
+        medidas = {"pronto": time.perf_counter() - inicio}
+        for medida, pdf in zip(("primeiro_upload", "segundo_upload"), pdfs):
+            envio = time.perf_counter()
+            _enviar(f"http://127.0.0.1:{porta}/upload", pdf)
+            medidas[medida] = time.perf_counter() - envio
+        return medidas
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def medir(repeticoes=3, workers=1, llm_latencia=0.2, pasta_corpus=None, log=None):
+    """{"partida/<medida>": resumo}: import do app e, com o gunicorn instalado, os dois modos."""
+    resultados = {}
+    imports = [partida.perfil()[0] for _ in range(repeticoes)]
+    resultados["partida/import_app"] = resumo(imports)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        for modo in MODOS:
+            resultados[f"partida/{modo}/pronto"] = {"pulada": "gunicorn ausente"}
+        return resultados
+
+    pasta_corpus = pasta_corpus or os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+    pdfs = [corpus.garantir_corpus(pasta_corpus, [1], semente)[("imagem", 1)] for semente in (7, 8)]
+    servidor, url_llm = fake_llm.iniciar(atraso=llm_latencia)
+    try:
+        for modo in MODOS:
+            medidas = [uma_partida(modo, pdfs, url_llm, workers, log or subprocess.DEVNULL)
+                       for _ in range(repeticoes)]
+            for medida in medidas[0]:
+                resultados[f"partida/{modo}/{medida}"] = resumo([m[medida] for m in medidas])
+    finally:
+        servidor.shutdown()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="workers do gunicorn")
+    parser.add_argument("--llm-latencia", type=float, default=0.2, help="latência fixa do LLM falso (s)")
+    parser.add_argument("--log", help="arquivo para a saída dos gunicorns (padrão: descartada)")
+    args = parser.parse_args()
+
+    total, linhas = partida.perfil(limite=8)
+    print(f"import app: {total * 1000:.0f} ms; módulos mais caros (cumulativo):")
+    for cumulativo, _, nome in linhas:
+        print(f"  {cumulativo * 1000:>8.1f} ms  {nome.strip()}")
+    print()
+
+    log = open(args.log, "w") if args.log else None
+    try:
+        resultados = medir(args.repeticoes, args.workers, args.llm_latencia, log=log)
+    finally:
+        if log:
+            log.close()
+    print(f"{'medida':<36}{'mediana (ms)':>14}{'p95 (ms)':>12}{'n':>4}")
+    for chave, r in resultados.items():
+        if "pulada" in r:
+            print(f"{chave:<36}{'pulada: ' + r['pulada']:>30}")
+        else:
+            print(f"{chave:<36}{r['mediana_s'] * 1000:>14.1f}{r['p95_s'] * 1000:>12.1f}{r['n']:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Benchmark reprodutível do pipeline ponta a ponta, etapa por etapa, sobre o
+corpus sintético (bench/corpus.py) nas formas "texto" e "imagem".
+
+Etapas medidas separadamente:
+
+  salvar       gravação do upload com hash (recebimento.salvar_upload, como em /upload)
+  pdfplumber   extração da camada de texto de todas as páginas
+  rasterizar   PDF -> imagens (pdf2image/poppler), só na forma "imagem"
+  ocr          OCR das imagens já rasterizadas pelo pool de ocr.py
+  prompt       montagem do prompt (seleção por orçamento de tokens)
+  llm          chamada à Groq contra o servidor falso local, latência fixa
+  regex        análise registral por regras (registral.extrair_campos)
+  relatorio    gravação do relatório no acervo SQLite (acervo.salvar)
+  partida/...  import do app e tempo até a primeira resposta do gunicorn, frio e
+               aquecido (bench/bench_partida.py; --sem-partida pula)
+
+As etapas de texto (prompt, llm, regex, relatorio) usam o texto extraído da
+forma "texto". Etapas sem a ferramenta disponível (poppler, tesseract) são
+marcadas como puladas. Com rasterização e OCR, os números só têm sentido com o
+tesseract e o poppler reais instalados.
+
+O resultado vai para um JSON (--saida) com commit, versão do Python e
+máquina. Com --base, compara com um resultado anterior usando as tolerâncias
+de bench/limites.json e sai com código 1 se alguma etapa regrediu.
+
+Uso:
+    python bench/bench_pipeline.py --paginas 1,10,100 --saida bench_atual.json
+    python bench/bench_pipeline.py --saida novo.json --base bench_atual.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from statistics import median
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Tudo que o app grava (uploads, relatórios, jobs, cache) fica numa pasta
+# descartável; sem workers de jobs e sem cache de IA entre execuções.
+_TEMP = tempfile.mkdtemp(prefix="bench_pipeline_")
+os.environ["JOBS_WORKERS"] = "0"
+os.environ["JOBS_DB"] = os.path.join(_TEMP, "jobs.db")
+os.environ["CACHE_DIR"] = os.path.join(_TEMP, "cache")
+os.environ["RELATORIOS_DB"] = os.path.join(_TEMP, "relatorios.db")
+os.environ.setdefault("IA_PROVEDORES", "groq")
+
+import bench_partida  # noqa: E402
+import corpus  # noqa: E402
+import fake_llm  # noqa: E402
+
+LIMITES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "limites.json")
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def resumo(tempos):
+    tempos = sorted(tempos)
+    p95 = tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))]
+    return {"mediana_s": round(median(tempos), 6), "p95_s": round(p95, 6), "n": len(tempos)}
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    """Executa `funcao` `repeticoes` vezes; `preparar` roda antes de cada uma, fora do tempo."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resumo(tempos)
+
+
+def medir_extracao(ocr, caminho, forma, repeticoes, ferramentas):
+    """Etapas que dependem do PDF; devolve ({etapa: resumo}, texto extraído)."""
+    import pdfplumber
+    import recebimento
+    from werkzeug.datastructures import FileStorage
+
+    resultados = {}
+    dados = open(caminho, "rb").read()
+    pasta = os.path.join(_TEMP, "uploads")
+
+    def salvar():
+        recebimento.salvar_upload(FileStorage(io.BytesIO(dados), filename=os.path.basename(caminho)), pasta)
+    # Sem reaproveitar o arquivo da repetição anterior: cada uma grava de novo
+    resultados["salvar"] = cronometrar(salvar, repeticoes,
+                                       preparar=lambda: shutil.rmtree(pasta, ignore_errors=True))
+
+    texto = []
+
+    def ler():
+        with pdfplumber.open(caminho) as pdf:
+            texto[:] = [p.extract_text() or "" for p in pdf.pages]
+    resultados["pdfplumber"] = cronometrar(ler, repeticoes)
+
+    if forma != "imagem":
+        return resultados, "\n".join(texto)
+
+    if not ferramentas["poppler"]:
+        resultados["rasterizar"] = resultados["ocr"] = {"pulada": "poppler ausente"}
+        return resultados, "\n".join(texto)
+
+    pasta = os.path.join(_TEMP, "raster")
+    imagens = []
+
+    def limpar():
+        shutil.rmtree(pasta, ignore_errors=True)
+        os.makedirs(pasta)
+
+    def rasterizar():
+        imagens[:] = [c for _, c in ocr.rasterizar_paginas(caminho, pasta, dpi=300)]
+    resultados["rasterizar"] = cronometrar(rasterizar, repeticoes, preparar=limpar)
+
+    if not ferramentas["tesseract"]:
+        resultados["ocr"] = {"pulada": "tesseract ausente"}
+        return resultados, "\n".join(texto)
+
+    def reconhecer():
+        # Mesmo padrão de ocr_paginas_pdf, mas com as imagens já prontas
+        pendentes = [(c, ocr._submeter(c, "por", "--psm 4", True)) for c in imagens]
+        texto[:] = [ocr._coletar(c, f, "por", "--psm 4", True)[0] for c, f in pendentes]
+    # _coletar apaga as imagens: cada repetição rasteriza de novo, fora do tempo
+    resultados["ocr"] = cronometrar(reconhecer, repeticoes, preparar=lambda: (limpar(), rasterizar()))
+    return resultados, "\n".join(texto)
+
+
+def medir_texto(app, provedores, registral, acervo, texto, repeticoes):
+    """Etapas que só dependem do texto extraído."""
+    resultados = {}
+    prompt = [""]
+
+    def montar():
+        prompt[0] = app.montar_prompt(texto)
+    resultados["prompt"] = cronometrar(montar, repeticoes)
+
+    # Direto em chamar_groq: sem cache nem single-flight, toda repetição vai ao servidor
+    contador = iter(range(10 ** 9))
+
+    def chamar():
+        if provedores.chamar_groq(f"{prompt[0]}\n#{next(contador)}") is None:
+            raise RuntimeError("servidor falso de LLM não respondeu")
+    resultados["llm"] = cronometrar(chamar, repeticoes)
+
+    dados = {}
+
+    def analisar():
+        dados.update(registral.extrair_campos(texto))
+    resultados["regex"] = cronometrar(analisar, repeticoes)
+
+    def gravar():
+        acervo.salvar(dados, arquivo="bench.pdf", origem="regex")
+    resultados["relatorio"] = cronometrar(gravar, repeticoes)
+    return resultados
+
+
+def executar(args):
+    servidor, url = fake_llm.iniciar(atraso=args.llm_latencia)
+    os.environ["GROQ_URL"] = url
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+
+    # app.py cria uploads/ e relatorios/ na pasta atual
+    os.chdir(_TEMP)
+    import app
+    import acervo
+    import ocr
+    import provedores
+    import registral
+    # app.py fixa /usr/bin/tesseract no Linux; o bench usa o que estiver no PATH
+    tesseract = shutil.which("tesseract")
+    if tesseract:
+        ocr.motor_ocr.configurar(tesseract)
+    ferramentas = {"tesseract": bool(tesseract), "poppler": bool(shutil.which("pdftoppm"))}
+
+    tamanhos = [int(n) for n in args.paginas.split(",") if n.strip()]
+    pdfs = corpus.garantir_corpus(args.corpus, tamanhos, semente=args.semente)
+
+    resultados = {}
+    for n in tamanhos:
+        for forma in ("texto", "imagem"):
+            print(f"[INFO] {forma} {n}p...")
+            etapas, texto = medir_extracao(ocr, pdfs[(forma, n)], forma, args.repeticoes, ferramentas)
+            if forma == "texto":
+                etapas.update(medir_texto(app, provedores, registral, acervo, texto, args.repeticoes))
+            for etapa, r in etapas.items():
+                resultados[f"{forma}/{n}p/{etapa}"] = r
+    servidor.shutdown()
+    ocr.encerrar_pool()
+
+    if not args.sem_partida:
+        print("[INFO] partida...")
+        resultados.update(bench_partida.medir(args.repeticoes, llm_latencia=args.llm_latencia,
+                                              pasta_corpus=args.corpus))
+
+    return {
+        "meta": {
+            "commit": commit_atual(),
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "maquina": platform.machine(),
+            "sistema": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ocr_workers": ocr.OCR_WORKERS,
+            "ocr_motor": ocr.motor_ocr.nome(),
+            "llm_latencia_s": args.llm_latencia,
+            "repeticoes": args.repeticoes,
+            "semente": args.semente,
+            "ferramentas": ferramentas,
+        },
+        "resultados": resultados,
+    }
+
+
+def _limite_da_etapa(limites, chave):
+    etapa = chave.rsplit("/", 1)[-1]
+    limite = dict(limites.get("padrao", {}))
+    limite.update(limites.get("etapas", {}).get(etapa, {}))
+    return limite.get("tolerancia", 0.2), limite.get("folga_s", 0.0)
+
+
+def comparar(atual, base, limites):
+    """Lista de (chave, base, atual, limite, regrediu) para as etapas medidas nos dois."""
+    linhas = []
+    for chave, r in atual["resultados"].items():
+        b = base["resultados"].get(chave)
+        if not b or "mediana_s" not in r or "mediana_s" not in b:
+            continue
+        tolerancia, folga = _limite_da_etapa(limites, chave)
+        limite = b["mediana_s"] * (1 + tolerancia) + folga
+        linhas.append((chave, b["mediana_s"], r["mediana_s"], limite, r["mediana_s"] > limite))
+    return linhas
+
+
+def imprimir(resultado):
+    print(f"{'etapa':<36}{'mediana (ms)':>14}{'p95 (ms)':>12}{'n':>4}")
+    for chave, r in resultado["resultados"].items():
+        if "pulada" in r:
+            print(f"{chave:<36}{'pulada: ' + r['pulada']:>30}")
+        else:
+            print(f"{chave:<36}{r['mediana_s'] * 1000:>14.2f}{r['p95_s'] * 1000:>12.2f}{r['n']:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", default="1,10,100", help="tamanhos do corpus, em páginas")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=7)
+    parser.add_argument("--llm-latencia", type=float, default=0.2, help="latência fixa do LLM falso (s)")
+    parser.add_argument("--corpus", default=os.path.join(RAIZ, "bench", "corpus"), help="pasta do corpus")
+    parser.add_argument("--saida", help="grava o resultado neste JSON")
+    parser.add_argument("--sem-partida", action="store_true", help="não mede a partida do gunicorn")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--limites", default=LIMITES, help="tolerâncias por etapa")
+    args = parser.parse_args()
+    args.corpus = os.path.abspath(args.corpus)
+    saida = os.path.abspath(args.saida) if args.saida else None
+    base = os.path.abspath(args.base) if args.base else None
+    limites_json = os.path.abspath(args.limites)
+
+    resultado = executar(args)
+    shutil.rmtree(_TEMP, ignore_errors=True)
+    imprimir(resultado)
+    if saida:
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Resultado gravado em {saida}")
+
+    if base:
+        with open(base, encoding="utf-8") as f:
+            anterior = json.load(f)
+        with open(limites_json, encoding="utf-8") as f:
+            limites = json.load(f)
+        print(f"\nComparação com {anterior['meta'].get('commit')} ({base}):")
+        print(f"{'etapa':<36}{'base (ms)':>11}{'atual (ms)':>12}{'limite (ms)':>13}")
+        regressoes = 0
+        for chave, b, a, limite, regrediu in comparar(resultado, anterior, limites):
+            regressoes += regrediu
+            print(f"{chave:<36}{b * 1000:>11.2f}{a * 1000:>12.2f}{limite * 1000:>13.2f}"
+                  f"  {'REGRESSÃO' if regrediu else 'ok'}")
+        if regressoes:
+            print(f"[ERRO] {regressoes} etapa(s) acima do limite.")
+            sys.exit(1)
+        print("[INFO] Nenhuma regressão.")
+
+
+if __name__ == "__main__":
+    main()
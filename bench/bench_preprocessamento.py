@@ -0,0 +1,100 @@
+"""
+Compara o OCR das páginas escaneadas do corpus sintético (bench/corpus.py,
+com carimbo "Valide aqui", sujeira na margem e página levemente girada) sem e
+com o pré-processamento de preprocessamento.py. Por página: tempo do
+pré-processamento e do Tesseract, linhas de lixo no texto
+(selecao.linha_lixo) e semelhança das palavras com o texto original do corpus
+(difflib, 1.0 = idêntico).
+
+Precisa do poppler e do tesseract reais; com --salvar, as páginas
+pré-processadas ficam numa pasta para conferência visual.
+
+Uso:
+    python bench/bench_preprocessamento.py [--paginas 3] [--dpi 300] [--salvar pasta]
+"""
+
+import os
+import sys
+import time
+import shutil
+import difflib
+import argparse
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytesseract  # noqa: E402
+
+import corpus  # noqa: E402
+import preprocessamento  # noqa: E402
+from ocr import rasterizar_paginas  # noqa: E402
+from selecao import linha_lixo  # noqa: E402
+
+CONFIG = "--psm 4"
+
+
+def semelhanca(texto, original):
+    return difflib.SequenceMatcher(None, texto.split(), original.split(), autojunk=False).ratio()
+
+
+def medir(caminho, original, pre):
+    inicio = time.perf_counter()
+    imagem = preprocessamento.preprocessar(caminho) if pre else caminho
+    meio = time.perf_counter()
+    texto = pytesseract.image_to_string(imagem, lang="por", config=CONFIG)
+    fim = time.perf_counter()
+    linhas = [ln for ln in texto.splitlines() if ln.strip()]
+    return {"pre_s": meio - inicio, "ocr_s": fim - meio,
+            "lixo": sum(1 for ln in linhas if linha_lixo(ln)), "linhas": len(linhas),
+            "semelhanca": semelhanca(texto, original), "imagem": imagem}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paginas", type=int, default=3)
+    parser.add_argument("--dpi", type=int, default=300, help="DPI da rasterização (como em app.py)")
+    parser.add_argument("--semente", type=int, default=7)
+    parser.add_argument("--salvar", help="pasta para as páginas pré-processadas")
+    args = parser.parse_args()
+
+    if not preprocessamento.ativo():
+        sys.exit("numpy ausente ou OCR_PREPROCESSAR=0: nada a comparar.")
+    for ferramenta in ("pdftoppm", "tesseract"):
+        if not shutil.which(ferramenta):
+            sys.exit(f"{ferramenta} não encontrado no PATH.")
+    pytesseract.pytesseract.tesseract_cmd = shutil.which("tesseract")
+
+    paginas = corpus.gerar_paginas(args.paginas, args.semente)
+    pdf = corpus.garantir_corpus(os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus"),
+                                 [args.paginas], args.semente)[("imagem", args.paginas)]
+    if args.salvar:
+        os.makedirs(args.salvar, exist_ok=True)
+
+    totais = {False: [], True: []}
+    print(f"{'pág':>4} {'modo':<6}{'pré ms':>8}{'ocr ms':>9}{'lixo':>10}{'semelhança':>12}")
+    with tempfile.TemporaryDirectory(prefix="bench_pre_") as pasta:
+        for numero, caminho in rasterizar_paginas(pdf, pasta, dpi=args.dpi):
+            original = "\n".join(paginas[numero - 1])
+            for pre in (False, True):
+                r = medir(caminho, original, pre)
+                totais[pre].append(r)
+                lixo = f"{r['lixo']}/{r['linhas']}"
+                print(f"{numero:>4} {'pré' if pre else 'cru':<6}{r['pre_s'] * 1000:>8.0f}"
+                      f"{r['ocr_s'] * 1000:>9.0f}{lixo:>10}{r['semelhanca']:>12.3f}")
+                if pre and args.salvar:
+                    r["imagem"].save(os.path.join(args.salvar, f"p{numero:03d}.png"))
+
+    print()
+    for pre, rs in totais.items():
+        n = len(rs) or 1
+        print(f"{'pré-processado' if pre else 'cru':<15} por página: "
+              f"{sum(r['pre_s'] + r['ocr_s'] for r in rs) / n * 1000:.0f} ms "
+              f"(pré {sum(r['pre_s'] for r in rs) / n * 1000:.0f} ms), "
+              f"lixo {sum(r['lixo'] for r in rs)}/{sum(r['linhas'] for r in rs)} linhas, "
+              f"semelhança média {sum(r['semelhanca'] for r in rs) / n:.3f}")
+
+
+if __name__ == "__main__":
+    main()
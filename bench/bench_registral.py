@@ -0,0 +1,249 @@
+"""
+Micro-benchmark do motor de regras (registral.extrair_campos) contra a versão
+anterior de analisar_inteligencia_registral, que fazia ~10 passadas com
+regexes compiladas na hora.
+
+Verifica que os dois produzem o mesmo dicionário e mede o tempo de cada um
+em transcrições reais (debug_ocr.txt, debug_texto_completo.txt) e sintéticas
+(1 a 100 páginas). "Ônus Reais" e "Diagnóstico" ficam fora dessa comparação:
+o motor novo descarta ônus cancelados por atos posteriores. Eles são
+comparados à parte em certidões sem cancelamento, com os ônus no plural ou
+flexionados (PENHORAS, PENHORADO, HIPOTECAS, ARRESTOS, EXECUÇÕES) ou com
+palavras de cancelamento que não cancelam ônus nenhum ("BAIXA RENDA",
+"CANCELAMENTO DO USUFRUTO"): todo ônus que a versão anterior achava o motor
+também tem que achar, e o diagnóstico não pode sair "Pode Vender" onde ela
+dizia "Atenção".
+
+Uso:
+    python bench/bench_registral.py [--repeticoes 5]
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+import timeit
+from collections import Counter
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from registral import RADICAIS_PERIGO, extrair_campos  # noqa: E402
+
+
+# ---------------- REFERÊNCIA (VERSÃO ANTERIOR) ----------------
+def analisar_legado(texto):
+    """Cópia de certidao.analisar_inteligencia_registral antes do motor pré-compilado (referência)."""
+    texto_limpo = re.sub(r'\s+', ' ', texto).upper()
+
+    # CARTÓRIO
+    cabecalho = texto_limpo[:1000]
+    cartorio = "Registro de Imóveis - RJ"
+    match_cartorio = re.search(r'(\d+)[º°ª]\s*(?:OF[ÍI]CIO|REGISTRO)', cabecalho)
+    if match_cartorio:
+        numero = match_cartorio.group(1)
+        cartorio = f"{numero}º Ofício de Registro de Imóveis - RJ"
+    elif "5º OFÍCIO" in cabecalho:
+        cartorio = "5º Ofício de Registro de Imóveis - RJ"
+    elif "9º OFÍCIO" in cabecalho:
+        cartorio = "9º Ofício de Registro de Imóveis - RJ"
+
+    # DATA DA CERTIDÃO
+    rodape = texto_limpo[-2000:]
+    data_certidao = datetime.now().strftime('%d/%m/%Y')
+    match_data_extenso = re.search(r'RIO DE JANEIRO,?\s*(\d{1,2})\s*DE\s*([A-ZÇ]+)\s*DE\s*(\d{4})', rodape)
+    match_data_simples = re.findall(r'(\d{2}/\d{2}/\d{4})', rodape)
+    if match_data_extenso:
+        dia, mes, ano = match_data_extenso.groups()
+        data_certidao = f"{dia} de {mes} de {ano}"
+    elif match_data_simples:
+        data_certidao = match_data_simples[-1]
+
+    # MATRÍCULA
+    matricula = "Não identificada"
+    candidatos_matricula = re.findall(r'[RAV]\.?(\d{4,7})', texto_limpo)
+    if candidatos_matricula:
+        matricula = Counter(candidatos_matricula).most_common(1)[0][0]
+    else:
+        match_topo = re.search(r'MATR[ÍI]CULA.*?(\d{4,7})', texto_limpo)
+        if match_topo:
+            matricula = match_topo.group(1)
+
+    # PROPRIETÁRIOS
+    proprietarios = []
+    # Busca padrões de "NOME, CPF nnn.nnn.nnn-nn"
+    matches_cpf = re.findall(r'([A-Z\s\.\-]{6,200}?)\s+CPF[:\s]*([\d\.\-]{11,14})', texto_limpo)
+    for nome, cpf in matches_cpf:
+        n = nome.strip().title()
+        proprietarios.append({"nome": n, "cpf": cpf})
+
+    if not proprietarios:
+        # tentativa genérica
+        generic_matches = re.findall(r'(PROPRIET[ÁA]RIO|ADQUIRENTE|PROPRIETARIOS?).{0,40}([A-Z][A-Z\s,]{4,200})', texto_limpo)
+        for gm in generic_matches:
+            n = re.sub(r'CPF.*', '', gm[1]).strip().title()
+            if len(n) > 4:
+                proprietarios.append({"nome": n})
+
+    # ENDEREÇO
+    endereco = "Endereço não localizado"
+    match_end = re.search(r'(?:ENDEREÇOS?|ENDEREÇO|LOCALIZADO EM|SITUADO EM).*?((?:RUA|AVENIDA|AV|TRAVESSA|ALAMEDA|PRAÇA).{1,200}?)\.', texto_limpo)
+    if match_end:
+        endereco = match_end.group(1).strip().title()
+    else:
+        match_end2 = re.search(r'(?:AV\.|RUA|AVENIDA|PRAÇA|TRAVESSA)\s+[A-Z0-9\.\-\/\s]{4,200}', texto_limpo)
+        if match_end2:
+            endereco = match_end2.group(0).strip().title()
+
+    # ÔNUS
+    termos_perigo = ["PENHORA", "HIPOTECA", "INDISPONIBILIDADE", "ARRESTO", "ARRESTOS", "AÇÃO DE EXECUÇÃO", "EXECUÇÃO"]
+    onus_encontrados = []
+    for termo in termos_perigo:
+        if termo in texto_limpo:
+            onus_encontrados.append(termo)
+
+    diagnostico = "Pode Vender (Livre)" if not onus_encontrados else "Atenção (Possíveis Ônus)"
+
+    if not onus_encontrados:
+        onus_encontrados = ["Nada consta (Livre de Ônus Reais)"]
+
+    return {
+        "Cartório": cartorio,
+        "Matrícula": matricula,
+        "Data da Busca": datetime.now().strftime('%d/%m/%Y'),
+        "Data da Certidão": data_certidao,
+        "Endereço": endereco,
+        "Proprietários": proprietarios if proprietarios else [{"nome": "Verificar R.1 na imagem"}],
+        "Ônus Reais": onus_encontrados,
+        "Diagnóstico": diagnostico
+    }
+
+
+# ---------------- CORPUS ----------------
+NOMES = ["MARIA", "JOSÉ", "ANA", "JOÃO", "CARLOS", "LÚCIA", "PAULO", "HÉLCIO", "ALEXIA", "RENATA"]
+SOBRENOMES = ["SILVA", "SOUZA", "CAMBRAIA", "OLIVEIRA", "PEREIRA", "ALVES", "COSTA", "AZEVEDO"]
+RUIDO = ["(ep)", "[eb]", "Ko)", "o]", "LO", "Lu", "[62]", "Ee)", "=", "2)", "[af]", "<", ">"]
+ATOS = ["COMPRA E VENDA", "PARTILHA", "PENHORA", "HIPOTECA", "CANCELAMENTO", "DOAÇÃO"]
+
+
+def _cpf(rnd):
+    d = [rnd.randint(0, 9) for _ in range(11)]
+    return "{}{}{}.{}{}{}.{}{}{}-{}{}".format(*d)
+
+
+def _nome(rnd):
+    return f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+
+
+def transcricao_sintetica(paginas, semente=42, matricula="127148"):
+    """Transcrição no formato de debug_ocr.txt: cabeçalho, atos R./AV. e ruído de carimbo."""
+    rnd = random.Random(semente)
+    linhas = ["Pedido N: 24/019006", "Valide aqui", "este documento"]
+    linhas += [rnd.choice(RUIDO) for _ in range(60)]
+    linhas += [
+        "5º OFÍCIO DE REGISTRO DE IMÓVEIS",
+        f"MATRÍCULA {matricula}",
+        "IMÓVEL: Apartamento nº1204 do edifício situado à Avenida Nossa Senhora de Copacabana nº360.",
+    ]
+    ato = 1
+    for _ in range(paginas):
+        for _ in range(4):
+            tipo = rnd.choice(["R", "AV"])
+            linhas.append(f"{tipo}.{ato}/{matricula}-{rnd.choice(ATOS)}: Nos termos da escritura de "
+                          f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1990, 2024)}, "
+                          f"o imóvel foi transmitido a {_nome(rnd)}, brasileiro, casado, "
+                          f"CPF {_cpf(rnd)}, residente nesta cidade.")
+            linhas += ["prenotado no Lº1EF-661634-085 em 08/11/2022, Selo EEJA30B7T0 DUX."]
+            ato += 1
+        linhas += [rnd.choice(RUIDO) for _ in range(30)]
+    linhas.append("Rio de Janeiro, 19 de Dezembro de 2022.")
+    return "\n".join(linhas)
+
+
+def corpus():
+    textos = {}
+    for nome in ("debug_ocr.txt", "debug_texto_completo.txt"):
+        caminho = os.path.join(RAIZ, nome)
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                textos[nome] = f.read()
+    for paginas in (1, 10, 100):
+        textos[f"sintetico_{paginas}p"] = transcricao_sintetica(paginas)
+    return textos
+
+
+# Certidões sem cancelamento com os ônus só em formas flexionadas
+CASOS_FLEXAO = {
+    "penhoras": "R.1/127148 COMPRA E VENDA. AV.2/127148 PENHORAS DOS DIREITOS DO EXECUTADO NOS AUTOS.",
+    "penhorado": "R.1/127148 COMPRA E VENDA. AV.2/127148 O IMÓVEL FOI PENHORADO EM FAVOR DA UNIÃO.",
+    "hipotecas": "R.1/127148 COMPRA E VENDA. R.2/127148 HIPOTECAS EM PRIMEIRO E SEGUNDO GRAUS.",
+    "hipotecaria": "R.1/127148 COMPRA E VENDA. R.2/127148 CÉDULA DE CRÉDITO HIPOTECÁRIA Nº 12.",
+    "arrestos": "R.1/127148 COMPRA E VENDA. AV.2/127148 ARRESTOS DIVERSOS DETERMINADOS PELO JUÍZO.",
+    "execucoes": "R.1/127148 COMPRA E VENDA. AV.2/127148 DISTRIBUÍDAS EXECUÇÕES FISCAIS CONTRA O PROPRIETÁRIO.",
+    "indisponiveis": "R.1/127148 COMPRA E VENDA. AV.2/127148 BENS TORNADOS INDISPONÍVEIS (CNIB).",
+}
+# Palavra de cancelamento que não rege ônus: o ônus do ato continua valendo
+CASOS_CANCELAMENTO_ALHEIO = {
+    "baixa_renda": "R.2 HIPOTECA EM FAVOR DA CAIXA, PROGRAMA HABITACIONAL DE BAIXA RENDA.",
+    "baixa_renda_ato": "R.1/127148 COMPRA E VENDA. R.2/127148 HIPOTECA EM FAVOR DA CAIXA, "
+                       "PROGRAMA HABITACIONAL DE BAIXA RENDA.",
+    "usufruto": "AV.2 PENHORA EM FAVOR DO BANCO X. AV.3 CANCELAMENTO DO USUFRUTO VITALICIO.",
+    "usufruto_ato": "R.1/127148 COMPRA E VENDA. AV.2/127148 PENHORA EM FAVOR DO BANCO X. "
+                    "AV.3/127148 CANCELAMENTO DO USUFRUTO VITALICIO.",
+}
+
+
+# ---------------- MEDIÇÃO ----------------
+CAMPOS_ONUS = ("Ônus Reais", "Diagnóstico")
+
+
+def _sem_onus(resultado):
+    return {k: v for k, v in resultado.items() if k not in CAMPOS_ONUS}
+
+
+def _radicais(onus):
+    """Radicais de perigo citados numa lista de ônus ("PENHORA (AV.2)", "ARRESTOS"...)."""
+    return {r for item in onus for r in RADICAIS_PERIGO if r in item}
+
+
+def verificar_onus(texto):
+    """Mensagem de erro se o motor achar menos ônus que a versão anterior (certidão sem cancelamento)."""
+    legado, motor = analisar_legado(texto), extrair_campos(texto)
+    faltando = _radicais(legado["Ônus Reais"]) - _radicais(motor["Ônus Reais"])
+    if faltando:
+        return f"ônus perdidos {sorted(faltando)}: {motor['Ônus Reais']}"
+    if legado["Diagnóstico"] != motor["Diagnóstico"] and motor["Diagnóstico"].startswith("Pode Vender"):
+        return f"diagnóstico {motor['Diagnóstico']!r}, anterior {legado['Diagnóstico']!r}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'texto':<26}{'chars':>9}{'legado (ms)':>14}{'motor (ms)':>13}{'ganho':>8}")
+    falhas = 0
+    for nome, texto in corpus().items():
+        if _sem_onus(analisar_legado(texto)) != _sem_onus(extrair_campos(texto)):
+            print(f"[ERRO] Resultado diferente em {nome}")
+            falhas += 1
+        t_legado = min(timeit.repeat(lambda: analisar_legado(texto), number=1, repeat=args.repeticoes))
+        t_motor = min(timeit.repeat(lambda: extrair_campos(texto), number=1, repeat=args.repeticoes))
+        print(f"{nome:<26}{len(texto):>9}{t_legado * 1000:>14.2f}{t_motor * 1000:>13.2f}"
+              f"{t_legado / t_motor:>7.1f}x")
+
+    casos = dict(CASOS_FLEXAO, **CASOS_CANCELAMENTO_ALHEIO)
+    for nome, texto in casos.items():
+        erro = verificar_onus(texto)
+        if erro:
+            print(f"[ERRO] Ônus em {nome}: {erro}")
+            falhas += 1
+    print(f"ônus flexionados e cancelamentos alheios: {len(casos)} casos comparados com a versão anterior")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compara o texto que vai no prompt da Groq: corte antigo (6000 primeiros +
+3000 últimos caracteres) contra selecao.selecionar_texto com o orçamento de
+tokens. Mede tokens estimados, atos R./AV. cobertos (cabeçalho presente) e
+menções a ônus preservadas, em transcrições reais e sintéticas.
+
+Uso:
+    python bench/bench_selecao.py [--orcamento 2500]
+"""
+
+import os
+import re
+import sys
+import argparse
+import timeit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from selecao import selecionar_texto, estimar_tokens  # noqa: E402
+from bench_registral import corpus  # noqa: E402
+
+_ATO = re.compile(r'^\s*(?:R|AV)[\.\-]?\s?\d{1,4}\s?/\s?\d', re.IGNORECASE | re.MULTILINE)
+_ONUS = re.compile(r'PENHORA|HIPOTECA|INDISPONIBILIDADE|ARRESTO|CANCELAMENTO', re.IGNORECASE)
+
+
+def corte_antigo(texto):
+    return (texto[:6000] + "\n...[MEIO DO DOCUMENTO]...\n" + texto[-3000:]) if len(texto) > 9000 else texto
+
+
+def medir(texto, original):
+    return (estimar_tokens(texto), len(_ATO.findall(texto)), len(_ONUS.findall(texto)),
+            len(_ATO.findall(original)), len(_ONUS.findall(original)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orcamento", type=int, default=2500, help="tokens (GROQ_ORCAMENTO_TOKENS)")
+    args = parser.parse_args()
+
+    print(f"{'texto':<26}{'método':<10}{'tokens':>8}{'atos':>10}{'ônus':>10}{'ms':>8}")
+    for nome, texto in corpus().items():
+        for metodo, funcao in (("antigo", corte_antigo),
+                               ("seleção", lambda t: selecionar_texto(t, args.orcamento))):
+            saida = funcao(texto)
+            tempo = min(timeit.repeat(lambda: funcao(texto), number=1, repeat=3))
+            tokens, atos, onus, atos_total, onus_total = medir(saida, texto)
+            print(f"{nome:<26}{metodo:<10}{tokens:>8}{f'{atos}/{atos_total}':>10}"
+                  f"{f'{onus}/{onus_total}':>10}{tempo * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
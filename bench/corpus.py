@@ -0,0 +1,237 @@
+"""
+Corpus sintético de certidões de matrícula para os benchmarks.
+
+As páginas seguem o layout de debug_ocr.txt: cabeçalho do ofício, matrícula e
+descrição do imóvel, atos R./AV. numerados (partilhas, compras e vendas,
+penhoras e seus cancelamentos) e rodapé com a certificação e o selo. O mesmo
+conteúdo é gerado em duas formas:
+
+  texto    PDF com camada de texto (Helvetica, sem dependências)
+  imagem   PDF "escaneado": páginas renderizadas como imagem, levemente
+           giradas, com carimbo e ruído na margem (Pillow)
+
+Tudo é determinístico pela semente, então o corpus é o mesmo entre commits.
+
+Uso:
+    python bench/corpus.py --paginas 1,10,100 --pasta bench/corpus
+"""
+
+import os
+import random
+import argparse
+import textwrap
+
+LINHAS_POR_PAGINA = 58
+COLUNAS = 92
+
+NOMES = ["MARIA", "JOSÉ", "ANA", "JOÃO", "CARLOS", "LÚCIA", "PAULO", "HÉLCIO", "ALOÍSIO", "LÍLIAN"]
+SOBRENOMES = ["SILVA", "SOUZA", "CAMBRAIA", "OLIVEIRA", "PEREIRA", "ALVES", "COSTA", "AZEVEDO", "CASTRO"]
+PROFISSOES = ["engenheiro", "médico", "advogado", "estudante", "aposentado", "professor", "terapeuta"]
+ESTADOS = ["solteiro", "casado pelo regime da comunhão parcial de bens", "viúvo", "divorciado"]
+CIDADES = ["nesta cidade", "em Belo Horizonte-MG", "em Niterói-RJ", "em Lavras-MG"]
+MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto",
+         "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+
+def _cpf(rnd):
+    d = [rnd.randint(0, 9) for _ in range(11)]
+    return "{}{}{}.{}{}{}.{}{}{}-{}{}".format(*d)
+
+
+def _reais(valor):
+    return "R$" + f"{valor:,}".replace(",", ".") + ",00"
+
+
+def _data(rnd):
+    return f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1995, 2024)}"
+
+
+def _pessoa(rnd):
+    nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+    return (f"{nome}, brasileiro(a), {rnd.choice(PROFISSOES)}, {rnd.choice(ESTADOS)}, "
+            f"CPF nº{_cpf(rnd)}, residente {rnd.choice(CIDADES)}")
+
+
+def _ato(rnd, numero, matricula, penhoras_ativas):
+    """Texto de um ato; penhoras registradas podem ser canceladas depois por um AV."""
+    selo = f"Selo: EE{rnd.choice('JKRU')}{rnd.choice('AEJU')} {rnd.randint(10000, 99999)} {rnd.choice(['IZX', 'MEM', 'BLK', 'DUX'])}."
+    prenotacao = f"Prenotação sob o nº{rnd.randint(600000, 699999)} em {_data(rnd)}."
+    sorteio = rnd.random()
+    if penhoras_ativas and sorteio < 0.2:
+        alvo = penhoras_ativas.pop(rnd.randrange(len(penhoras_ativas)))
+        return (f"AV.{numero}/{matricula} - Rio de Janeiro, {_data(rnd)}. {prenotacao} "
+                f"CANCELAMENTO DE PENHORA: Nos termos do mandado expedido pelo Juízo de Direito da "
+                f"{rnd.randint(1, 50)}ª Vara Cível, fica cancelada a penhora objeto do R.{alvo}. {selo}")
+    if sorteio < 0.35:
+        penhoras_ativas.append(numero)
+        return (f"R.{numero}/{matricula} - Rio de Janeiro, {_data(rnd)}. {prenotacao} "
+                f"PENHORA: Nos termos do termo de penhora extraído dos autos da ação de execução "
+                f"nº{rnd.randint(1000000, 9999999)}-{rnd.randint(10, 99)}.{rnd.randint(2010, 2024)}.8.19.0001, "
+                f"movida contra {_pessoa(rnd)}, o imóvel desta matrícula foi penhorado para garantia da "
+                f"dívida de {_reais(rnd.randint(10000, 900000))}. {selo}")
+    if sorteio < 0.45:
+        return (f"AV.{numero}/{matricula} - Rio de Janeiro, {_data(rnd)}. {prenotacao} "
+                f"ÓBITO: Conforme certidão de óbito expedida pelo Cartório de Registro Civil, procede-se a "
+                f"presente para constar o óbito de {rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}, ocorrido em "
+                f"{_data(rnd)}. {selo}")
+    tipo = rnd.choice(["COMPRA E VENDA", "PARTILHA", "DOAÇÃO", "INVENTÁRIO E ADJUDICAÇÃO"])
+    adquirentes = "; ".join(f"{i})" + _pessoa(rnd) for i in range(1, rnd.randint(2, 4)))
+    return (f"R.{numero}/{matricula} - {tipo}: Nos termos da escritura de {_data(rnd)}, lavrada no "
+            f"{rnd.randint(1, 24)}º Ofício de Notas, prenotada no Lº1EF-{rnd.randint(100000, 999999)} "
+            f"em {_data(rnd)}, o imóvel desta matrícula foi transmitido a {adquirentes}, pelo valor de "
+            f"{_reais(rnd.randint(100000, 2000000))}. Foi pago o imposto de transmissão pela guia "
+            f"nº{rnd.randint(2015, 2024)}-2-{rnd.randint(100000, 999999)}. {selo}")
+
+
+def gerar_paginas(n_paginas, semente=7, matricula="127.148"):
+    """Lista de páginas (cada uma, lista de linhas) de uma certidão com `n_paginas`."""
+    rnd = random.Random(semente * 1000 + n_paginas)
+    linhas = [
+        "Pedido N: 24/019006",
+        "5º OFÍCIO DO REGISTRO DE IMÓVEIS",
+        "Av. Nossa Senhora de Copacabana, 1138 - Rio de Janeiro - RJ",
+        f"MATRÍCULA N.º {matricula}",
+        "",
+    ]
+    linhas += textwrap.wrap(
+        "IMÓVEL: - Apartamento nº1204 do edifício situado à Avenida Nossa Senhora de Copacabana nº360, "
+        "com a correspondente fração ideal de 1/48 do respectivo terreno, que mede 15,00m de frente, "
+        "confrontando do lado esquerdo com o nº346, do lado direito com o lote nº29, e nos fundos com "
+        f"a Rua General Barbosa Lima. PROPRIETÁRIA: {_pessoa(rnd)}. Construção em 26/09/1965.", COLUNAS)
+    linhas.append("")
+
+    rodape = textwrap.wrap(
+        "CERTIFICO que a presente é reprodução autêntica da matrícula a que se refere, extraída nos "
+        "termos do art. 19 § 1º da Lei 6015 de 1973, dela constando todos os ônus e indisponibilidades "
+        "que recaiam sobre o imóvel. Data da busca 01/10/2024.", COLUNAS)
+    dia, mes = rnd.randint(1, 28), rnd.choice(MESES)
+    rodape += [f"Rio de Janeiro, {dia} de {mes} de 2024.", "Poder Judiciário - TJERJ",
+               "Selo de Fiscalização Eletrônico EEUJ 76747 BLK"]
+
+    alvo = n_paginas * LINHAS_POR_PAGINA - len(rodape)
+    numero, penhoras = 1, []
+    nome_mat = matricula.replace(".", "")
+    while len(linhas) < alvo:
+        ato = _ato(rnd, numero, matricula if numero == 1 else nome_mat, penhoras)
+        linhas += textwrap.wrap(ato, COLUNAS) + [""]
+        numero += 1
+    linhas = linhas[:alvo] + rodape
+    paginas = [linhas[i:i + LINHAS_POR_PAGINA] for i in range(0, len(linhas), LINHAS_POR_PAGINA)]
+    return paginas[:n_paginas]
+
+
+# ---------------- PDF COM CAMADA DE TEXTO ----------------
+def _escapar(linha):
+    return linha.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_texto(paginas, caminho):
+    """PDF mínimo (Helvetica, WinAnsi) com uma linha de texto por linha da página."""
+    objetos = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    filhos = []
+    for linhas in paginas:
+        corpo = "BT /F1 9 Tf 40 805 Td 13.5 TL " + " ".join(f"({_escapar(ln)}) '" for ln in linhas) + " ET"
+        dados = corpo.encode("cp1252", "replace")
+        pid = len(objetos) + 1
+        objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode())
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(dados) + dados + b"\nendstream")
+        filhos.append(pid)
+    objetos[1] = ("<< /Type /Pages /Kids [" + " ".join(f"{k} 0 R" for k in filhos)
+                  + f"] /Count {len(filhos)} >>").encode()
+
+    buf = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for i, obj in enumerate(objetos, 1):
+        posicoes.append(len(buf))
+        buf += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(buf)
+    buf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for p in posicoes:
+        buf += b"%010d 00000 n \n" % p
+    buf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    with open(caminho, "wb") as f:
+        f.write(buf)
+
+
+# ---------------- PDF ESCANEADO ----------------
+FONTES = [
+    os.environ.get("BENCH_FONTE", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+
+
+def _fonte(tamanho):
+    from PIL import ImageFont
+    for caminho in FONTES:
+        if caminho and os.path.exists(caminho):
+            return ImageFont.truetype(caminho, tamanho)
+    # Sem TTF no sistema: a fonte embutida do Pillow não tem acentos, mas serve para medir
+    return ImageFont.load_default(size=tamanho)
+
+
+def pdf_imagem(paginas, caminho, dpi=200, semente=7):
+    """PDF só com imagens das páginas, simulando uma certidão escaneada."""
+    from PIL import Image, ImageDraw
+
+    rnd = random.Random(semente)
+    largura, altura = int(8.27 * dpi), int(11.69 * dpi)
+    fonte = _fonte(int(dpi * 9 / 72))
+    fonte_carimbo = _fonte(int(dpi * 7 / 72))
+    entrelinha = dpi * 13.5 / 72
+    imagens = []
+    for linhas in paginas:
+        img = Image.new("L", (largura, altura), 255)
+        d = ImageDraw.Draw(img)
+        x, y = dpi * 40 / 72, dpi * 37 / 72
+        for ln in linhas:
+            d.text((x, y), ln, font=fonte, fill=rnd.randint(0, 40))
+            y += entrelinha
+        # Carimbo de validação e sujeira na margem direita, como no topo de debug_ocr.txt
+        margem = largura - int(dpi * 0.45)
+        d.rectangle([margem, dpi, largura - dpi * 0.08, dpi * 2.2], outline=60, width=3)
+        d.text((margem + 6, dpi * 1.1), "Valide\naqui", font=fonte_carimbo, fill=60)
+        for _ in range(250):
+            px, py = rnd.randint(margem, largura - 5), rnd.randint(0, altura - 5)
+            d.rectangle([px, py, px + rnd.randint(1, 6), py + rnd.randint(1, 6)], fill=rnd.randint(0, 120))
+        img = img.rotate(rnd.uniform(-0.8, 0.8), fillcolor=255, resample=Image.BILINEAR)
+        imagens.append(img)
+    imagens[0].save(caminho, "PDF", resolution=dpi, save_all=True, append_images=imagens[1:])
+
+
+def garantir_corpus(pasta, tamanhos, semente=7):
+    """
+    Gera (se ainda não existirem) os PDFs do corpus e devolve
+    {(forma, páginas): caminho}, com forma "texto" ou "imagem".
+    """
+    os.makedirs(pasta, exist_ok=True)
+    arquivos = {}
+    for n in tamanhos:
+        paginas = None
+        for forma, gerar in (("texto", pdf_texto), ("imagem", pdf_imagem)):
+            caminho = os.path.join(pasta, f"matricula_{forma}_{n:03d}p_s{semente}.pdf")
+            if not os.path.exists(caminho):
+                paginas = paginas or gerar_paginas(n, semente)
+                gerar(paginas, caminho + ".tmp")
+                os.replace(caminho + ".tmp", caminho)
+            arquivos[(forma, n)] = caminho
+    return arquivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o corpus sintético de certidões.")
+    parser.add_argument("--paginas", default="1,10,100")
+    parser.add_argument("--pasta", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus"))
+    parser.add_argument("--semente", type=int, default=7)
+    args = parser.parse_args()
+    tamanhos = [int(n) for n in args.paginas.split(",")]
+    for (forma, n), caminho in sorted(garantir_corpus(args.pasta, tamanhos, args.semente).items()):
+        print(f"{forma:<7}{n:>4}p  {os.path.getsize(caminho) / 1024:>9.0f} KB  {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Servidor falso compatível com a API de chat da Groq/OpenAI, para testar o
+cliente de IA (keep-alive, repetições, Retry-After, disjuntor) sem rede.
+
+Aponte o app para ele com GROQ_URL=http://127.0.0.1:<porta>/openai/v1/chat/completions.
+
+Uso:
+    python bench/fake_llm.py --porta 8099 --atraso 0.2
+    python bench/fake_llm.py --falhas 2 --status 429 --retry-after 1   # 2 primeiras falham
+    python bench/fake_llm.py --status 503 --falhas -1                  # sempre falha
+
+Também pode ser iniciado no mesmo processo (scripts de bench):
+    servidor, url = iniciar(atraso=0.5)
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RELATORIO = {
+    "Cartório": "5º Ofício de Registro de Imóveis - RJ",
+    "Matrícula": "127148",
+    "Data da Certidão": "01/10/2024",
+    "Endereço": "Avenida Nossa Senhora de Copacabana 360, Apt 1204",
+    "Proprietários": [{"nome": "Maria Rita De Assis Cambraia", "cpf": "000.000.000-00"}],
+    "Ônus": [],
+    "Diagnóstico": "Pode Vender (Livre)",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        # Como a API real: o endpoint de chat só aceita POST (o app usa HEAD para abrir a conexão)
+        with self.server.lock:
+            self.server.conexoes.add(self.client_address)
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        srv = self.server
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        with srv.lock:
+            srv.requisicoes += 1
+            n = srv.requisicoes
+            srv.conexoes.add(self.client_address)
+        if srv.atraso:
+            time.sleep(srv.atraso)
+
+        if srv.falhas < 0 or n <= srv.falhas:
+            dados = json.dumps({"error": {"message": "falha simulada"}}).encode()
+            self.send_response(srv.status)
+            if srv.retry_after is not None:
+                self.send_header("Retry-After", str(srv.retry_after))
+        else:
+            try:
+                modelo = json.loads(corpo).get("model", "fake")
+            except ValueError:
+                modelo = "fake"
+            conteudo = "```json\n" + json.dumps(RELATORIO, ensure_ascii=False) + "\n```"
+            dados = json.dumps({
+                "id": f"fake-{n}",
+                "model": modelo,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo}}],
+            }, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+def iniciar(porta=0, atraso=0.0, falhas=0, status=429, retry_after=None):
+    """Sobe o servidor numa thread; devolve (servidor, url do endpoint de chat)."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), _Handler)
+    servidor.daemon_threads = True
+    servidor.atraso = atraso
+    servidor.falhas = falhas
+    servidor.status = status
+    servidor.retry_after = retry_after
+    servidor.requisicoes = 0
+    servidor.conexoes = set()
+    servidor.lock = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/openai/v1/chat/completions"
+    return servidor, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso da API de chat (Groq/OpenAI).")
+    parser.add_argument("--porta", type=int, default=8099)
+    parser.add_argument("--atraso", type=float, default=0.0, help="segundos antes de responder")
+    parser.add_argument("--falhas", type=int, default=0, help="primeiras N requisições falham (-1: todas)")
+    parser.add_argument("--status", type=int, default=429, help="status das falhas")
+    parser.add_argument("--retry-after", default=None, help="valor do cabeçalho Retry-After nas falhas")
+    args = parser.parse_args()
+    servidor, url = iniciar(args.porta, args.atraso, args.falhas, args.status, args.retry_after)
+    print(f"Servidor falso em {url} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
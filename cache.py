@@ -0,0 +1,298 @@
+"""
+Cache persistente em disco (um arquivo JSON por chave), com validade (TTL)
+e despejo LRU quando o tamanho total passa do limite.
+
+Usado para guardar o texto extraído dos PDFs, endereçado pelo SHA-256 do
+arquivo + parâmetros de extração, de modo que reenviar a mesma certidão não
+repete pdfplumber/OCR; e as respostas das IAs (Groq/Gemini), endereçadas pelo
+prompt normalizado + modelo + temperatura. Chamadas idênticas simultâneas à
+IA são agrupadas (single-flight): só uma vai ao provedor, as outras esperam;
+no modo assíncrono (asgi.py), com futures do event loop em vez de threads.
+Só entram no cache respostas que passam na validação de quem chama (JSON
+válido, em provedores.py): uma resposta truncada ou fora do formato ficaria
+servindo a mesma análise errada até o TTL. Provedores com temperatura acima
+de 0 (o Gemini, a 0.2) não usam o cache: a mesma pergunta pode ter outra
+resposta, e repetir uma amostra ruim não é o que a chamada pediu. Chamadas
+idênticas simultâneas continuam agrupadas em qualquer temperatura.
+
+Variáveis de ambiente:
+  CACHE_DIR                pasta raiz dos caches (padrão: cache)
+  CACHE_EXTRACAO_MAX_MB    tamanho máximo do cache de extração (padrão: 200)
+  CACHE_EXTRACAO_TTL_H     validade das entradas em horas (padrão: 168 = 7 dias)
+  CACHE_IA_MAX_MB          tamanho máximo do cache de respostas da IA (padrão: 50)
+  CACHE_IA_TTL_H           validade das respostas da IA em horas (padrão: 24)
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get("CACHE_DIR", "cache")
+
+
+def hash_arquivo(caminho, bloco=1024 * 1024):
+    """SHA-256 (hex) do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def montar_chave(*partes, **params):
+    """Chave estável a partir de partes posicionais e parâmetros nomeados."""
+    texto = "|".join(str(p) for p in partes)
+    texto += "|" + "|".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheDisco:
+    """
+    Cache chave -> valor JSON em disco. A recência (LRU) é o mtime do arquivo,
+    atualizado a cada acerto; o TTL conta a partir da gravação. Gravações são
+    atômicas (arquivo temporário + os.replace), então vários processos podem
+    compartilhar a mesma pasta.
+    """
+
+    def __init__(self, pasta, max_bytes, ttl_segundos):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self.ttl = ttl_segundos
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.json")
+
+    def get(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                entrada = json.load(f)
+            if time.time() - entrada["criado_em"] > self.ttl:
+                os.remove(caminho)
+                raise KeyError(chave)
+            os.utime(caminho)  # marca como usado recentemente
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entrada["valor"]
+
+    def set(self, chave, valor):
+        dados = json.dumps({"criado_em": time.time(), "valor": valor}, ensure_ascii=False)
+        fd, tmp = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(dados)
+            os.replace(tmp, self._caminho(chave))
+        except OSError as e:
+            print(f"[WARN] Falha ao gravar no cache {self.pasta}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._despejar()
+
+    def _entradas(self):
+        entradas = []
+        with os.scandir(self.pasta) as it:
+            for e in it:
+                if e.name.endswith(".json"):
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    entradas.append((st.st_mtime, st.st_size, e.path))
+        return entradas
+
+    def _despejar(self):
+        entradas = self._entradas()
+        total = sum(tam for _, tam, _ in entradas)
+        if total <= self.max_bytes:
+            return
+        # Remove as menos usadas até voltar a 90% do limite
+        for _, tam, caminho in sorted(entradas):
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            total -= tam
+            if total <= self.max_bytes * 0.9:
+                break
+
+    def stats(self):
+        entradas = self._entradas()
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": round(self.hits / consultas, 3) if consultas else None,
+                "entradas": len(entradas),
+                "bytes": sum(tam for _, tam, _ in entradas),
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave (dentro do processo): só a
+    primeira executa a função; as demais esperam e recebem o mesmo resultado
+    (ou a mesma exceção).
+    """
+
+    class _Voo:
+        def __init__(self):
+            self.evento = threading.Event()
+            self.resultado = None
+            self.erro = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_voo = {}
+        self.agrupadas = 0
+
+    def executar(self, chave, funcao):
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = self._Voo()
+            else:
+                self.agrupadas += 1
+
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+
+        try:
+            voo.resultado = funcao()
+            return voo.resultado
+        except Exception as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_voo[chave]
+            voo.evento.set()
+
+    def stats(self):
+        with self._lock:
+            return {"em_voo": len(self._em_voo), "agrupadas": self.agrupadas}
+
+
+# ---------------- INSTÂNCIAS COMPARTILHADAS ----------------
+cache_extracao = CacheDisco(
+    os.path.join(CACHE_DIR, "extracao"),
+    max_bytes=int(float(os.environ.get("CACHE_EXTRACAO_MAX_MB", "200")) * 1024 * 1024),
+    ttl_segundos=float(os.environ.get("CACHE_EXTRACAO_TTL_H", "168")) * 3600,
+)
+
+cache_ia = CacheDisco(
+    os.path.join(CACHE_DIR, "ia"),
+    max_bytes=int(float(os.environ.get("CACHE_IA_MAX_MB", "50")) * 1024 * 1024),
+    ttl_segundos=float(os.environ.get("CACHE_IA_TTL_H", "24")) * 3600,
+)
+voos_ia = SingleFlight()
+_voos_ia_async = {}  # chave -> asyncio.Future da chamada em andamento (event loop do processo)
+
+
+def normalizar_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def _chave_ia(prompt, modelo, temperatura):
+    return montar_chave(normalizar_prompt(prompt), modelo=modelo, temperatura=temperatura)
+
+
+def _cacheavel(temperatura):
+    """Só respostas determinísticas (temperatura 0) vão para o cache."""
+    return not temperatura or temperatura <= 0
+
+
+def _guardavel(resposta, valida):
+    return bool(resposta) and (valida is None or valida(resposta))
+
+
+def consultar_cache_ia(prompt, modelo, temperatura):
+    """Resposta em cache para (prompt normalizado, modelo, temperatura), ou None."""
+    if not _cacheavel(temperatura):
+        return None
+    return cache_ia.get(_chave_ia(prompt, modelo, temperatura))
+
+
+def chamar_ia_com_cache(prompt, modelo, temperatura, chamar, valida=None):
+    """
+    Devolve a resposta em cache para (prompt normalizado, modelo, temperatura)
+    ou executa `chamar()` uma única vez por chave, mesmo com pedidos
+    simultâneos. Só são guardadas respostas não vazias que passam em
+    `valida(resposta)`; com temperatura acima de 0 o cache em disco fica de
+    fora, mas pedidos simultâneos iguais ainda esperam a mesma chamada.
+    """
+    chave = _chave_ia(prompt, modelo, temperatura)
+    cacheavel = _cacheavel(temperatura)
+    resposta = cache_ia.get(chave) if cacheavel else None
+    if resposta is not None:
+        print("[INFO] Resposta da IA obtida do cache.")
+        return resposta
+
+    def _chamar_e_guardar():
+        r = chamar()
+        if cacheavel and _guardavel(r, valida):
+            cache_ia.set(chave, r)
+        return r
+
+    return voos_ia.executar(chave, _chamar_e_guardar)
+
+
+async def chamar_ia_com_cache_async(prompt, modelo, temperatura, chamar, valida=None):
+    """
+    chamar_ia_com_cache com `chamar()` devolvendo uma corrotina; pedidos iguais
+    esperam a mesma. A leitura e a escrita no cache (disco) vão para uma thread,
+    fora do event loop.
+    """
+    chave = _chave_ia(prompt, modelo, temperatura)
+    cacheavel = _cacheavel(temperatura)
+    resposta = await asyncio.to_thread(cache_ia.get, chave) if cacheavel else None
+    if resposta is not None:
+        print("[INFO] Resposta da IA obtida do cache.")
+        return resposta
+
+    while chave in _voos_ia_async:
+        voo = _voos_ia_async[chave]
+        try:
+            # shield: quem desiste de esperar não cancela a chamada dos outros
+            return await asyncio.shield(voo)
+        except asyncio.CancelledError:
+            if not voo.cancelled():
+                raise
+            # Quem chamava foi cancelado (perdeu o hedge): um dos que esperavam assume a chamada
+    voo = _voos_ia_async[chave] = asyncio.get_running_loop().create_future()
+    try:
+        r = await chamar()
+        voo.set_result(r)
+        if cacheavel and _guardavel(r, valida):
+            await asyncio.to_thread(cache_ia.set, chave, r)
+        return r
+    except asyncio.CancelledError:
+        voo.cancel()
+        raise
+    except Exception as e:
+        voo.set_exception(e)
+        voo.exception()  # marcada como lida: sem "exception was never retrieved" se ninguém esperava
+        raise
+    finally:
+        del _voos_ia_async[chave]
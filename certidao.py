@@ -0,0 +1,166 @@
+"""
+Etapas do pipeline de uma certidão que não dependem de como ela chegou:
+configuração do OCR (Tesseract/poppler), parâmetros da extração, texto
+legível, prompt do documento inteiro, regex de reserva e a conclusão
+(relatório no acervo e resposta da rota).
+
+É usado pelo app.py (Flask, com jobs e lotes) e pelo asgi.py (event loop).
+Importar este módulo não sobe threads, pools nem workers de jobs: o asgi.py
+não carrega o app.py, que ao ser importado inicia os workers da fila de jobs
+(e a varredura deles) e ficaria com essas threads no processo antes do fork
+do executor de documentos.
+
+Variáveis de ambiente:
+  TESSERACT_CMD           executável do Tesseract no Linux (padrão: /usr/bin/tesseract)
+  OCR_CONFIANCA_ILEGIVEL  confiança média abaixo da qual uma página de OCR é ilegível (padrão: 30)
+  GROQ_ORCAMENTO_TOKENS   tokens do texto da certidão no prompt (padrão: 2500)
+"""
+
+import os
+import platform
+
+import acervo
+import metricas
+import motor_ocr
+from metricas import medir
+from progresso import emitir
+from provedores import extrair_json
+from registral import extrair_campos
+from selecao import selecionar_texto
+
+# --- DETECÇÃO DE AMBIENTE (Windows vs Linux) ---
+sistema_operacional = platform.system()
+
+if sistema_operacional == "Windows":
+    print(">>> Ambiente detectado: WINDOWS (Local)")
+    motor_ocr.configurar(r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+    # Ajuste abaixo para o caminho real do poppler no seu PC se necessário
+    poppler_dir = r"C:\poppler\Library\bin"
+    if os.path.exists(poppler_dir) and poppler_dir not in os.environ.get('PATH', ''):
+        os.environ['PATH'] += ";" + poppler_dir
+    POPPLER_PATH = poppler_dir
+else:
+    print(">>> Ambiente detectado: LINUX (Servidor)")
+    # padrão Linux; TESSERACT_CMD aponta outro executável (ex.: bench/bench_partida.py)
+    motor_ocr.configurar(os.environ.get('TESSERACT_CMD') or '/usr/bin/tesseract')
+    POPPLER_PATH = None  # No Linux, normalmente não precisa informar o caminho
+
+# ---------------- LEITURA ----------------
+# Página de OCR com confiança média abaixo disto, mesmo refeita a 300 DPI, é tida
+# como ilegível e fica fora do texto que vai para a IA/regex (só geraria ruído).
+# Ela pode ser justamente a do ônus: o relatório sai com DIAGNOSTICO_ILEGIVEL,
+# as páginas em "Páginas Ilegíveis" e o que a regex achar de ônus nelas. Página
+# em que o OCR falhou (metodo "falha_ocr") também conta como ilegível
+OCR_CONFIANCA_ILEGIVEL = float(os.environ.get("OCR_CONFIANCA_ILEGIVEL", "30"))
+DIAGNOSTICO_ILEGIVEL = "Atenção (Páginas Ilegíveis: verificar manualmente)"
+# DPI 300 costuma dar boa qualidade para OCR; '--psm 4' funciona bem para textos
+# com colunas simples; ajuste se necessário (app.py e asgi.py extraem com os mesmos)
+PARAMETROS_EXTRACAO = dict(min_chars=51, dpi=300, lang='por', config='--psm 4')
+# Abaixo disto (caracteres legíveis) a certidão nem vai para a IA
+TEXTO_MINIMO = 20
+
+
+def texto_legivel(paginas):
+    """
+    (texto analisado, números das páginas ilegíveis). Ilegíveis são as de OCR
+    com confiança abaixo de OCR_CONFIANCA_ILEGIVEL, que ficam fora do texto, e
+    as de "falha_ocr" (OCR indisponível ou que quebrou): o pouco texto que elas
+    tinham fica, mas o resto da página ninguém leu.
+    """
+    baixas = [p["pagina"] for p in paginas
+              if p["metodo"] == "ocr" and (p.get("confianca") or 0) < OCR_CONFIANCA_ILEGIVEL]
+    falhas = [p["pagina"] for p in paginas if p["metodo"] == "falha_ocr"]
+    if baixas:
+        print(f"[WARN] Página(s) {baixas} com OCR de confiança abaixo de "
+              f"{OCR_CONFIANCA_ILEGIVEL:g}; fora do texto analisado.")
+    if falhas:
+        print(f"[WARN] Página(s) {falhas} sem OCR (falhou ou indisponível); tidas como ilegíveis.")
+    texto = "\n".join(p["texto"] for p in paginas if p["pagina"] not in baixas).strip()
+    return texto, sorted(baixas + falhas)
+
+
+# ---------------- IA (GROQ / GEMINI) ----------------
+# Tokens do texto da certidão no prompt (o modelo da Groq tem 8192 no total, e a resposta usa até 1200)
+GROQ_ORCAMENTO_TOKENS = int(os.environ.get("GROQ_ORCAMENTO_TOKENS", "2500"))
+
+
+def montar_prompt(texto):
+    """Prompt de extração: só as linhas mais relevantes, dentro do orçamento de tokens."""
+    resumo_texto = selecionar_texto(texto, GROQ_ORCAMENTO_TOKENS)
+    return (
+        "Você é um assistente especializado em matrículas e certidões imobiliárias do Rio de Janeiro. "
+        "Extraia um JSON com as chaves: Cartório, Matrícula, Data da Certidão, Endereço, Proprietários (lista com nome e CPF se houver), Ônus (lista), Diagnóstico. "
+        "Retorne apenas JSON válido. Aqui está o texto:\n\n" + resumo_texto
+    )
+
+
+# ---------------- LÓGICA DE CARTORÁRIO (REGEX) ----------------
+def analisar_inteligencia_registral(texto):
+    print(">>> Iniciando Análise Lógica (Regex)...")
+    emitir("regex", "Usando análise por regras (regex)")
+    with medir("regex"):
+        return extrair_campos(texto)
+
+
+# ---------------- CONCLUSÃO ----------------
+def concluir_certidao(paginas, ilegiveis, texto, dados, resumo_atos, resposta_ia, nome_relatorio, arquivo, sha256):
+    """
+    Depois da IA (`dados` da análise por ato, ou `resposta_ia` do documento
+    inteiro): JSON ou regex de reserva, métricas, relatório no acervo e a
+    resposta da rota. Comum ao pipeline síncrono e ao asgi.py.
+    """
+    if len(texto) < TEXTO_MINIMO:
+        print("[WARN] Texto extraído muito curto ou vazio; retornando análise padrão.")
+        caminho = "vazio"
+        dados = analisar_inteligencia_registral(texto)
+    else:
+        if dados is not None:
+            print(f"[INFO] Dados extraídos via IA por ato ({resumo_atos['novos']} de "
+                  f"{resumo_atos['atos']} ato(s) analisados agora).")
+        elif resposta_ia:
+            # Remove possíveis blocos de código e tenta carregar JSON
+            with medir("json"):
+                dados = extrair_json(resposta_ia)
+            if dados is not None:
+                print("[INFO] Dados extraídos via IA (JSON).")
+            else:
+                print("[WARN] IA retornou mas não é JSON válido.")
+        caminho = "ia" if dados is not None else "regex"
+        if dados is None:
+            dados = analisar_inteligencia_registral(texto)
+    if ilegiveis:
+        dados = marcar_ilegiveis(dados, paginas, ilegiveis)
+    metricas.contar("certidao_resultado_total", caminho=caminho)
+
+    # Salva relatório no acervo (id único; o nome continua servindo para /download)
+    # junto com o texto extraído, que vai para o índice de busca
+    with medir("relatorio"):
+        relatorio_id, nome_relatorio = acervo.salvar(dados, nome=nome_relatorio, arquivo=arquivo,
+                                                     origem=caminho, texto=texto, sha256=sha256)
+    emitir("relatorio", "Relatório gravado", arquivo=nome_relatorio, relatorio_id=relatorio_id)
+
+    return {
+        "relatorio": dados,
+        "relatorio_id": relatorio_id,
+        "arquivo_relatorio": nome_relatorio,
+        "extracao": [{"pagina": p["pagina"], "metodo": p["metodo"], "confianca": p.get("confianca")}
+                     for p in paginas],
+        "paginas_ilegiveis": ilegiveis,
+        "analise_atos": resumo_atos,
+    }
+
+
+def marcar_ilegiveis(dados, paginas, ilegiveis):
+    """
+    Relatório de certidão com páginas ilegíveis: nunca sai "Pode Vender". O
+    diagnóstico vira DIAGNOSTICO_ILEGIVEL e os ônus que a regex achar no
+    texto dessas páginas (mesmo ruim) ficam em "Ônus em Páginas Ilegíveis".
+    """
+    dados = dict(dados)
+    dados["Páginas Ilegíveis"] = ilegiveis
+    texto_ruim = "\n".join(p["texto"] for p in paginas if p["pagina"] in ilegiveis)
+    suspeitos = extrair_campos(texto_ruim)
+    if suspeitos["Diagnóstico"] != "Pode Vender (Livre)":
+        dados["Ônus em Páginas Ilegíveis"] = suspeitos["Ônus Reais"]
+    dados["Diagnóstico"] = DIAGNOSTICO_ILEGIVEL
+    return dados
@@ -0,0 +1,309 @@
+"""
+Cliente HTTP compartilhado para as chamadas às IAs (Groq).
+
+Uma única `requests.Session` por processo (recriada após fork, cada worker do
+gunicorn tem a sua), com pool de conexões keep-alive: as análises seguintes
+reaproveitam a conexão TCP/TLS em vez de abrir uma nova a cada chamada.
+
+Falhas transitórias (erro ou timeout de conexão, 429, 5xx) são repetidas com
+espera exponencial com jitter, respeitando o cabeçalho Retry-After. O timeout
+de leitura não: o POST já chegou e a IA pode estar gerando a resposta, então
+repetir só multiplicaria a espera (3 x 40 s) antes da análise por regras. Um
+disjuntor (circuit breaker) por provedor conta as chamadas que falharam
+mesmo após as repetições: depois de IA_DISJUNTOR_FALHAS seguidas ele abre e
+as próximas chamadas desistem na hora (o pipeline cai direto para a análise
+por regras) até passar IA_DISJUNTOR_ABERTO_S, quando uma chamada de teste
+decide se fecha de novo.
+
+No modo assíncrono (asgi.py) as chamadas vão por um httpx.AsyncClient, um
+por processo, com as mesmas repetições e o mesmo disjuntor: a espera pela IA
+não prende thread nenhuma. O httpx é opcional; sem ele o modo assíncrono
+chama o cliente síncrono numa thread.
+
+Variáveis de ambiente:
+  IA_POOL_MAX             conexões mantidas por host (padrão: 10)
+  IA_TENTATIVAS           tentativas por chamada (padrão: 3)
+  IA_BACKOFF_S            espera base entre tentativas (padrão: 0.5)
+  IA_BACKOFF_MAX_S        espera máxima entre tentativas, inclusive Retry-After (padrão: 10)
+  IA_DISJUNTOR_FALHAS     falhas seguidas que abrem o disjuntor (padrão: 5)
+  IA_DISJUNTOR_ABERTO_S   tempo com o disjuntor aberto antes de testar de novo (padrão: 30)
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # sem modo assíncrono nativo
+    httpx = None
+
+IA_POOL_MAX = int(os.environ.get("IA_POOL_MAX", "10"))
+IA_TENTATIVAS = int(os.environ.get("IA_TENTATIVAS", "3"))
+IA_BACKOFF_S = float(os.environ.get("IA_BACKOFF_S", "0.5"))
+IA_BACKOFF_MAX_S = float(os.environ.get("IA_BACKOFF_MAX_S", "10"))
+IA_DISJUNTOR_FALHAS = int(os.environ.get("IA_DISJUNTOR_FALHAS", "5"))
+IA_DISJUNTOR_ABERTO_S = float(os.environ.get("IA_DISJUNTOR_ABERTO_S", "30"))
+
+STATUS_TRANSITORIOS = frozenset({429, 500, 502, 503, 504})
+
+_sessao = None
+_sessao_pid = None
+_sessao_lock = threading.Lock()
+_cliente_async = None
+_cliente_async_pid = None
+
+
+class IAIndisponivel(Exception):
+    """Chamada não feita (disjuntor aberto) ou que falhou em todas as tentativas."""
+
+
+# ---------------- SESSÃO ----------------
+def sessao():
+    """Session com pool keep-alive, uma por processo."""
+    global _sessao, _sessao_pid
+    with _sessao_lock:
+        if _sessao is None or _sessao_pid != os.getpid():
+            s = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=IA_POOL_MAX)
+            s.mount("https://", adaptador)
+            s.mount("http://", adaptador)
+            _sessao, _sessao_pid = s, os.getpid()
+        return _sessao
+
+
+def abrir_conexao(url, timeout=5):
+    """
+    Abre a conexão com o host de `url` e a deixa no pool da sessão: um HEAD
+    cuja resposta não importa (sem corpo, a conexão volta logo ao pool).
+    """
+    return sessao().head(url, timeout=timeout).status_code
+
+
+def cliente_async():
+    """AsyncClient com pool keep-alive, um por processo (usado só dentro do event loop)."""
+    global _cliente_async, _cliente_async_pid
+    if _cliente_async is None or _cliente_async_pid != os.getpid():
+        _cliente_async = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=IA_POOL_MAX,
+                                                               max_connections=None))
+        _cliente_async_pid = os.getpid()
+    return _cliente_async
+
+
+async def fechar_cliente_async():
+    global _cliente_async
+    if _cliente_async is not None and _cliente_async_pid == os.getpid():
+        await _cliente_async.aclose()
+    _cliente_async = None
+
+
+def stats_pool():
+    """Conexões por host no pool da sessão deste processo."""
+    if _sessao is None or _sessao_pid != os.getpid():
+        return {}
+    hosts = {}
+    for adaptador in set(_sessao.adapters.values()):
+        for chave in list(adaptador.poolmanager.pools.keys()):
+            pool = adaptador.poolmanager.pools.get(chave)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "conexoes_abertas": pool.num_connections,
+                "requisicoes": pool.num_requests,
+                "ociosas": pool.pool.qsize() if pool.pool is not None else 0,
+                "max": IA_POOL_MAX,
+            }
+    return hosts
+
+
+# ---------------- DISJUNTOR ----------------
+class Disjuntor:
+    """
+    Fechado: chamadas passam. Aberto: chamadas são recusadas até `aberto_s`
+    depois da abertura. Meio aberto: deixa passar uma chamada de teste; sucesso
+    fecha, falha abre de novo.
+    """
+
+    def __init__(self, nome, falhas=IA_DISJUNTOR_FALHAS, aberto_s=IA_DISJUNTOR_ABERTO_S):
+        self.nome = nome
+        self.limite_falhas = falhas
+        self.aberto_s = aberto_s
+        self.estado = "fechado"
+        self.falhas_seguidas = 0
+        self.aberto_em = None
+        self.recusadas = 0
+        self.aberturas = 0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self.estado == "aberto" and time.monotonic() - self.aberto_em >= self.aberto_s:
+                self.estado = "meio_aberto"
+            if self.estado == "fechado":
+                return True
+            if self.estado == "meio_aberto" and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            self.recusadas += 1
+            return False
+
+    def sucesso(self):
+        with self._lock:
+            if self.estado != "fechado":
+                print(f"[INFO] Disjuntor {self.nome} fechado (provedor respondeu).")
+            self.estado = "fechado"
+            self.falhas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            self._teste_em_andamento = False
+            if self.estado == "meio_aberto" or self.falhas_seguidas >= self.limite_falhas:
+                if self.estado != "aberto":
+                    print(f"[WARN] Disjuntor {self.nome} aberto após {self.falhas_seguidas} falhas; "
+                          f"chamadas suspensas por {self.aberto_s:.0f}s.")
+                    self.aberturas += 1
+                self.estado = "aberto"
+                self.aberto_em = time.monotonic()
+
+    def liberar_teste(self):
+        """Chamada de teste interrompida sem resposta (cancelada, erro fora da rede): nem sucesso nem falha."""
+        with self._lock:
+            self._teste_em_andamento = False
+
+    def stats(self):
+        with self._lock:
+            estado = {
+                "estado": self.estado,
+                "falhas_seguidas": self.falhas_seguidas,
+                "recusadas": self.recusadas,
+                "aberturas": self.aberturas,
+            }
+            if self.estado == "aberto":
+                estado["reabre_em_s"] = round(max(0.0, self.aberto_s - (time.monotonic() - self.aberto_em)), 1)
+            return estado
+
+
+# ---------------- CHAMADA ----------------
+def _espera_retry_after(resp):
+    """Segundos pedidos pelo Retry-After (número ou data HTTP), ou None."""
+    valor = resp.headers.get("Retry-After") if resp is not None else None
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _espera(tentativa, resp):
+    pedida = _espera_retry_after(resp)
+    if pedida is not None:
+        return pedida
+    # "Full jitter": aleatório entre 0 e o exponencial, evita rajadas sincronizadas
+    return random.uniform(0, min(IA_BACKOFF_MAX_S, IA_BACKOFF_S * 2 ** tentativa))
+
+
+def post_json(url, payload, headers, disjuntor, timeout=40, tentativas=None):
+    """
+    POST com JSON pela sessão compartilhada. Devolve a resposta final (que pode
+    ter status de erro não transitório, ex. 401). Levanta IAIndisponivel se o
+    disjuntor estiver aberto ou se todas as tentativas falharem.
+    """
+    if not disjuntor.permitir():
+        raise IAIndisponivel(f"{disjuntor.nome}: disjuntor aberto")
+
+    tentativas = tentativas or IA_TENTATIVAS
+    motivo = None
+    try:
+        for tentativa in range(tentativas):
+            resp = None
+            try:
+                resp = sessao().post(url, json=payload, headers=headers, timeout=timeout)
+            except requests.ReadTimeout as e:
+                # Provedor travado: a próxima tentativa esperaria o timeout inteiro de novo
+                motivo = f"{type(e).__name__}: {e}"
+                break
+            except requests.RequestException as e:
+                motivo = f"{type(e).__name__}: {e}"
+            else:
+                if resp.status_code not in STATUS_TRANSITORIOS:
+                    disjuntor.sucesso()
+                    return resp
+                motivo = f"status {resp.status_code}"
+
+            if tentativa + 1 >= tentativas:
+                break
+            espera = _espera(tentativa, resp)
+            if espera > IA_BACKOFF_MAX_S:
+                # Provedor pediu para esperar mais do que vale segurar a requisição
+                motivo += f" (Retry-After {espera:.0f}s)"
+                break
+            print(f"[WARN] {disjuntor.nome}: {motivo}; nova tentativa em {espera:.1f}s.")
+            time.sleep(espera)
+    except BaseException:
+        # Exceção que não é de rede (ValueError no payload, KeyboardInterrupt...):
+        # como no post_json_async, solta a chamada de teste do meio aberto sem
+        # contar falha; senão o disjuntor ficaria recusando tudo para sempre.
+        disjuntor.liberar_teste()
+        raise
+
+    disjuntor.falha()
+    raise IAIndisponivel(f"{disjuntor.nome}: {motivo}")
+
+
+async def post_json_async(url, payload, headers, disjuntor, timeout=40, tentativas=None):
+    """post_json no event loop, pelo AsyncClient do processo; `timeout` é o mesmo (conexão, leitura)."""
+    if not disjuntor.permitir():
+        raise IAIndisponivel(f"{disjuntor.nome}: disjuntor aberto")
+
+    conexao, leitura = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    tempo = httpx.Timeout(leitura, connect=conexao)
+    tentativas = tentativas or IA_TENTATIVAS
+    motivo = None
+    try:
+        for tentativa in range(tentativas):
+            resp = None
+            try:
+                resp = await cliente_async().post(url, json=payload, headers=headers, timeout=tempo)
+            except httpx.ReadTimeout as e:
+                # Como no post_json: provedor travado não ganha nova tentativa
+                motivo = f"{type(e).__name__}: {e}"
+                break
+            except httpx.HTTPError as e:
+                motivo = f"{type(e).__name__}: {e}"
+            else:
+                if resp.status_code not in STATUS_TRANSITORIOS:
+                    disjuntor.sucesso()
+                    return resp
+                motivo = f"status {resp.status_code}"
+
+            if tentativa + 1 >= tentativas:
+                break
+            espera = _espera(tentativa, resp)
+            if espera > IA_BACKOFF_MAX_S:
+                motivo += f" (Retry-After {espera:.0f}s)"
+                break
+            print(f"[WARN] {disjuntor.nome}: {motivo}; nova tentativa em {espera:.1f}s.")
+            await asyncio.sleep(espera)
+    except asyncio.CancelledError:
+        # Cancelada (cliente desconectou, outro provedor venceu a disputa): se era a
+        # chamada de teste do meio aberto, solta o teste sem contar falha; senão o
+        # disjuntor ficaria recusando tudo para sempre.
+        disjuntor.liberar_teste()
+        raise
+
+    disjuntor.falha()
+    raise IAIndisponivel(f"{disjuntor.nome}: {motivo}")
@@ -0,0 +1,42 @@
+"""
+Configuração do gunicorn (Dockerfile): gunicorn -c gunicorn.conf.py app:app
+Os dois pipelines num processo só (wsgi.py): gunicorn -c gunicorn.conf.py wsgi:application
+
+O app é carregado no mestre antes do fork (preload) e cada worker é aquecido
+antes de receber tráfego; ver partida.py.
+
+Variáveis de ambiente:
+  PORT              porta (padrão: 10000, a do Render)
+  WEB_CONCURRENCY   workers do gunicorn (padrão: 1)
+  GUNICORN_THREADS  threads por worker (padrão: 8)
+  PARTIDA_PRELOAD   1 carrega o app no mestre (padrão aqui), 0 carrega em cada worker
+"""
+
+import os
+
+os.environ.setdefault("PARTIDA_PRELOAD", "1")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Consultas de jobs e streams de progresso (SSE) não prendem o processo inteiro
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = 120
+preload_app = os.environ["PARTIDA_PRELOAD"].lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    # Mestre, com o app já importado pelo preload e antes do fork dos workers
+    if preload_app:
+        import partida
+        partida.precarregar(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    import partida
+    partida.pos_fork()
+
+
+def post_worker_init(worker):
+    # Depois de carregar o app e antes do loop que aceita conexões
+    import partida
+    partida.aquecer()
@@ -0,0 +1,303 @@
+"""
+Fila de jobs local (SQLite) para rodar o pipeline fora da requisição HTTP.
+
+O POST grava o job e devolve o id na hora; um pool limitado de threads deste
+processo executa o pipeline e grava o resultado, consultado em GET /jobs/<id>.
+A fila fica em disco, então jobs pendentes sobrevivem a um restart do worker;
+jobs que estavam executando voltam para a fila quando o "lease" expira.
+Vários processos (workers do gunicorn) podem compartilhar o mesmo arquivo.
+
+Durante a execução, os eventos de progresso (progresso.emitir) são gravados
+na tabela `eventos` e transmitidos por SSE em GET /jobs/<id>/eventos.
+
+Variáveis de ambiente:
+  JOBS_DB          arquivo SQLite da fila (padrão: jobs.db)
+  JOBS_WORKERS     threads executoras por processo (padrão: 2; 0 desliga)
+  JOBS_LEASE_S     tempo máximo de um job antes de ser reenfileirado (padrão: 900)
+  JOBS_TENTATIVAS  tentativas por job (padrão: 2)
+  JOBS_RETENCAO_H  horas que jobs finalizados ficam guardados (padrão: 48)
+  SSE_MAX_S        duração máxima de uma conexão SSE antes de o cliente reconectar (padrão: 30)
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import closing
+
+import progresso
+
+JOBS_DB = os.environ.get("JOBS_DB", "jobs.db")
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+JOBS_LEASE_S = float(os.environ.get("JOBS_LEASE_S", "900"))
+JOBS_TENTATIVAS = int(os.environ.get("JOBS_TENTATIVAS", "2"))
+JOBS_RETENCAO_H = float(os.environ.get("JOBS_RETENCAO_H", "48"))
+SSE_MAX_S = float(os.environ.get("SSE_MAX_S", "30"))
+
+_handlers = {}
+_leases = {}
+_threads = []
+_threads_pid = None
+_lock = threading.Lock()
+_novo_job = threading.Condition(_lock)
+
+
+class FalhaJob(Exception):
+    """Falha de job com detalhes estruturados (gravados como resultado do job)."""
+
+    def __init__(self, dados):
+        super().__init__(dados.get("error", "falha no job"))
+        self.dados = dados
+
+
+# ---------------- BANCO ----------------
+def _conectar():
+    con = sqlite3.connect(JOBS_DB, timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA busy_timeout=30000")
+    return con
+
+
+def _criar_tabela():
+    with closing(_conectar()) as con:
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                resultado TEXT,
+                erro TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                criado_em REAL NOT NULL,
+                iniciado_em REAL,
+                concluido_em REAL,
+                lease_ate REAL
+            )""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_jobs_fila ON jobs (status, criado_em)")
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS eventos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                etapa TEXT NOT NULL,
+                dados TEXT NOT NULL
+            )""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_eventos_job ON eventos (job_id, id)")
+
+
+_criar_tabela()
+
+
+def _linha_para_dict(linha):
+    job = {
+        "id": linha["id"],
+        "tipo": linha["tipo"],
+        "status": linha["status"],
+        "tentativas": linha["tentativas"],
+        "criado_em": linha["criado_em"],
+        "iniciado_em": linha["iniciado_em"],
+        "concluido_em": linha["concluido_em"],
+    }
+    if linha["resultado"] is not None:
+        job["resultado"] = json.loads(linha["resultado"])
+    if linha["erro"] is not None:
+        job["erro"] = linha["erro"]
+    return job
+
+
+# ---------------- API ----------------
+def registrar(tipo, funcao, lease_s=None):
+    """
+    Registra a função que executa jobs do `tipo` (recebe o payload, devolve dict).
+    `lease_s` substitui JOBS_LEASE_S para tipos que demoram mais (ex.: lotes).
+    """
+    _handlers[tipo] = funcao
+    _leases[tipo] = lease_s or JOBS_LEASE_S
+
+
+def enfileirar(tipo, payload, evento=None):
+    """
+    Grava um job pendente e devolve seu id. `evento` (etapa, dados) opcional
+    é registrado como primeiro evento de progresso, antes de o job poder começar.
+    """
+    job_id = uuid.uuid4().hex
+    agora = time.time()
+    with closing(_conectar()) as con:
+        con.execute("BEGIN")
+        if evento is not None:
+            etapa, dados = evento
+            con.execute(
+                "INSERT INTO eventos (job_id, criado_em, etapa, dados) VALUES (?, ?, ?, ?)",
+                (job_id, agora, etapa, json.dumps(dados, ensure_ascii=False)),
+            )
+        con.execute(
+            "INSERT INTO jobs (id, tipo, payload, status, criado_em) VALUES (?, ?, ?, 'pendente', ?)",
+            (job_id, tipo, json.dumps(payload, ensure_ascii=False), agora),
+        )
+        con.execute("COMMIT")
+    with _novo_job:
+        _novo_job.notify()
+    return job_id
+
+
+def registrar_evento(job_id, etapa, dados):
+    """Grava um evento de progresso do job (lido pelo stream SSE)."""
+    with closing(_conectar()) as con:
+        con.execute(
+            "INSERT INTO eventos (job_id, criado_em, etapa, dados) VALUES (?, ?, ?, ?)",
+            (job_id, time.time(), etapa, json.dumps(dados, ensure_ascii=False)),
+        )
+
+
+def stream_eventos(job_id, ultimo_id=0):
+    """
+    Gerador de mensagens SSE com os eventos do job a partir de `ultimo_id`.
+    Termina com o evento "fim" quando o job finaliza, ou após SSE_MAX_S
+    (o navegador reconecta sozinho enviando Last-Event-ID).
+    """
+    yield "retry: 1000\n\n"
+    limite = time.time() + SSE_MAX_S
+    ultimo_envio = time.time()
+    while True:
+        with closing(_conectar()) as con:
+            linhas = con.execute(
+                "SELECT id, etapa, dados FROM eventos WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, ultimo_id),
+            ).fetchall()
+            status = con.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        for linha in linhas:
+            ultimo_id = linha["id"]
+            ultimo_envio = time.time()
+            yield f"id: {ultimo_id}\nevent: {linha['etapa']}\ndata: {linha['dados']}\n\n"
+        if status is None or status["status"] in ("concluido", "erro"):
+            estado = status["status"] if status else "inexistente"
+            yield f"event: fim\ndata: {json.dumps({'status': estado})}\n\n"
+            return
+        if time.time() > limite:
+            return
+        if time.time() - ultimo_envio > 10:
+            # Comentário SSE: mantém proxies abertos e detecta cliente desconectado
+            ultimo_envio = time.time()
+            yield ": ping\n\n"
+        time.sleep(0.5)
+
+
+def obter(job_id):
+    """Estado do job (com resultado, se concluído) ou None se não existir."""
+    with closing(_conectar()) as con:
+        linha = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _linha_para_dict(linha) if linha else None
+
+
+# ---------------- EXECUÇÃO ----------------
+def _reservar():
+    """Pega atomicamente o job mais antigo pendente (ou com lease vencido) de um tipo registrado."""
+    tipos = list(_handlers)
+    if not tipos:
+        return None
+    agora = time.time()
+    marcadores = ",".join("?" * len(tipos))
+    con = _conectar()
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        linha = con.execute(
+            f"""SELECT * FROM jobs
+                WHERE tipo IN ({marcadores})
+                  AND (status = 'pendente' OR (status = 'executando' AND lease_ate < ?))
+                ORDER BY criado_em LIMIT 1""",
+            (*tipos, agora),
+        ).fetchone()
+        if linha is None:
+            con.execute("COMMIT")
+            return None
+        if linha["tentativas"] >= JOBS_TENTATIVAS:
+            con.execute(
+                "UPDATE jobs SET status = 'erro', erro = ?, concluido_em = ? WHERE id = ?",
+                ("Job abandonado após exceder o número de tentativas.", agora, linha["id"]),
+            )
+            con.execute("COMMIT")
+            return None
+        con.execute(
+            """UPDATE jobs SET status = 'executando', tentativas = tentativas + 1,
+                   iniciado_em = ?, lease_ate = ? WHERE id = ?""",
+            (agora, agora + _leases[linha["tipo"]], linha["id"]),
+        )
+        con.execute("COMMIT")
+        return linha
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+
+
+def _finalizar(job_id, status, resultado=None, erro=None):
+    with closing(_conectar()) as con:
+        con.execute(
+            "UPDATE jobs SET status = ?, resultado = ?, erro = ?, concluido_em = ?, lease_ate = NULL WHERE id = ?",
+            (status, json.dumps(resultado, ensure_ascii=False) if resultado is not None else None,
+             erro, time.time(), job_id),
+        )
+
+
+def _limpar_antigos():
+    limite = time.time() - JOBS_RETENCAO_H * 3600
+    with closing(_conectar()) as con:
+        con.execute("DELETE FROM jobs WHERE status IN ('concluido', 'erro') AND concluido_em < ?", (limite,))
+        con.execute("DELETE FROM eventos WHERE job_id NOT IN (SELECT id FROM jobs)")
+
+
+def _executar(linha):
+    job_id, tipo = linha["id"], linha["tipo"]
+    print(f"[INFO] Job {job_id} ({tipo}) iniciado.")
+    registrar_evento(job_id, "inicio", {"mensagem": "Processamento iniciado"})
+    try:
+        with progresso.acompanhar(lambda etapa, dados: registrar_evento(job_id, etapa, dados)):
+            resultado = _handlers[tipo](json.loads(linha["payload"]))
+    except FalhaJob as e:
+        print(f"[WARN] Job {job_id} falhou: {e}")
+        _finalizar(job_id, "erro", resultado=e.dados, erro=str(e))
+    except Exception as e:
+        print(f"[ERRO] Job {job_id} falhou: {e}")
+        _finalizar(job_id, "erro", erro=str(e))
+    else:
+        _finalizar(job_id, "concluido", resultado=resultado)
+        print(f"[INFO] Job {job_id} concluído.")
+
+
+def _loop_worker():
+    ultima_limpeza = 0.0
+    while True:
+        try:
+            linha = _reservar()
+            if linha is not None:
+                _executar(linha)
+                continue
+            if time.time() - ultima_limpeza > 600:
+                _limpar_antigos()
+                ultima_limpeza = time.time()
+        except Exception as e:
+            print(f"[ERRO] Worker de jobs: {e}")
+        # Acorda ao enfileirar neste processo; o timeout cobre jobs de outros processos
+        with _novo_job:
+            _novo_job.wait(timeout=1.0)
+
+
+def iniciar_workers(n=None):
+    """Sobe (uma vez por processo) as threads que executam os jobs."""
+    global _threads_pid
+    n = JOBS_WORKERS if n is None else n
+    with _lock:
+        # Depois de um fork as threads do pai não existem no filho
+        if _threads and _threads_pid == os.getpid():
+            return
+        _threads.clear()
+        _threads_pid = os.getpid()
+        for i in range(n):
+            t = threading.Thread(target=_loop_worker, name=f"jobs-{i}", daemon=True)
+            t.start()
+            _threads.append(t)
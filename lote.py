@@ -0,0 +1,153 @@
+"""
+Processamento em lote de certidões (vários PDFs ou um ZIP por requisição).
+
+Os arquivos são salvos numa pasta própria do lote em uploads/ e processados
+por um pool limitado de threads; cada resultado é entregue assim que fica
+pronto (fora de ordem). A concorrência real de OCR e de chamadas à IA é
+controlada pelos limites de admissão do processo (admissao.cpu e admissao.ia,
+em admissao.py), então o pool só precisa
+ser grande o bastante para manter as duas etapas ocupadas ao mesmo tempo.
+
+Ao final, um relatório consolidado do lote é gravado ao lado dos relatórios
+individuais de cada arquivo.
+
+Variáveis de ambiente:
+  LOTE_WORKERS       threads que processam arquivos do lote (padrão: 4)
+  LOTE_MAX_ARQUIVOS  máximo de PDFs por lote (padrão: 300)
+  LOTE_MAX_MB        tamanho máximo descompactado de um ZIP em MB (padrão: 1024)
+  LOTE_LEASE_S       tempo máximo de um lote em modo job antes de ser reenfileirado (padrão: 21600)
+"""
+
+import os
+import json
+import uuid
+import zipfile
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from werkzeug.utils import secure_filename
+
+LOTE_WORKERS = int(os.environ.get("LOTE_WORKERS", "4"))
+LOTE_MAX_ARQUIVOS = int(os.environ.get("LOTE_MAX_ARQUIVOS", "300"))
+LOTE_MAX_BYTES = int(float(os.environ.get("LOTE_MAX_MB", "1024")) * 1024 * 1024)
+LOTE_LEASE_S = float(os.environ.get("LOTE_LEASE_S", "21600"))
+
+
+class LoteInvalido(ValueError):
+    """Lote vazio, grande demais ou com ZIP inválido (vira resposta 400)."""
+
+
+def novo_id():
+    return datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+
+
+def _nome_livre(pasta, nome, usados):
+    """Nome seguro e único dentro do lote (dois 'certidao.pdf' de pastas diferentes no ZIP)."""
+    base, ext = os.path.splitext(secure_filename(nome) or "arquivo.pdf")
+    candidato, n = base + ext, 1
+    while candidato in usados:
+        n += 1
+        candidato = f"{base}_{n}{ext}"
+    usados.add(candidato)
+    return os.path.join(pasta, candidato)
+
+
+def _extrair_zip(arquivo, pasta, usados, caminhos):
+    try:
+        zf = zipfile.ZipFile(arquivo)
+    except zipfile.BadZipFile:
+        raise LoteInvalido("ZIP inválido ou corrompido.")
+    with zf:
+        membros = [m for m in zf.infolist()
+                   if not m.is_dir() and m.filename.lower().endswith(".pdf")
+                   and not os.path.basename(m.filename).startswith(".")]
+        if sum(m.file_size for m in membros) > LOTE_MAX_BYTES:
+            raise LoteInvalido("ZIP grande demais depois de descompactado.")
+        for m in membros:
+            if len(caminhos) >= LOTE_MAX_ARQUIVOS:
+                raise LoteInvalido(f"Lote com mais de {LOTE_MAX_ARQUIVOS} arquivos.")
+            # Só o nome do arquivo: ignora as pastas do ZIP (e caminhos como ../)
+            destino = _nome_livre(pasta, os.path.basename(m.filename), usados)
+            with zf.open(m) as origem, open(destino, "wb") as f:
+                for bloco in iter(lambda: origem.read(1024 * 1024), b""):
+                    f.write(bloco)
+            caminhos.append(destino)
+
+
+def salvar_arquivos(arquivos, pasta):
+    """
+    Grava os uploads do lote (FileStorage do Flask) em `pasta`. PDFs são salvos
+    como vieram; ZIPs são expandidos (só os .pdf). Devolve a lista de caminhos.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    caminhos, usados = [], set()
+    for arquivo in arquivos:
+        nome = arquivo.filename or ""
+        if nome.lower().endswith(".zip"):
+            _extrair_zip(arquivo.stream, pasta, usados, caminhos)
+        elif nome.lower().endswith(".pdf"):
+            if len(caminhos) >= LOTE_MAX_ARQUIVOS:
+                raise LoteInvalido(f"Lote com mais de {LOTE_MAX_ARQUIVOS} arquivos.")
+            destino = _nome_livre(pasta, nome, usados)
+            arquivo.save(destino)
+            caminhos.append(destino)
+        else:
+            print(f"[WARN] Arquivo ignorado no lote (não é PDF/ZIP): {nome}")
+    if not caminhos:
+        raise LoteInvalido("Nenhum PDF encontrado no lote.")
+    return caminhos
+
+
+def processar(caminhos, funcao, workers=None):
+    """
+    Executa `funcao(indice, caminho)` para cada arquivo num pool de threads e
+    gera um item por arquivo na ordem em que terminam:
+    {"indice", "arquivo", "resultado"} ou {"indice", "arquivo", "error"}.
+    """
+    workers = min(workers or LOTE_WORKERS, len(caminhos))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lote") as pool:
+        futuros = {pool.submit(funcao, i, c): (i, c) for i, c in enumerate(caminhos)}
+        for futuro in as_completed(futuros):
+            i, caminho = futuros[futuro]
+            item = {"indice": i, "arquivo": os.path.basename(caminho)}
+            try:
+                item["resultado"] = futuro.result()
+            except Exception as e:
+                print(f"[ERRO] Lote: falha em {caminho}: {e}")
+                item["error"] = str(e)
+            yield item
+
+
+def consolidar(lote_id, itens, pasta_relatorios):
+    """Grava e devolve o relatório consolidado do lote (itens na ordem de envio)."""
+    itens = sorted(itens, key=lambda item: item["indice"])
+    resumo = []
+    for item in itens:
+        linha = {"arquivo": item["arquivo"]}
+        if "error" in item:
+            linha["error"] = item["error"]
+        else:
+            relatorio = item["resultado"]["relatorio"]
+            linha.update({
+                "arquivo_relatorio": item["resultado"]["arquivo_relatorio"],
+                "Matrícula": relatorio.get("Matrícula"),
+                "Cartório": relatorio.get("Cartório"),
+                "Diagnóstico": relatorio.get("Diagnóstico"),
+                "Ônus Reais": relatorio.get("Ônus Reais", relatorio.get("Ônus")),
+            })
+        resumo.append(linha)
+
+    consolidado = {
+        "lote": lote_id,
+        "gerado_em": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        "total": len(itens),
+        "com_erro": sum(1 for linha in resumo if "error" in linha),
+        "diagnosticos": dict(Counter(linha.get("Diagnóstico") for linha in resumo if "error" not in linha)),
+        "arquivos": resumo,
+    }
+    nome = f"lote_{lote_id}.json"
+    with open(os.path.join(pasta_relatorios, nome), "w", encoding="utf-8") as f:
+        json.dump(consolidado, f, indent=2, ensure_ascii=False)
+    consolidado["arquivo_relatorio"] = nome
+    return consolidado
@@ -0,0 +1,137 @@
+"""
+Métricas do pipeline: tempo de cada etapa, caminho que produziu o resultado
+e exportação no formato de texto do Prometheus (rota /metrics).
+
+As etapas marcam o tempo com `medir("etapa")` (ou `observar` quando o tempo
+já foi medido, como o OCR feito no worker) e cada observação vai para um
+histograma por etapa: upload, camada_texto, rasterizacao, ocr_pagina, ia,
+json, regex, relatorio e total (no asgi.py a extração roda em outro processo
+e aparece inteira, como extracao). `contar` soma contadores com rótulos, como
+certidao_resultado_total{caminho="ia"|"regex"|"vazio"} (no app_gemini_new,
+"erro" quando a IA falha, já que lá não há regex).
+
+Dentro de `rastrear(...)` (uma certidão processada) as etapas também ficam
+anotadas no contexto atual e, com METRICAS_JSONL, viram uma linha JSON por
+certidão com a duração de cada etapa. O custo por observação é uma busca
+binária e uma soma sob um lock, então pode ficar ligado em produção.
+
+Os valores são do processo: com vários workers do gunicorn, cada um expõe os
+seus (o Prometheus soma pelas instâncias).
+
+Variáveis de ambiente:
+  METRICAS_JSONL  arquivo para as linhas JSON por certidão (padrão: desligado)
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+METRICAS_JSONL = os.environ.get("METRICAS_JSONL") or None
+
+# Limites (s) dos buckets: de páginas de texto (ms) a OCR de documentos grandes (min)
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_lock = threading.Lock()
+_histogramas = {}  # etapa -> [contagens por bucket (+Inf no fim), soma, total]
+_contadores = {}   # (nome, rótulos ordenados) -> valor
+_rastro = ContextVar("metricas_rastro", default=None)
+
+
+def observar(etapa, segundos):
+    """Registra `segundos` no histograma da etapa (e no rastro da certidão atual)."""
+    i = bisect.bisect_left(LIMITES, segundos)
+    with _lock:
+        h = _histogramas.get(etapa)
+        if h is None:
+            h = _histogramas[etapa] = [[0] * (len(LIMITES) + 1), 0.0, 0]
+        h[0][i] += 1
+        h[1] += segundos
+        h[2] += 1
+    rastro = _rastro.get()
+    if rastro is not None:
+        rastro["etapas"].append((etapa, round(segundos, 4)))
+
+
+@contextmanager
+def medir(etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(etapa, time.perf_counter() - inicio)
+
+
+def contar(nome, valor=1, **rotulos):
+    chave = (nome, tuple(sorted(rotulos.items())))
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+    rastro = _rastro.get()
+    if rastro is not None and nome == "certidao_resultado_total":
+        rastro.update(rotulos)
+
+
+@contextmanager
+def rastrear(**campos):
+    """
+    Acompanha uma certidão: mede o tempo total (etapa "total") e, com
+    METRICAS_JSONL, grava uma linha com as etapas observadas neste contexto.
+    """
+    rastro = dict(campos, etapas=[])
+    token = _rastro.set(rastro)
+    inicio = time.perf_counter()
+    try:
+        yield rastro
+    finally:
+        _rastro.reset(token)
+        total = time.perf_counter() - inicio
+        observar("total", total)
+        if METRICAS_JSONL:
+            _gravar_linha(dict(rastro, ts=time.strftime("%Y-%m-%dT%H:%M:%S"), total_s=round(total, 4),
+                               pid=os.getpid()))
+
+
+def _gravar_linha(rastro):
+    try:
+        linha = json.dumps(rastro, ensure_ascii=False, default=str) + "\n"
+        with _lock, open(METRICAS_JSONL, "a", encoding="utf-8") as f:
+            f.write(linha)
+    except OSError as e:
+        print(f"[WARN] Falha ao gravar métricas em {METRICAS_JSONL}: {e}")
+
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    def escapar(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+def exportar():
+    """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)."""
+    with _lock:
+        histogramas = {e: (list(h[0]), h[1], h[2]) for e, h in _histogramas.items()}
+        contadores = dict(_contadores)
+
+    linhas = ["# HELP certidao_etapa_segundos Duração de cada etapa do pipeline.",
+              "# TYPE certidao_etapa_segundos histogram"]
+    for etapa in sorted(histogramas):
+        contagens, soma, total = histogramas[etapa]
+        acumulado = 0
+        for limite, n in zip(LIMITES + ("+Inf",), contagens):
+            acumulado += n
+            linhas.append(f'certidao_etapa_segundos_bucket{{etapa="{etapa}",le="{limite}"}} {acumulado}')
+        linhas.append(f'certidao_etapa_segundos_sum{{etapa="{etapa}"}} {soma:.6f}')
+        linhas.append(f'certidao_etapa_segundos_count{{etapa="{etapa}"}} {total}')
+
+    nomes = sorted({nome for nome, _ in contadores})
+    for nome in nomes:
+        linhas.append(f"# TYPE {nome} counter")
+        for (n, pares), valor in sorted(contadores.items()):
+            if n == nome:
+                linhas.append(f"{nome}{_rotulos(pares)} {valor}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,175 @@
+"""
+Motor de OCR usado pelos workers de ocr.py: recebe a imagem de uma página
+(caminho ou imagem PIL) e devolve (texto, confiança média).
+
+Com o tesserocr instalado, cada processo (e cada thread, já que a API do
+Tesseract não é thread-safe) mantém um TessBaseAPI aberto por idioma: o
+traineddata do "por" é carregado uma vez e as páginas passam em memória, sem
+processo novo, PNG temporário e arquivo de saída por página como no
+pytesseract. O pytesseract continua como alternativa: sem o tesserocr, com
+OCR_MOTOR=pytesseract, com opções de config que o tesserocr não entende ou se
+a API não abrir (ex.: traineddata ausente). O pytesseract só é importado
+quando usado (configurar() guarda o caminho do executável até lá).
+
+Variáveis de ambiente:
+  OCR_MOTOR  "auto" (padrão: tesserocr se instalado), "tesserocr" ou "pytesseract"
+"""
+
+import os
+import shlex
+import threading
+
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # só o pytesseract
+    tesserocr = None
+
+OCR_MOTOR = os.environ.get("OCR_MOTOR", "auto").lower()
+
+# Caminho do executável do tesseract (app.py); None usa o do PATH
+TESSERACT_CMD = None
+
+_pytesseract_modulo = None
+_local = threading.local()
+_tesserocr_falhou = False
+
+
+def configurar(tesseract_cmd):
+    """Caminho do executável do tesseract, usado pelo pytesseract e para achar o tessdata."""
+    global TESSERACT_CMD
+    TESSERACT_CMD = tesseract_cmd
+    if _pytesseract_modulo is not None:
+        _pytesseract_modulo.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _pytesseract():
+    """O módulo pytesseract, importado no primeiro uso (com o tesserocr ele nem é carregado)."""
+    global _pytesseract_modulo
+    if _pytesseract_modulo is None:
+        import pytesseract
+        if TESSERACT_CMD:
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        _pytesseract_modulo = pytesseract
+    return _pytesseract_modulo
+
+
+def nome():
+    """Motor que será usado neste processo."""
+    if OCR_MOTOR != "pytesseract" and tesserocr is not None and not _tesserocr_falhou:
+        return "tesserocr"
+    return "pytesseract"
+
+
+def texto_e_confianca(dados):
+    """
+    Remonta o texto das palavras do image_to_data (linhas na ordem, linha em
+    branco entre parágrafos, como no image_to_string) e calcula a confiança
+    média ponderada pelo tamanho das palavras; None se não houver palavras.
+    """
+    linhas, pesos, soma = [], 0, 0.0
+    anterior = None
+    for i, palavra in enumerate(dados["text"]):
+        palavra = (palavra or "").strip()
+        conf = float(dados["conf"][i])
+        if not palavra or conf < 0:
+            continue
+        bloco, par, linha = dados["block_num"][i], dados["par_num"][i], dados["line_num"][i]
+        if (bloco, par, linha) != anterior:
+            if anterior is not None and anterior[:2] != (bloco, par):
+                linhas.append("")
+            linhas.append(palavra)
+            anterior = (bloco, par, linha)
+        else:
+            linhas[-1] += " " + palavra
+        pesos += len(palavra)
+        soma += conf * len(palavra)
+    texto = "\n".join(linhas) + "\n" if linhas else ""
+    return texto, (round(soma / pesos, 1) if pesos else None)
+
+
+def _media(confiancas):
+    pesos = sum(len(p) for p, _ in confiancas)
+    return round(sum(len(p) * c for p, c in confiancas) / pesos, 1) if pesos else None
+
+
+# ---------------- TESSEROCR ----------------
+def _opcoes(config):
+    """
+    Traduz a config do pytesseract ("--psm 4 -c var=valor") para (psm,
+    {variável: valor}); None se tiver opção sem equivalente no tesserocr.
+    """
+    psm, variaveis = None, {}
+    partes = shlex.split(config or "")
+    i = 0
+    while i < len(partes):
+        if partes[i] == "--psm" and i + 1 < len(partes):
+            psm = int(partes[i + 1])
+        elif partes[i] == "-c" and i + 1 < len(partes) and "=" in partes[i + 1]:
+            chave, valor = partes[i + 1].split("=", 1)
+            variaveis[chave] = valor
+        else:
+            return None
+        i += 2
+    return psm, variaveis
+
+
+def _pasta_tessdata():
+    # No Windows o tessdata fica ao lado do tesseract.exe configurado em app.py
+    if not TESSERACT_CMD:
+        return None
+    pasta = os.path.join(os.path.dirname(TESSERACT_CMD), "tessdata")
+    return pasta if os.path.isdir(pasta) else None
+
+
+def _api(lang):
+    """TessBaseAPI desta thread para o idioma, criada (e o modelo carregado) no primeiro uso."""
+    apis = getattr(_local, "apis", None)
+    if apis is None:
+        apis = _local.apis = {}
+    api = apis.get(lang)
+    if api is None:
+        pasta = _pasta_tessdata()
+        api = tesserocr.PyTessBaseAPI(path=pasta, lang=lang) if pasta else tesserocr.PyTessBaseAPI(lang=lang)
+        apis[lang] = api
+        print(f"[INFO] Motor tesserocr ({lang}) carregado no processo {os.getpid()}.")
+    return api
+
+
+def _tesserocr(imagem, lang, psm, variaveis):
+    api = _api(lang)
+    if isinstance(imagem, str):
+        with Image.open(imagem) as original:
+            imagem = original.convert("L")
+    elif imagem.mode == "1":
+        imagem = imagem.convert("L")
+    api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+    for chave, valor in variaveis.items():
+        api.SetVariable(chave, valor)
+    try:
+        api.SetImage(imagem)
+        texto = api.GetUTF8Text()
+        return texto, _media(api.MapWordConfidences())
+    finally:
+        api.Clear()
+
+
+# ---------------- ENTRADA ----------------
+def reconhecer(imagem, lang="por", config=""):
+    """(texto, confiança média 0-100 ou None) de uma página."""
+    global _tesserocr_falhou
+    if nome() == "tesserocr":
+        opcoes = _opcoes(config)
+        if opcoes is not None:
+            try:
+                return _tesserocr(imagem, lang, *opcoes)
+            except RuntimeError as e:
+                # Não abriu (traineddata/tessdata); o processo segue no pytesseract
+                print(f"[WARN] tesserocr indisponível ({e}); usando pytesseract.")
+                _tesserocr_falhou = True
+    # Passando o caminho, o próprio tesseract lê a imagem (sem carregar no Python)
+    pytesseract = _pytesseract()
+    dados = pytesseract.image_to_data(imagem, lang=lang, config=config,
+                                      output_type=pytesseract.Output.DICT)
+    return texto_e_confianca(dados)
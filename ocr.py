@@ -0,0 +1,367 @@
+"""
+Motor de extração/OCR compartilhado por app.py e app_gemini_new.py.
+
+A extração é decidida página a página: páginas com camada de texto são lidas
+pelo pdfplumber e só as páginas de imagem vão para o OCR. O PDF é rasterizado aos poucos (uma janela de páginas por vez, em pasta
+temporária) e cada página é entregue a um pool de processos com workers do
+Tesseract, que reconhecem as páginas em paralelo. O texto volta na ordem
+original das páginas e cada imagem é apagada logo após o OCR, então o pico
+de memória/disco depende do tamanho da janela e não do número de páginas.
+No worker, antes do Tesseract, a página passa pelo pré-processamento de
+preprocessamento.py (redução, binarização, alinhamento, margens apagadas).
+
+O OCR é feito em duas passadas. A primeira rasteriza a OCR_DPI_RAPIDO e lê
+com image_to_data, que traz a confiança de cada palavra; só as páginas com
+confiança média abaixo de OCR_CONFIANCA_MIN são rasterizadas de novo no DPI
+pedido (300 em app.py) e relidas, ficando a leitura mais confiável. Páginas
+datilografadas limpas passam na primeira; as apagadas ganham a resolução (na
+releitura o pré-processamento não reduz a página). Cada página de OCR leva a
+"confianca" (0-100) e o "dpi" efetivo da leitura que ficou: o da
+rasterização, descontada a redução do pré-processamento.
+
+O reconhecimento em si fica em motor_ocr.py: um Tesseract residente por
+worker (tesserocr), com o pytesseract como alternativa. pdfplumber e
+pdf2image são importados só quando há PDF para ler (partida.py).
+
+No modo assíncrono (asgi.py) a certidão inteira (pdfplumber, rasterização e
+OCR) roda num processo de `executor_documentos`, um pool de tamanho fixo
+(núcleos) separado do event loop; dentro dele o OCR é em série, sem pool
+aninhado, e o cache de extração em disco é o mesmo dos outros processos.
+
+Variáveis de ambiente:
+  OCR_WORKERS        número de workers (padrão: núcleos da máquina; 1 desliga o pool)
+  OCR_JANELA         páginas rasterizadas/pendentes por vez (padrão: max(2, OCR_WORKERS))
+  OCR_DPI_RAPIDO     DPI da primeira passada (padrão: 200; 0 faz uma passada só, no DPI pedido)
+  OCR_CONFIANCA_MIN  confiança média abaixo da qual a página é refeita (padrão: 70)
+"""
+
+import os
+import time
+import atexit
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageDraw
+
+from cache import cache_extracao, hash_arquivo, montar_chave
+from metricas import contar, medir, observar
+import motor_ocr
+import preprocessamento
+from progresso import emitir
+
+# --- CONFIGURAÇÃO ---
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "0") or 0) or (os.cpu_count() or 1)
+OCR_JANELA = int(os.environ.get("OCR_JANELA", "0") or 0) or max(2, OCR_WORKERS)
+OCR_DPI_RAPIDO = int(os.environ.get("OCR_DPI_RAPIDO", "200") or 0)
+OCR_CONFIANCA_MIN = float(os.environ.get("OCR_CONFIANCA_MIN", "70"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# ---------------- WORKER ----------------
+def _inicializar_worker(tesseract_cmd):
+    # Em spawn (Windows) o processo filho não herda a configuração feita em app.py
+    motor_ocr.configurar(tesseract_cmd)
+
+
+def _ocr_arquivo(caminho_imagem, lang, config, reduzir=True):
+    """
+    (texto, confiança média, escala) de uma página; escala é a fração da
+    resolução da imagem que chegou ao Tesseract (< 1 se o pré-processamento
+    reduziu a página; `reduzir=False` não deixa).
+    """
+    imagem = caminho_imagem
+    escala = 1.0
+    if preprocessamento.ativo():
+        try:
+            imagem = preprocessamento.preprocessar(caminho_imagem, None if reduzir else 0)
+            with Image.open(caminho_imagem) as original:
+                escala = imagem.width / original.width
+        except Exception as e:
+            print(f"[WARN] Pré-processamento falhou ({e}); OCR na imagem original.")
+    return (*motor_ocr.reconhecer(imagem, lang=lang, config=config), escala)
+
+
+def _ocr_cronometrado(caminho_imagem, lang, config, reduzir):
+    # O tempo é medido no worker: no processo principal só se veria a espera na fila
+    inicio = time.perf_counter()
+    texto, confianca, escala = _ocr_arquivo(caminho_imagem, lang, config, reduzir)
+    return texto, confianca, escala, time.perf_counter() - inicio
+
+
+# ---------------- POOL ----------------
+def obter_pool():
+    """Cria (uma única vez por processo) o pool de workers de OCR."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            print(f"[INFO] Iniciando pool de OCR com {OCR_WORKERS} workers.")
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                initializer=_inicializar_worker,
+                initargs=(motor_ocr.TESSERACT_CMD,),
+            )
+        return _pool
+
+
+def encerrar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(encerrar_pool)
+
+
+def _inicializar_documentos(tesseract_cmd):
+    # Um documento por processo, cada um com o OCR em série: o paralelismo é o do executor
+    global OCR_WORKERS
+    OCR_WORKERS = 1
+    _inicializar_worker(tesseract_cmd)
+
+
+def executor_documentos(processos=None):
+    """
+    Pool de processos que rodam `extrair_paginas` de uma certidão inteira
+    (asgi.py); `processos` padrão: OCR_WORKERS. Quem cria encerra (shutdown).
+    """
+    processos = processos or OCR_WORKERS
+    print(f"[INFO] Iniciando executor de documentos com {processos} processos.")
+    return ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_documentos,
+                               initargs=(motor_ocr.TESSERACT_CMD,))
+
+
+def _submeter(caminho_imagem, lang, config, reduzir):
+    if OCR_WORKERS <= 1:
+        return None
+    try:
+        return obter_pool().submit(_ocr_cronometrado, caminho_imagem, lang, config, reduzir)
+    except BrokenProcessPool:
+        encerrar_pool()
+        return None
+
+
+def _coletar(caminho_imagem, futuro, lang, config, reduzir):
+    try:
+        if futuro is not None:
+            try:
+                texto, confianca, escala, segundos = futuro.result()
+                observar("ocr_pagina", segundos)
+                return texto, confianca, escala
+            except BrokenProcessPool as e:
+                # Um worker morreu (ex.: OOM); o pool é recriado na próxima submissão
+                print(f"[WARN] Pool de OCR quebrado ({e}); refazendo a página em série.")
+                encerrar_pool()
+        with medir("ocr_pagina"):
+            return _ocr_arquivo(caminho_imagem, lang, config, reduzir)
+    finally:
+        try:
+            os.remove(caminho_imagem)
+        except OSError:
+            pass
+
+
+# ---------------- AQUECIMENTO ----------------
+def aquecer(lang="por"):
+    """
+    OCR de uma imagem mínima (uma linha desenhada pelo PIL) em cada worker do
+    pool, ou neste processo sem pool, antes da primeira certidão: sobe os
+    processos do pool, carrega o modelo (tesserocr) ou deixa o executável e o
+    traineddata no cache do sistema (pytesseract). Fora das métricas de OCR.
+    Devolve os segundos gastos.
+    """
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="ocr_aquecer_") as pasta:
+        caminhos = []
+        for i in range(OCR_WORKERS if OCR_WORKERS > 1 else 1):
+            caminho = os.path.join(pasta, f"a{i}.png")
+            imagem = Image.new("L", (480, 64), 255)
+            ImageDraw.Draw(imagem).text((12, 24), "MATRICULA 127.148 - R.1", fill=0)
+            imagem.save(caminho)
+            caminhos.append(caminho)
+        if OCR_WORKERS > 1:
+            # Submetidas juntas, cada uma tende a subir (e aquecer) um processo do pool
+            for futuro in [obter_pool().submit(_ocr_arquivo, c, lang, "") for c in caminhos]:
+                futuro.result()
+        else:
+            _ocr_arquivo(caminhos[0], lang, "")
+    return time.perf_counter() - inicio
+
+
+# ---------------- RASTERIZAÇÃO ----------------
+def contar_paginas(caminho_pdf, poppler_path=None):
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(caminho_pdf, poppler_path=poppler_path)["Pages"])
+
+
+def _blocos(paginas, janela):
+    # Agrupa números de página consecutivos em blocos de até `janela` páginas
+    bloco = []
+    for n in paginas:
+        if bloco and (n != bloco[-1] + 1 or len(bloco) >= janela):
+            yield bloco[0], bloco[-1]
+            bloco = []
+        bloco.append(n)
+    if bloco:
+        yield bloco[0], bloco[-1]
+
+
+def rasterizar_paginas(caminho_pdf, pasta, paginas=None, dpi=300, janela=None, poppler_path=None):
+    """
+    Gerador que renderiza o PDF em blocos de `janela` páginas dentro de `pasta`
+    e produz (número da página, caminho da imagem). `paginas` limita a
+    renderização a alguns números de página (padrão: todas). O bloco seguinte
+    só é renderizado quando o consumidor pede mais páginas; apagar as imagens
+    já consumidas fica a cargo de quem chama.
+    """
+    from pdf2image import convert_from_path
+
+    janela = janela or OCR_JANELA
+    if paginas is None:
+        paginas = range(1, contar_paginas(caminho_pdf, poppler_path) + 1)
+    for inicio, fim in _blocos(sorted(paginas), janela):
+        with medir("rasterizacao"):
+            caminhos = convert_from_path(
+                caminho_pdf, dpi=dpi, first_page=inicio, last_page=fim,
+                output_folder=pasta, output_file=f"p{inicio:05d}",
+                paths_only=True, grayscale=True, poppler_path=poppler_path,
+            )
+        yield from zip(range(inicio, fim + 1), caminhos)
+
+
+def reconhecer_paginas(caminho_pdf, paginas=None, dpi=300, lang="por", config="", poppler_path=None,
+                       reduzir=True):
+    """
+    Gera (número da página, texto, confiança, DPI efetivo) na ordem das
+    páginas, numa passada só, rasterizando no `dpi` dado (o efetivo é menor se
+    o pré-processamento reduzir a página; `reduzir=False` não deixa). No
+    máximo OCR_JANELA páginas ficam rasterizadas aguardando OCR ao mesmo tempo.
+    """
+    def _resultado(numero, caminho, futuro):
+        texto, confianca, escala = _coletar(caminho, futuro, lang, config, reduzir)
+        return numero, texto, confianca, round(dpi * escala)
+
+    with tempfile.TemporaryDirectory(prefix="ocr_") as pasta:
+        pendentes = deque()
+        paginas_raster = rasterizar_paginas(caminho_pdf, pasta, paginas=paginas, dpi=dpi,
+                                            poppler_path=poppler_path)
+        for numero, caminho in paginas_raster:
+            pendentes.append((numero, caminho, _submeter(caminho, lang, config, reduzir)))
+            if len(pendentes) >= OCR_JANELA:
+                yield _resultado(*pendentes.popleft())
+        while pendentes:
+            yield _resultado(*pendentes.popleft())
+
+
+def ocr_paginas_pdf(caminho_pdf, paginas=None, dpi=300, lang="por", config="", poppler_path=None):
+    """Gera (número da página, texto) na ordem das páginas, numa passada no `dpi` dado."""
+    for numero, texto, _, _ in reconhecer_paginas(caminho_pdf, paginas, dpi, lang, config, poppler_path):
+        yield numero, texto
+
+
+# ---------------- EXTRAÇÃO HÍBRIDA ----------------
+def extrair_paginas(caminho_pdf, min_chars=50, dpi=300, lang="por", config="", poppler_path=None,
+                    sha256=None):
+    """
+    Extrai o texto página a página. Usa a camada de texto (pdfplumber) das
+    páginas com pelo menos `min_chars` caracteres e rasteriza + faz OCR só das
+    demais, em duas passadas (OCR_DPI_RAPIDO e depois `dpi` nas páginas de
+    baixa confiança). Retorna uma lista de {"pagina", "metodo", "texto"} em
+    ordem, com metodo "texto", "ocr" ou "falha_ocr" (OCR indisponível/falhou;
+    fica o pouco texto que a página tinha); as páginas de OCR trazem também
+    "confianca" e "dpi" (efetivo, ver reconhecer_paginas).
+
+    O resultado fica no cache de extração, endereçado pelo SHA-256 do PDF
+    (calculado aqui se `sha256` não vier) + parâmetros de extração.
+    """
+    chave = montar_chave(sha256 or hash_arquivo(caminho_pdf),
+                         min_chars=min_chars, dpi=dpi, lang=lang, config=config,
+                         pre=preprocessamento.ativo(), pre_max_px=preprocessamento.OCR_PRE_MAX_PX,
+                         dpi_rapido=OCR_DPI_RAPIDO, confianca_min=OCR_CONFIANCA_MIN, releitura="sem_reducao")
+    paginas = cache_extracao.get(chave)
+    if paginas is not None:
+        print("[INFO] Texto extraído do cache (mesmo PDF já processado).")
+        emitir("texto_cache", "Texto recuperado do cache (documento já processado)")
+        return paginas
+
+    paginas, completo = _extrair_paginas(caminho_pdf, min_chars, dpi, lang, config, poppler_path)
+    # OCR que quebrou no meio não vai para o cache: o documento ficaria truncado para sempre
+    if completo and paginas and not any(p["metodo"] == "falha_ocr" for p in paginas):
+        cache_extracao.set(chave, paginas)
+    return paginas
+
+
+def _extrair_paginas(caminho_pdf, min_chars, dpi, lang, config, poppler_path):
+    """(páginas, completo): `completo` é False se o OCR levantou exceção no meio."""
+    resultado = {}
+    try:
+        import pdfplumber
+        with medir("camada_texto"), pdfplumber.open(caminho_pdf) as pdf:
+            for n, p in enumerate(pdf.pages, start=1):
+                t = (p.extract_text() or "").strip()
+                metodo = "texto" if len(t) >= min_chars else "ocr"
+                resultado[n] = {"pagina": n, "metodo": metodo, "texto": t}
+    except Exception as e:
+        print(f"[WARN] pdfplumber falhou: {e}")
+
+    # Sem leitura do pdfplumber, todas as páginas vão para o OCR
+    sem_texto = [n for n, r in resultado.items() if r["metodo"] == "ocr"] if resultado else None
+    emitir("camada_texto", f"Camada de texto verificada: {len(resultado)} página(s), "
+                           f"{len(sem_texto) if sem_texto is not None else 'todas'} sem texto",
+           paginas=len(resultado), sem_texto=len(sem_texto) if sem_texto is not None else None)
+    if sem_texto == []:
+        print("[INFO] Texto extraído via pdfplumber em todas as páginas (sem OCR).")
+        return [resultado[n] for n in sorted(resultado)], True
+    if sem_texto is None:
+        # Todas as páginas ficam esperando o OCR: as que ele não terminar saem "falha_ocr"
+        try:
+            for n in range(1, contar_paginas(caminho_pdf, poppler_path) + 1):
+                resultado[n] = {"pagina": n, "metodo": "ocr", "texto": ""}
+        except Exception as e:
+            print(f"[WARN] Número de páginas indisponível (pdfinfo): {e}")
+
+    # Primeira passada em DPI menor; 0 (ou um valor >= dpi) deixa uma passada só
+    dpi_rapido = OCR_DPI_RAPIDO if 0 < OCR_DPI_RAPIDO < dpi else dpi
+    completo = True
+    try:
+        qtd = "todas as" if sem_texto is None else f"{len(sem_texto)}"
+        print(f"[INFO] Usando OCR ({motor_ocr.nome()}) em {qtd} página(s) sem texto — isso pode demorar...")
+        total = len(sem_texto) if sem_texto is not None else (len(resultado) or None)
+        paginas_ocr = reconhecer_paginas(caminho_pdf, paginas=sem_texto, dpi=dpi_rapido, lang=lang,
+                                         config=config, poppler_path=poppler_path)
+        for feitas, (n, txt, conf, dpi_efetivo) in enumerate(paginas_ocr, start=1):
+            resultado[n] = {"pagina": n, "metodo": "ocr", "texto": txt, "confianca": conf,
+                            "dpi": dpi_efetivo, "ok": True}
+            emitir("ocr_pagina", f"OCR: {feitas} de {total or '?'} página(s) (página {n})",
+                   pagina=n, feitas=feitas, total=total, confianca=conf)
+
+        baixas = [n for n, r in sorted(resultado.items())
+                  if r.get("ok") and (r["confianca"] or 0) < OCR_CONFIANCA_MIN] if dpi_rapido < dpi else []
+        if baixas:
+            print(f"[INFO] {len(baixas)} página(s) com confiança abaixo de {OCR_CONFIANCA_MIN:g}; "
+                  f"refazendo o OCR a {dpi} DPI.")
+            emitir("ocr_refazer", f"Refazendo {len(baixas)} página(s) de baixa confiança a {dpi} DPI",
+                   paginas=baixas)
+            contar("ocr_paginas_refeitas_total", len(baixas))
+            # Sem a redução do pré-processamento: senão a página voltaria ao tamanho da primeira passada
+            for n, txt, conf, dpi_efetivo in reconhecer_paginas(caminho_pdf, paginas=baixas, dpi=dpi,
+                                                                lang=lang, config=config,
+                                                                poppler_path=poppler_path, reduzir=False):
+                r = resultado[n]
+                # Fica a leitura mais confiável (a de DPI alto, no empate)
+                if conf is not None and (r["confianca"] is None or conf >= r["confianca"]):
+                    r.update(texto=txt, confianca=conf, dpi=dpi_efetivo)
+    except Exception as e:
+        print(f"[ERRO] Falha no OCR: {e}")
+        completo = False
+    for r in resultado.values():
+        if r["metodo"] == "ocr" and not r.pop("ok", False):
+            r["metodo"] = "falha_ocr"
+
+    return [resultado[n] for n in sorted(resultado)], completo
@@ -0,0 +1,162 @@
+"""
+Partida dos processos do app: o que carregar antes do fork dos workers do
+gunicorn e como aquecer cada worker antes de ele receber tráfego.
+
+  - O que é pesado e raro fica para o primeiro uso: pdfplumber/pdf2image
+    (ocr.py), pytesseract (motor_ocr.py) e o google.genai (provedores.py).
+    `import app` cai de ~0,9 s para ~0,3 s; `python partida.py perfil`
+    mostra o -X importtime do app, do mais caro para o mais barato.
+  - Com o preload (gunicorn.conf.py), o processo mestre importa o app, os
+    módulos acima e compila os templates uma vez (`precarregar`); os workers
+    herdam tudo pelo fork, em páginas compartilhadas (gc.freeze() evita que o
+    coletor de lixo as suje e force a cópia). Threads, pools e conexões não
+    sobrevivem ao fork, então o que os cria é registrado com `no_processo` e
+    só roda depois do fork, em cada worker (`pos_fork`).
+  - Cada worker, antes de aceitar a primeira requisição, faz um OCR mínimo
+    (sobe o pool de OCR e carrega o modelo) e abre a conexão com as IAs
+    (`aquecer`). O tempo até a primeira resposta está em bench/bench_partida.py.
+
+Variáveis de ambiente:
+  PARTIDA_PRELOAD   1 quando o app é carregado no mestre antes do fork (o gunicorn.conf.py liga;
+                    fora do gunicorn deixe 0, o padrão, senão as threads de jobs não sobem)
+  PARTIDA_AQUECER   1 aquece cada worker antes do tráfego (padrão), 0 desliga
+"""
+
+import gc
+import os
+import sys
+import time
+import tempfile
+import importlib
+import subprocess
+
+from metricas import observar
+
+PARTIDA_PRELOAD = os.environ.get("PARTIDA_PRELOAD", "0").lower() in ("1", "true", "yes")
+PARTIDA_AQUECER = os.environ.get("PARTIDA_AQUECER", "1").lower() in ("1", "true", "yes")
+
+# Importados no mestre com o preload; fora dele, no primeiro uso
+MODULOS_PESADOS = ("pdfplumber", "pdf2image", "pytesseract", "numpy")
+
+_pendentes = []  # funções adiadas para depois do fork (no_processo)
+
+
+def no_processo(funcao):
+    """
+    Roda `funcao` (que sobe threads, pools...) no processo que vai atender:
+    agora, ou, com o preload, em cada worker logo depois do fork.
+    """
+    if PARTIDA_PRELOAD:
+        _pendentes.append(funcao)
+    else:
+        funcao()
+
+
+def pos_fork():
+    """Chamado no worker recém-criado (post_fork do gunicorn)."""
+    for funcao in _pendentes:
+        funcao()
+
+
+# ---------------- MESTRE ----------------
+def _importar(nome):
+    inicio = time.perf_counter()
+    try:
+        importlib.import_module(nome)
+    except ImportError as e:
+        print(f"[WARN] Pré-carga de {nome} falhou: {e}")
+        return None
+    return time.perf_counter() - inicio
+
+
+def precarregar(aplicacao=None):
+    """
+    No mestre, antes do fork: importa os módulos de uso adiado e compila os
+    templates de `aplicacao` (Flask, ou os apps montados em wsgi.py), sem
+    criar threads, pools ou conexões.
+    Devolve {item: segundos}.
+    """
+    import provedores
+
+    inicio = time.perf_counter()
+    tempos = {nome: _importar(nome) for nome in MODULOS_PESADOS}
+    if provedores.gemini_disponivel():
+        # Só o módulo: o client (e as conexões dele) é criado em cada worker
+        tempos["google.genai"] = _importar("google.genai")
+
+    # wsgi.py: os apps montados no DispatcherMiddleware
+    aplicacoes = [aplicacao] + list(getattr(aplicacao, "mounts", {}).values())
+    t = time.perf_counter()
+    for app in aplicacoes:
+        jinja = getattr(app, "jinja_env", None)
+        if jinja is not None and jinja.loader is not None:
+            for nome in jinja.list_templates():
+                jinja.get_template(nome)
+    tempos["templates"] = time.perf_counter() - t
+
+    gc.collect()
+    gc.freeze()
+    tempos = {k: round(v, 3) for k, v in tempos.items() if v is not None}
+    print(f"[INFO] Pré-carga no mestre em {time.perf_counter() - inicio:.2f} s: {tempos}")
+    return tempos
+
+
+# ---------------- WORKER ----------------
+def aquecer():
+    """
+    No worker, antes do tráfego: OCR mínimo em cada processo do pool de OCR e
+    conexão aberta com cada provedor de IA. Devolve {item: segundos}; falhas
+    vão para o log e o worker atende mesmo assim (como sem aquecimento).
+    """
+    if not PARTIDA_AQUECER:
+        return {}
+    import ocr
+    import provedores
+
+    inicio = time.perf_counter()
+    tempos = {}
+    try:
+        tempos["ocr"] = round(ocr.aquecer(), 3)
+    except Exception as e:
+        print(f"[WARN] Aquecimento do OCR falhou: {e}")
+    tempos.update({f"ia_{nome}": s for nome, s in provedores.aquecer().items()})
+    total = time.perf_counter() - inicio
+    observar("aquecimento", total)
+    print(f"[INFO] Worker {os.getpid()} aquecido em {total:.2f} s: {tempos}")
+    return tempos
+
+
+# ---------------- PERFIL ----------------
+def perfil(modulo="app", limite=20):
+    """
+    Importa `modulo` num processo novo com -X importtime e devolve
+    (segundos de parede, [(cumulativo_s, próprio_s, módulo)] do mais caro).
+    """
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.environ.get("PYTHONPATH")])))
+    # Numa pasta descartável: o import do app cria uploads/, relatorios/ e os bancos na pasta atual
+    with tempfile.TemporaryDirectory(prefix="partida_perfil_") as pasta:
+        r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                           capture_output=True, text=True, cwd=pasta, env=env)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else "falhou")
+    linhas = []
+    for linha in r.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        linhas.append((int(cumulativo) / 1e6, int(proprio) / 1e6, nome.rstrip()))
+    linhas.sort(reverse=True)
+    return float(r.stdout.strip().splitlines()[-1]), linhas[:limite]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "perfil":
+        sys.exit("Uso: python partida.py perfil [módulo] [linhas]")
+    total, linhas = perfil(sys.argv[2] if len(sys.argv) > 2 else "app",
+                           int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    print(f"{'cumulativo ms':>14}{'próprio ms':>12}  módulo")
+    for cumulativo, proprio, nome in linhas:
+        print(f"{cumulativo * 1000:>14.1f}{proprio * 1000:>12.1f}  {nome}")
+    print(f"\nimport total: {total:.3f} s")
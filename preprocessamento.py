@@ -0,0 +1,144 @@
+"""
+Pré-processamento das páginas rasterizadas antes do OCR, com operações
+vetorizadas do numpy sobre a página inteira:
+
+  1. reduz páginas grandes (lado maior até OCR_PRE_MAX_PX; uma A4 a 300 DPI
+     vai de 3508 para 2600 px, ~220 DPI, ainda folgado para texto de 9 pt).
+     A releitura em DPI alto das páginas fracas (ocr.py) pede max_px=0: ela
+     existe justamente para dar mais resolução ao Tesseract
+  2. binariza pelo limiar de Otsu (histograma de 256 níveis)
+  3. corrige a inclinação: o ângulo que deixa o perfil de projeção das linhas
+     mais "afiado", testado de -3° a 3° sobre os pixels de tinta
+  4. apaga as margens laterais fora do bloco de texto: o carimbo girado
+     "Valide aqui" e os selos que viravam as ~100 linhas de lixo do começo de
+     debug_ocr.txt ("(ep)", "[eb]", "Ko)"...)
+
+A página sai em 1 bit, sem as regiões que o Tesseract gastava tempo tentando
+ler e sem o ruído que depois ia para o prompt da IA. Roda dentro do worker de
+OCR (ocr.py), então é paralelizado junto com o OCR.
+
+O numpy é opcional: sem ele o pré-processamento fica desligado e o OCR
+recebe a página como veio do pdf2image. Ele só é importado na primeira
+página, no worker de OCR (o processo web não precisa dele).
+
+Variáveis de ambiente:
+  OCR_PREPROCESSAR  1 liga (padrão, se o numpy estiver instalado), 0 desliga
+  OCR_PRE_MAX_PX    lado maior da página depois da redução (padrão: 2600; 0 não reduz)
+"""
+
+import os
+import importlib.util
+
+from PIL import Image
+
+NUMPY_INSTALADO = importlib.util.find_spec("numpy") is not None  # sem ele, pré-processamento desligado
+np = None
+
+OCR_PREPROCESSAR = os.environ.get("OCR_PREPROCESSAR", "1").lower() in ("1", "true", "yes")
+OCR_PRE_MAX_PX = int(os.environ.get("OCR_PRE_MAX_PX", "2600"))
+
+INCLINACAO_MAX = 3.0    # graus testados para cada lado
+INCLINACAO_PASSO = 0.2
+MARGEM_FAIXA = 0.15     # só se apaga tinta nesta fração da largura, de cada lado
+MARGEM_VAO = 0.02       # vão branco (fração da largura) que separa o carimbo do texto
+
+
+def ativo():
+    return NUMPY_INSTALADO and OCR_PREPROCESSAR
+
+
+def _carregar_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+def limiar_otsu(cinza):
+    """Nível de cinza que melhor separa tinta e fundo (maior variância entre as classes)."""
+    hist = np.bincount(cinza.ravel(), minlength=256).astype(np.float64)
+    niveis = np.arange(256, dtype=np.float64)
+    peso_fundo = np.cumsum(hist)
+    peso_frente = peso_fundo[-1] - peso_fundo
+    soma = np.cumsum(hist * niveis)
+    media_fundo = soma / np.maximum(peso_fundo, 1)
+    media_frente = (soma[-1] - soma) / np.maximum(peso_frente, 1)
+    return int(np.argmax(peso_fundo * peso_frente * (media_fundo - media_frente) ** 2))
+
+
+def angulo_inclinacao(tinta):
+    """
+    Inclinação das linhas de texto em graus (positivo: descem para a direita).
+    Para cada ângulo, projeta os pixels de tinta (amostrados 1 a cada 2) nas
+    linhas inclinadas; no ângulo certo as linhas de texto caem em poucas faixas
+    e a soma dos quadrados do perfil é máxima.
+    """
+    ys, xs = np.nonzero(tinta[::2, ::2])
+    if ys.size < 500:
+        return 0.0
+    angulos = np.arange(-INCLINACAO_MAX, INCLINACAO_MAX + INCLINACAO_PASSO / 2, INCLINACAO_PASSO)
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+    pontuacoes = []
+    for tangente in np.tan(np.radians(angulos)):
+        faixas = np.rint(ys - xs * tangente).astype(np.int64)
+        perfil = np.bincount(faixas - faixas.min()).astype(np.float64)
+        pontuacoes.append(np.dot(perfil, perfil))
+    return round(float(angulos[int(np.argmax(pontuacoes))]), 2)
+
+
+def bloco_de_texto(tinta):
+    """
+    (x0, x1) das colunas a manter: grupos de colunas com tinta separados por
+    vãos brancos; os grupos estreitos encostados nas bordas (dentro de
+    MARGEM_FAIXA) são carimbos/selos de margem e ficam de fora.
+    """
+    altura, largura = tinta.shape
+    colunas = tinta.sum(axis=0)
+    idx = np.flatnonzero(colunas > max(2, altura * 0.002))
+    if idx.size == 0:
+        return 0, largura
+    quebras = np.flatnonzero(np.diff(idx) > max(8, int(largura * MARGEM_VAO)))
+    inicios = np.r_[idx[0], idx[quebras + 1]]
+    fins = np.r_[idx[quebras], idx[-1]] + 1
+    faixa = largura * MARGEM_FAIXA
+    primeiro, ultimo = 0, len(inicios) - 1
+    # Da borda para dentro, enquanto o grupo estiver todo na faixa da margem
+    while primeiro < ultimo and fins[primeiro] <= faixa:
+        primeiro += 1
+    while ultimo > primeiro and inicios[ultimo] >= largura - faixa:
+        ultimo -= 1
+    return int(inicios[primeiro]), int(fins[ultimo])
+
+
+def preprocessar(caminho_imagem, max_px=None):
+    """
+    Imagem (PIL, 1 bit) pronta para o OCR: reduzida (lado maior até `max_px`,
+    padrão OCR_PRE_MAX_PX; 0 não reduz), binarizada, alinhada e sem margens.
+    O tamanho só muda na redução.
+    """
+    _carregar_numpy()
+    max_px = OCR_PRE_MAX_PX if max_px is None else max_px
+    with Image.open(caminho_imagem) as original:
+        img = original.convert("L")
+    if max_px and max(img.size) > max_px:
+        fator = max_px / max(img.size)
+        img = img.resize((round(img.width * fator), round(img.height * fator)), Image.BILINEAR,
+                         reducing_gap=2.0)
+
+    cinza = np.asarray(img)
+    limiar = limiar_otsu(cinza)
+    tinta = cinza <= limiar
+    angulo = angulo_inclinacao(tinta)
+    if abs(angulo) >= INCLINACAO_PASSO:
+        # rotate() gira no sentido anti-horário: desfaz linhas que descem para a direita
+        img = img.rotate(angulo, resample=Image.BILINEAR, fillcolor=255)
+        tinta = np.asarray(img) <= limiar
+
+    x0, x1 = bloco_de_texto(tinta)
+    # Margem de segurança de 1% para não cortar letras da borda do bloco
+    folga = int(tinta.shape[1] * 0.01)
+    tinta[:, :max(0, x0 - folga)] = False
+    tinta[:, x1 + folga:] = False
+    # Array booleano vira imagem de 1 bit (True = branco)
+    return Image.fromarray(~tinta)
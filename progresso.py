@@ -0,0 +1,34 @@
+"""
+Ganchos de progresso do pipeline (arquivo salvo, camada de texto, OCR por
+página, IA, regex, relatório).
+
+As etapas chamam `emitir(...)` nos mesmos pontos em que já imprimem os logs
+[INFO]. Só há custo quando existe um destino no contexto atual (o executor de
+jobs instala um que grava os eventos para o SSE); fora disso `emitir` volta
+na primeira linha.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_destino = ContextVar("progresso_destino", default=None)
+
+
+def emitir(etapa, mensagem, **dados):
+    destino = _destino.get()
+    if destino is None:
+        return
+    try:
+        destino(etapa, dict(dados, mensagem=mensagem))
+    except Exception as e:
+        print(f"[WARN] Falha ao registrar progresso ({etapa}): {e}")
+
+
+@contextmanager
+def acompanhar(destino):
+    """Direciona os eventos emitidos neste contexto para `destino(etapa, dados)`."""
+    token = _destino.set(destino)
+    try:
+        yield
+    finally:
+        _destino.reset(token)
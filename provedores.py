@@ -0,0 +1,628 @@
+"""
+Camada de provedores de IA (Groq e Google GenAI) usada pelos dois apps.
+
+Cada provedor é uma função prompt -> texto. A chamada ao modelo pode ser feita
+em três modos (IA_MODO):
+
+  unico     só o primeiro provedor da ordem
+  failover  um de cada vez, na ordem; passa ao próximo quando o atual falha
+            ou devolve algo que não é JSON válido
+  hedge     dispara o primeiro; se ele não responder dentro do atraso de
+            hedge (p95 da latência recente dele), dispara também o próximo,
+            e fica com a primeira resposta que for JSON válido. Falha rápida
+            antecipa o próximo, como no failover.
+
+A latência de cada provedor vai para um histograma por faixas, que dá o p95
+usado como atraso de hedge. A chamada perdedora não tem como ser interrompida
+no meio do HTTP: ela termina em segundo plano e só a resposta é descartada
+(fica no cache de IA, se for JSON válido, então ainda serve para a próxima vez).
+
+`chamar_async` é o mesmo, no event loop (asgi.py): a Groq vai pelo
+httpx.AsyncClient e provedores sem versão assíncrona (Gemini) e o cache de
+IA em disco rodam numa thread. Aqui a perdedora do hedge é cancelada de verdade (a conexão é
+fechada), já que não há thread presa nela.
+
+Variáveis de ambiente:
+  IA_PROVEDORES          ordem padrão dos provedores (padrão: groq,gemini)
+  IA_MODO                unico | failover | hedge (padrão: hedge)
+  IA_HEDGE_PADRAO_S      atraso de hedge enquanto há poucas amostras (padrão: 8)
+  IA_HEDGE_MIN_S         menor atraso de hedge (padrão: 0.5)
+  IA_HEDGE_MAX_S         maior atraso de hedge (padrão: 30)
+  IA_HEDGE_AMOSTRAS      amostras mínimas para usar o p95 (padrão: 20)
+  GROQ_API_KEY, GROQ_URL, GROQ_TIMEOUT_S   configuração da Groq
+  GOOGLE_API_KEY (ou GEMINI_API_KEY), GEMINI_MODEL   configuração do Google GenAI
+
+O google.genai (~0,6 s de import, mais da metade da partida do app) só é
+carregado na primeira chamada ao Gemini ou no aquecimento do worker (aquecer).
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from cache import chamar_ia_com_cache, chamar_ia_com_cache_async, consultar_cache_ia
+from cliente_ia import Disjuntor, IAIndisponivel, abrir_conexao, httpx, post_json, post_json_async
+from progresso import emitir
+
+IA_PROVEDORES = [p.strip() for p in os.environ.get("IA_PROVEDORES", "groq,gemini").split(",") if p.strip()]
+IA_MODO = os.environ.get("IA_MODO", "hedge")
+IA_HEDGE_PADRAO_S = float(os.environ.get("IA_HEDGE_PADRAO_S", "8"))
+IA_HEDGE_MIN_S = float(os.environ.get("IA_HEDGE_MIN_S", "0.5"))
+IA_HEDGE_MAX_S = float(os.environ.get("IA_HEDGE_MAX_S", "30"))
+IA_HEDGE_AMOSTRAS = int(os.environ.get("IA_HEDGE_AMOSTRAS", "20"))
+
+
+# ---------------- HISTOGRAMA ----------------
+class HistogramaLatencia:
+    """
+    Contagem de latências por faixas fixas (segundos). Quando o total passa de
+    `janela`, as contagens são divididas por 2, de modo que o percentil
+    acompanha o comportamento recente do provedor.
+    """
+
+    LIMITES = (0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, float("inf"))
+
+    def __init__(self, janela=500):
+        self.janela = janela
+        self.contagens = [0] * len(self.LIMITES)
+        self.total = 0
+        self.soma = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos):
+        with self._lock:
+            for i, limite in enumerate(self.LIMITES):
+                if segundos <= limite:
+                    self.contagens[i] += 1
+                    break
+            self.total += 1
+            self.soma += segundos
+            if self.total > self.janela:
+                self.contagens = [c // 2 for c in self.contagens]
+                self.soma *= sum(self.contagens) / self.total
+                self.total = sum(self.contagens)
+
+    def percentil(self, p):
+        """Limite superior da faixa que contém o percentil `p` (0-100), ou None."""
+        with self._lock:
+            if not self.total:
+                return None
+            alvo = self.total * p / 100
+            acumulado = 0
+            for limite, c in zip(self.LIMITES, self.contagens):
+                acumulado += c
+                if acumulado >= alvo:
+                    return limite
+            return self.LIMITES[-1]
+
+    def stats(self):
+        with self._lock:
+            faixas = {("+inf" if lim == float("inf") else str(lim)): c
+                      for lim, c in zip(self.LIMITES, self.contagens) if c}
+            total = self.total
+            media = self.soma / total if total else None
+        return {"amostras": total, "media_s": round(media, 3) if media is not None else None,
+                "p50_s": self.percentil(50), "p95_s": self.percentil(95), "faixas": faixas}
+
+
+# ---------------- PROVEDOR ----------------
+class Provedor:
+    def __init__(self, nome, chamar, modelo, temperatura, chamar_async=None):
+        self.nome = nome
+        self._chamar = chamar
+        self._chamar_async = chamar_async
+        self.modelo = modelo
+        self.temperatura = temperatura
+        self.latencia = HistogramaLatencia()
+        self.chamadas = 0
+        self.falhas = 0
+        self.vitorias = 0
+        self.hedges = 0  # vezes que outro provedor foi disparado porque este demorou
+        self._lock = threading.Lock()
+
+    def atraso_hedge(self):
+        p95 = self.latencia.percentil(95) if self.latencia.total >= IA_HEDGE_AMOSTRAS else None
+        atraso = IA_HEDGE_PADRAO_S if p95 is None or p95 == float("inf") else p95
+        return min(IA_HEDGE_MAX_S, max(IA_HEDGE_MIN_S, atraso))
+
+    def chamar(self, prompt):
+        """Resposta do provedor (cache + single-flight); None se falhar."""
+        self.contar("chamadas")
+        try:
+            resposta = chamar_ia_com_cache(prompt, self.modelo, self.temperatura, lambda: self._medido(prompt),
+                                           valida=_valida)
+        except Exception as e:
+            print(f"[WARN] Provedor {self.nome} falhou: {e}")
+            resposta = None
+        if not resposta:
+            self.contar("falhas")
+        return resposta
+
+    def _medido(self, prompt):
+        """
+        Chamada de rede ao provedor, medindo a latência. Acerto de cache e quem
+        esperou o voo de outra chamada não passam aqui: um quase zero no
+        histograma puxaria o p95 (e o atraso do hedge) para baixo.
+        """
+        inicio = time.monotonic()
+        resposta = self._chamar(prompt)
+        if resposta:
+            self.latencia.registrar(time.monotonic() - inicio)
+        return resposta
+
+    async def chamar_async(self, prompt):
+        """`chamar` no event loop (na versão assíncrona do provedor, ou numa thread)."""
+        if self._chamar_async is None:
+            return await asyncio.to_thread(self.chamar, prompt)
+        self.contar("chamadas")
+        try:
+            resposta = await chamar_ia_com_cache_async(prompt, self.modelo, self.temperatura,
+                                                       lambda: self._medido_async(prompt), valida=_valida)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WARN] Provedor {self.nome} falhou: {e}")
+            resposta = None
+        if not resposta:
+            self.contar("falhas")
+        return resposta
+
+    async def _medido_async(self, prompt):
+        inicio = time.monotonic()
+        resposta = await self._chamar_async(prompt)
+        if resposta:
+            self.latencia.registrar(time.monotonic() - inicio)
+        return resposta
+
+    def contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def stats(self):
+        with self._lock:
+            contadores = {"chamadas": self.chamadas, "falhas": self.falhas,
+                          "vitorias": self.vitorias, "hedges": self.hedges}
+        return dict(contadores, atraso_hedge_s=self.atraso_hedge(), latencia=self.latencia.stats())
+
+
+_provedores = {}
+# Chamadas perdedoras continuam rodando aqui até terminar
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("IA_HEDGE_THREADS", "16")),
+                               thread_name_prefix="ia")
+
+
+def registrar_provedor(nome, chamar, modelo, temperatura, chamar_async=None):
+    """
+    Registra (ou substitui) um provedor: `chamar(prompt)` devolve o texto ou
+    None; `chamar_async(prompt)`, se houver, é a versão corrotina.
+    """
+    _provedores[nome] = Provedor(nome, chamar, modelo, temperatura, chamar_async)
+
+
+def disponiveis(ordem=None):
+    return [_provedores[n] for n in (ordem or IA_PROVEDORES) if n in _provedores]
+
+
+def extrair_json(texto):
+    """Objeto JSON da resposta (tolerando cercas ```json), ou None se não for JSON válido."""
+    if not texto:
+        return None
+    limpo = texto.strip().replace('```json', '').replace('```', '').strip()
+    try:
+        return json.loads(limpo)
+    except ValueError:
+        return None
+
+
+def _valida(resposta):
+    return isinstance(extrair_json(resposta), (dict, list))
+
+
+def chamar(prompt, ordem=None, modo=None, valida=_valida):
+    """
+    Consulta os provedores conforme o modo (ver docstring do módulo) e devolve
+    (nome do provedor, resposta) da primeira resposta válida, ou (None, None).
+    """
+    lista = disponiveis(ordem)
+    if not lista:
+        return None, None
+    modo = modo or IA_MODO
+
+    nome, resposta = _do_cache(lista, prompt, valida)
+    if nome:
+        return nome, resposta
+
+    if modo == "unico":
+        lista = lista[:1]
+    if modo != "hedge" or len(lista) == 1:
+        for p in lista:
+            resposta = p.chamar(prompt)
+            if resposta and valida(resposta):
+                p.contar("vitorias")
+                return p.nome, resposta
+            print(f"[WARN] {p.nome} sem resposta válida; tentando o próximo provedor.")
+        return None, None
+    return _disputar(lista, prompt, valida)
+
+
+def _do_cache(lista, prompt, valida):
+    """Resposta válida já em cache em qualquer provedor (não precisa disputar), ou (None, None)."""
+    for p in lista:
+        resposta = consultar_cache_ia(prompt, p.modelo, p.temperatura)
+        if resposta and valida(resposta):
+            print(f"[INFO] Resposta da IA ({p.nome}) obtida do cache.")
+            return p.nome, resposta
+    return None, None
+
+
+def _disputar(lista, prompt, valida):
+    pendentes = {}
+    proximo = 0
+    prazo = None
+
+    def _disparar():
+        nonlocal proximo, prazo
+        p = lista[proximo]
+        proximo += 1
+        pendentes[_executor.submit(p.chamar, prompt)] = p
+        prazo = time.monotonic() + p.atraso_hedge()
+
+    _disparar()
+    while pendentes:
+        espera = max(0.0, prazo - time.monotonic()) if proximo < len(lista) else None
+        feitos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+        if not feitos:
+            atrasado = lista[proximo - 1]
+            atrasado.contar("hedges")
+            print(f"[INFO] {atrasado.nome} sem resposta em {atrasado.atraso_hedge():.1f}s; "
+                  f"consultando também {lista[proximo].nome}.")
+            emitir("ia_hedge", f"IA demorando; consultando também {lista[proximo].nome}")
+            _disparar()
+            continue
+        for futuro in feitos:
+            p = pendentes.pop(futuro)
+            resposta = futuro.result()
+            if resposta and valida(resposta):
+                for outro in pendentes:
+                    outro.cancel()  # só tem efeito se ainda não começou
+                p.contar("vitorias")
+                return p.nome, resposta
+            print(f"[WARN] {p.nome} sem resposta válida.")
+        if not pendentes and proximo < len(lista):
+            _disparar()
+    return None, None
+
+
+async def chamar_async(prompt, ordem=None, modo=None, valida=_valida):
+    """`chamar` no event loop: (nome do provedor, resposta) ou (None, None)."""
+    lista = disponiveis(ordem)
+    if not lista:
+        return None, None
+    modo = modo or IA_MODO
+
+    nome, resposta = await asyncio.to_thread(_do_cache, lista, prompt, valida)
+    if nome:
+        return nome, resposta
+
+    if modo == "unico":
+        lista = lista[:1]
+    if modo != "hedge" or len(lista) == 1:
+        for p in lista:
+            resposta = await p.chamar_async(prompt)
+            if resposta and valida(resposta):
+                p.contar("vitorias")
+                return p.nome, resposta
+            print(f"[WARN] {p.nome} sem resposta válida; tentando o próximo provedor.")
+        return None, None
+    return await _disputar_async(lista, prompt, valida)
+
+
+async def _disputar_async(lista, prompt, valida):
+    pendentes = {}
+    proximo = 0
+    prazo = None
+
+    def _disparar():
+        nonlocal proximo, prazo
+        p = lista[proximo]
+        proximo += 1
+        pendentes[asyncio.ensure_future(p.chamar_async(prompt))] = p
+        prazo = time.monotonic() + p.atraso_hedge()
+
+    _disparar()
+    try:
+        while pendentes:
+            espera = max(0.0, prazo - time.monotonic()) if proximo < len(lista) else None
+            feitos, _ = await asyncio.wait(pendentes, timeout=espera, return_when=asyncio.FIRST_COMPLETED)
+            if not feitos:
+                atrasado = lista[proximo - 1]
+                atrasado.contar("hedges")
+                print(f"[INFO] {atrasado.nome} sem resposta em {atrasado.atraso_hedge():.1f}s; "
+                      f"consultando também {lista[proximo].nome}.")
+                _disparar()
+                continue
+            for tarefa in feitos:
+                p = pendentes.pop(tarefa)
+                resposta = tarefa.result()
+                if resposta and valida(resposta):
+                    p.contar("vitorias")
+                    return p.nome, resposta
+                print(f"[WARN] {p.nome} sem resposta válida.")
+            if not pendentes and proximo < len(lista):
+                _disparar()
+        return None, None
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+
+
+def stats():
+    return {"modo": IA_MODO, "ordem": IA_PROVEDORES,
+            "provedores": {nome: p.stats() for nome, p in _provedores.items()}}
+
+
+# ---------------- GROQ ----------------
+# É fortemente recomendado setar GROQ_API_KEY como variável de ambiente no Render:
+# Ex.: GROQ_API_KEY = 'gsk_...'
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "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")
+# Endpoint compatível OpenAI (fornecido anteriormente); se necessário ajuste ao endpoint real da sua conta Groq.
+# GROQ_URL pode apontar para um servidor falso local (bench/fake_llm.py) em testes.
+GROQ_URL = os.environ.get("GROQ_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama3-70b-8192"  # se esse modelo não existir na sua conta, ajuste conforme disponível
+GROQ_TEMPERATURE = 0.0  # determinístico: permite reaproveitar respostas do cache
+GROQ_TIMEOUT = (5, float(os.environ.get("GROQ_TIMEOUT_S", "40")))  # (conexão, leitura)
+disjuntor_groq = Disjuntor("groq")
+
+
+def _pedido_groq(prompt):
+    """(payload, headers) do POST na Groq."""
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 1200,
+        "temperature": GROQ_TEMPERATURE
+    }
+    return payload, headers
+
+
+def _conteudo_groq(resp):
+    """Conteúdo da resposta da Groq (texto), ou None."""
+    if resp.status_code != 200:
+        print(f"[WARN] Groq retornou status {resp.status_code}: {resp.text}")
+        return None
+
+    j = resp.json()
+    # Tenta navegar por formatos diferentes (compatível com OpenAI-like)
+    text_resp = None
+    if isinstance(j, dict):
+        # OpenAI-like
+        try:
+            text_resp = j['choices'][0]['message']['content']
+        except Exception:
+            # Algumas APIs retornam em 'choices'[0]['text']
+            try:
+                text_resp = j['choices'][0].get('text')
+            except Exception:
+                text_resp = None
+
+    if not text_resp:
+        print("[WARN] Resposta da IA não contém conteúdo esperado.")
+        return None
+
+    # Retorna a string — quem chama deve tentar json.loads
+    return text_resp.strip()
+
+
+def chamar_groq(prompt):
+    """
+    Faz o POST na Groq (sessão keep-alive, com repetições e disjuntor) e
+    devolve o conteúdo da resposta, ou None para o pipeline usar a regex.
+    """
+    try:
+        payload, headers = _pedido_groq(prompt)
+        resp = post_json(GROQ_URL, payload, headers, disjuntor_groq, timeout=GROQ_TIMEOUT)
+        return _conteudo_groq(resp)
+
+    except IAIndisponivel as e:
+        print(f"[WARN] Groq indisponível: {e}")
+        return None
+    except Exception as e:
+        print(f"[ERRO] Falha ao chamar API Groq: {e}")
+        return None
+
+
+async def chamar_groq_async(prompt):
+    """chamar_groq pelo AsyncClient (asgi.py): a espera não ocupa thread."""
+    try:
+        payload, headers = _pedido_groq(prompt)
+        resp = await post_json_async(GROQ_URL, payload, headers, disjuntor_groq, timeout=GROQ_TIMEOUT)
+        return _conteudo_groq(resp)
+
+    except IAIndisponivel as e:
+        print(f"[WARN] Groq indisponível: {e}")
+        return None
+    except Exception as e:
+        print(f"[ERRO] Falha ao chamar API Groq: {e}")
+        return None
+
+
+# ---------------- GOOGLE GENAI (compatível com variações da lib) ----------------
+GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY") or None
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "text-bison-001")
+GEMINI_TEMPERATURE = 0.2
+
+# Tentamos suportar diferentes versões da lib:
+# - versões antigas tinham genai.configure(...) e genai.Model.get(...)
+# - versões novas usam genai.Client() com métodos como generate_text(...)
+genai = None
+genai_client = None
+use_old_api = False
+_genai_carregado = False
+_genai_lock = threading.Lock()
+
+
+def genai_instalado():
+    """Se a lib está instalada, sem importá-la."""
+    try:
+        return importlib.util.find_spec("google.genai") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def carregar_genai():
+    """Importa a lib e configura o client, uma vez por processo (no primeiro uso)."""
+    global genai, genai_client, use_old_api, _genai_carregado
+    with _genai_lock:
+        if _genai_carregado:
+            return
+        _genai_carregado = True
+        try:
+            from google import genai as modulo
+        except ImportError:
+            return
+        genai = modulo
+
+        # Detecta e configura
+        if hasattr(genai, "configure"):
+            # API antiga
+            if GOOGLE_API_KEY:
+                try:
+                    genai.configure(api_key=GOOGLE_API_KEY)
+                except Exception:
+                    # fallback para continuar
+                    pass
+            use_old_api = True
+        else:
+            # API nova: genai.Client
+            try:
+                # some versions accept api_key on constructor, others read env var
+                try:
+                    genai_client = genai.Client(api_key=GOOGLE_API_KEY) if GOOGLE_API_KEY else genai.Client()
+                except TypeError:
+                    # fallback: constructor sem argumento (lê env)
+                    genai_client = genai.Client()
+            except Exception:
+                genai_client = None
+
+
+def gemini_disponivel():
+    # Sem importar a lib: o client novo só abre com a chave (GOOGLE_API_KEY ou GEMINI_API_KEY)
+    return genai_instalado() and bool(GOOGLE_API_KEY or os.environ.get("GEMINI_API_KEY"))
+
+
+def _extract_response_text(resp):
+    """Extrai o conteúdo de texto de várias formas possíveis de resposta."""
+    if resp is None:
+        return ""
+    if hasattr(resp, "text"):
+        return getattr(resp, "text")
+    if isinstance(resp, dict):
+        if "candidates" in resp and isinstance(resp["candidates"], (list, tuple)) and resp["candidates"]:
+            c = resp["candidates"][0]
+            if isinstance(c, dict) and "content" in c:
+                return c["content"]
+            return str(c)
+        if "output" in resp:
+            out = resp["output"]
+            if isinstance(out, (list, tuple)):
+                parts = []
+                for o in out:
+                    if isinstance(o, dict):
+                        parts.append(o.get("content", "") or o.get("text", ""))
+                    else:
+                        parts.append(str(o))
+                return "\n".join(p for p in parts if p)
+            return str(out)
+    if hasattr(resp, "output"):
+        out = getattr(resp, "output")
+        try:
+            parts = []
+            for o in out:
+                if isinstance(o, dict):
+                    parts.append(o.get("content", "") or o.get("text", ""))
+                else:
+                    parts.append(str(o))
+            return "\n".join(p for p in parts if p)
+        except Exception:
+            return str(out)
+    return str(resp)
+
+
+def chamar_gemini(prompt_text):
+    """
+    Chama o modelo usando a API disponível:
+     - Se 'use_old_api' for True, tenta genai.Model.get(...).generate_text(...) (compatibilidade).
+     - Senão, tenta genai_client.generate_text(...)
+    Retorna string bruta da resposta (texto).
+    """
+    carregar_genai()
+    if use_old_api:
+        try:
+            model = genai.Model.get(f"models/{GEMINI_MODEL}") if hasattr(genai.Model, "get") else genai.Model(f"models/{GEMINI_MODEL}")
+            if hasattr(model, "generate_text"):
+                resp = model.generate_text(prompt_text, temperature=GEMINI_TEMPERATURE, max_tokens=1500)
+                return _extract_response_text(resp)
+            if hasattr(model, "generate"):
+                resp = model.generate(prompt_text)
+                return _extract_response_text(resp)
+        except Exception:
+            pass
+
+    if genai_client is not None:
+        try:
+            model_names = [f"models/{GEMINI_MODEL}", GEMINI_MODEL]
+            last_exc = None
+            for model_name in model_names:
+                try:
+                    resp = genai_client.generate_text(model=model_name, input=prompt_text,
+                                                      temperature=GEMINI_TEMPERATURE, max_output_tokens=1500)
+                    return _extract_response_text(resp)
+                except Exception as e:
+                    last_exc = e
+                    continue
+            raise last_exc
+        except Exception as e_new:
+            raise RuntimeError(f"Erro ao chamar GenAI (nova API): {e_new}")
+
+    raise RuntimeError("Nenhuma API GenAI compatível encontrada (nenhum client inicializado). Verifique a biblioteca 'google-genai' ou 'google.generativeai'.")
+
+
+# ---------------- REGISTRO PADRÃO ----------------
+if GROQ_API_KEY and GROQ_API_KEY.strip():
+    registrar_provedor("groq", chamar_groq, GROQ_MODEL, GROQ_TEMPERATURE,
+                       chamar_async=chamar_groq_async if httpx else None)
+if gemini_disponivel():
+    registrar_provedor("gemini", chamar_gemini, GEMINI_MODEL, GEMINI_TEMPERATURE)
+
+
+# ---------------- AQUECIMENTO ----------------
+def aquecer():
+    """
+    Deixa os provedores registrados prontos antes do primeiro pedido (worker
+    do gunicorn, partida.py): carrega o google.genai e o client, e abre a
+    conexão keep-alive (TCP + TLS) com a Groq. Devolve {provedor: segundos};
+    falhas só vão para o log, a chamada de verdade tenta de novo.
+    """
+    tempos = {}
+    for nome in _provedores:
+        inicio = time.perf_counter()
+        try:
+            if nome == "gemini":
+                carregar_genai()
+            elif nome == "groq":
+                abrir_conexao(GROQ_URL, timeout=GROQ_TIMEOUT[0])
+            else:
+                continue
+        except Exception as e:
+            print(f"[WARN] Aquecimento do provedor {nome} falhou: {e}")
+        tempos[nome] = round(time.perf_counter() - inicio, 3)
+    return tempos
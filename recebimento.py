@@ -0,0 +1,120 @@
+"""
+Recebimento dos PDFs enviados: cópia em blocos com o SHA-256 calculado no
+caminho, armazenamento pelo hash e limpeza dos uploads antigos.
+
+O corpo da requisição já chega em blocos: o parser multipart do werkzeug põe
+cada arquivo num SpooledTemporaryFile (memória até 500 KB, disco depois) e
+recusa a requisição com 413 assim que ela passa de MAX_CONTENT_LENGTH, pelo
+Content-Length declarado (antes de ler o corpo) ou durante a leitura. Daqui o
+arquivo é copiado em blocos de 1 MB para uploads/<sha256>.pdf, com hash e
+tamanho calculados na mesma passada. A memória não depende do tamanho do PDF,
+dois clientes mandando "certidao.pdf" não colidem, o mesmo PDF enviado de novo
+reaproveita o arquivo, e o hash segue para o cache de extração sem reler o PDF.
+
+Os PDFs (e as pastas de lote) ficam em UPLOAD_DIR por UPLOAD_RETENCAO_H horas
+desde o último envio e depois são apagados; a varredura roda no máximo a cada
+10 minutos, a partir dos próprios uploads.
+
+Variáveis de ambiente:
+  UPLOAD_DIR         pasta dos uploads, a mesma para todos os pipelines do processo (padrão: uploads)
+  UPLOAD_MAX_MB      tamanho máximo de um upload em MB (padrão: 50)
+  UPLOAD_RETENCAO_H  horas que um PDF enviado fica em uploads/ (padrão: 24; 0 guarda para sempre)
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+import threading
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "uploads")
+UPLOAD_MAX_BYTES = int(float(os.environ.get("UPLOAD_MAX_MB", "50")) * 1024 * 1024)
+UPLOAD_RETENCAO_H = float(os.environ.get("UPLOAD_RETENCAO_H", "24"))
+
+BLOCO = 1024 * 1024
+_PARCIAL = ".parcial_"
+_PARCIAL_MAX_S = 3600     # cópia interrompida (ex.: processo morto) esquecida no disco
+_LIMPEZA_S = 600
+
+_lock = threading.Lock()
+_ultima_limpeza = 0.0
+
+
+def salvar_upload(arquivo, pasta, max_bytes=None):
+    """
+    Copia o upload `arquivo` (FileStorage do Flask) para pasta/<sha256>.pdf e
+    devolve (caminho, sha256, tamanho). Acima de `max_bytes` (padrão:
+    UPLOAD_MAX_BYTES) levanta RequestEntityTooLarge (413) e não deixa nada
+    no disco.
+    """
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    os.makedirs(pasta, exist_ok=True)
+    sha = hashlib.sha256()
+    tamanho = 0
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=_PARCIAL, suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for bloco in iter(lambda: arquivo.stream.read(BLOCO), b""):
+                tamanho += len(bloco)
+                if max_bytes and tamanho > max_bytes:
+                    raise RequestEntityTooLarge(f"Arquivo maior que {max_bytes // (1024 * 1024)} MB.")
+                sha.update(bloco)
+                f.write(bloco)
+        sha256 = sha.hexdigest()
+        destino = os.path.join(pasta, f"{sha256}.pdf")
+        if os.path.exists(destino):
+            # Mesmo PDF de novo: fica o que já estava, com a retenção renovada
+            os.remove(temporario)
+            os.utime(destino)
+        else:
+            os.replace(temporario, destino)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+    limpar_se_preciso(pasta)
+    return destino, sha256, tamanho
+
+
+def limpar(pasta, retencao_h=None):
+    """Apaga de `pasta` os arquivos mais antigos que a retenção e as pastas que ficaram vazias."""
+    retencao_h = UPLOAD_RETENCAO_H if retencao_h is None else retencao_h
+    agora = time.time()
+    apagados = 0
+    for raiz, _, arquivos in os.walk(pasta, topdown=False):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                idade = agora - os.path.getmtime(caminho)
+                if (nome.startswith(_PARCIAL) and idade > _PARCIAL_MAX_S) or \
+                        (retencao_h > 0 and idade > retencao_h * 3600):
+                    os.remove(caminho)
+                    apagados += 1
+            except OSError:
+                pass  # apagado por outro processo no meio da varredura
+        if raiz != pasta:
+            try:
+                # Só sai se estiver vazia (pasta de lote já limpa) e não acabou de ser criada
+                if agora - os.path.getmtime(raiz) > _PARCIAL_MAX_S:
+                    os.rmdir(raiz)
+            except OSError:
+                pass
+    if apagados:
+        print(f"[INFO] Retenção: {apagados} upload(s) antigo(s) apagado(s) de {pasta}.")
+    return apagados
+
+
+def limpar_se_preciso(pasta):
+    global _ultima_limpeza
+    with _lock:
+        if time.time() - _ultima_limpeza < _LIMPEZA_S:
+            return
+        _ultima_limpeza = time.time()
+    try:
+        limpar(pasta)
+    except Exception as e:
+        print(f"[WARN] Falha na limpeza de {pasta}: {e}")
@@ -0,0 +1,310 @@
+"""
+Motor de extração de campos da certidão por regras (fallback quando a IA
+não responde ou não devolve JSON).
+
+Todos os padrões são compilados uma única vez no import. Os padrões que
+percorrem o texto inteiro (candidatos a matrícula e âncoras "CPF nnn") são
+encontrados numa única varredura; os nomes dos proprietários são recortados
+para trás a partir de cada âncora, em vez de testar um nome de 6 a 200
+caracteres em cada posição do texto. Cartório e data são procurados só no
+cabeçalho/rodapé. O resultado é o mesmo dicionário que a versão com regexes
+avulsas produzia (ver bench/bench_registral.py).
+
+Ônus: uma única varredura encontra os cabeçalhos de ato (R.n/AV.n), os termos
+de perigo e os de cancelamento (CANCELAMENTO, BAIXA, LEVANTAMENTO); cada termo
+fica associado ao seu ato e só entram no relatório os ônus que nenhum ato
+posterior cancelou. A palavra de cancelamento só cancela o que ela rege, um
+termo de perigo ou uma citação de ato logo adiante, na mesma frase
+("CANCELAMENTO DA PENHORA", "FICA CANCELADO O R.5"): "BAIXA RENDA" ou
+"CANCELAMENTO DO USUFRUTO" não cancelam nada, e os ônus que o próprio ato
+constitui continuam valendo. Os termos de perigo valem em qualquer flexão (PENHORAS,
+PENHORADO, HIPOTECÁRIA, EXECUÇÕES...), como na busca por substring de antes:
+na dúvida, o imóvel fica com ônus. Só os de cancelamento exigem a palavra
+inteira.
+"""
+
+import re
+from collections import Counter
+from datetime import datetime
+
+# ---------------- PADRÕES ----------------
+_ESPACOS = re.compile(r'\s+')
+
+# Varredura única do texto: âncora de CPF ou candidato a número de matrícula
+_TOKENS = re.compile(
+    r'(?P<cpf>\sCPF[:\s]*(?P<cpf_num>[\d\.\-]{11,14}))'
+    r'|[RAV]\.?(?P<mat>\d{4,7})'
+)
+# Caractere que não pode fazer parte do nome antes de "CPF"
+_FORA_DO_NOME = re.compile(r'[^A-Z\s\.\-]')
+_NOME_MIN, _NOME_MAX = 6, 200
+
+_CARTORIO = re.compile(r'(\d+)[º°ª]\s*(?:OF[ÍI]CIO|REGISTRO)')
+_DATA_EXTENSO = re.compile(r'RIO DE JANEIRO,?\s*(\d{1,2})\s*DE\s*([A-ZÇ]+)\s*DE\s*(\d{4})')
+_DATA_SIMPLES = re.compile(r'(\d{2}/\d{2}/\d{4})')
+_MATRICULA_TOPO = re.compile(r'MATR[ÍI]CULA.*?(\d{4,7})')
+_PROPRIETARIO_GENERICO = re.compile(r'(PROPRIET[ÁA]RIO|ADQUIRENTE|PROPRIETARIOS?).{0,40}([A-Z][A-Z\s,]{4,200})')
+_CORTE_CPF = re.compile(r'CPF.*')
+_ENDERECO = re.compile(r'(?:ENDEREÇOS?|ENDEREÇO|LOCALIZADO EM|SITUADO EM).*?((?:RUA|AVENIDA|AV|TRAVESSA|ALAMEDA|PRAÇA).{1,200}?)\.')
+_ENDERECO_SOLTO = re.compile(r'(?:AV\.|RUA|AVENIDA|PRAÇA|TRAVESSA)\s+[A-Z0-9\.\-\/\s]{4,200}')
+
+TERMOS_PERIGO = ["PENHORA", "HIPOTECA", "INDISPONIBILIDADE", "ARRESTO", "AÇÃO DE EXECUÇÃO", "EXECUÇÃO"]
+TERMOS_CANCELAMENTO = ["CANCELAMENTO", "CANCELADA", "CANCELADO", "BAIXA", "LEVANTAMENTO"]
+# Radical de cada termo de perigo: qualquer palavra que comece por ele (plural,
+# particípio, adjetivo) conta como o ônus do termo
+RADICAIS_PERIGO = {
+    "PENHOR": "PENHORA",
+    "HIPOTEC": "HIPOTECA",
+    "INDISPON": "INDISPONIBILIDADE",
+    "ARREST": "ARRESTO",
+    "AÇÃO DE EXECU": "AÇÃO DE EXECUÇÃO",
+    "EXECU": "EXECUÇÃO",
+}
+
+
+def _alternancia(termos):
+    """
+    Alternância em forma de trie ("PENHORA|PENHORAS" -> "PENHORA(?:S)?"): em
+    cada posição o regex segue um único ramo por caractere, então o custo não
+    cresce com o número de termos. Ramos mais longos vêm primeiro.
+    """
+    trie = {}
+    for termo in termos:
+        no = trie
+        for c in termo:
+            no = no.setdefault(c, {})
+        no[""] = True
+
+    def _montar(no):
+        ramos = [re.escape(c) + _montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ""
+        corpo = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        if "" in no:
+            return f"(?:{corpo})?"
+        return corpo
+
+    return _montar(trie)
+
+
+# Varredura única dos ônus: cabeçalho de ato ("R.1/127.148", "AV.3/127148"),
+# menção a ato ("NA AV.3", "R-5"), termo de perigo (com qualquer sufixo) ou de
+# cancelamento (palavra inteira)
+_ONUS = re.compile(
+    r'(?<![A-Z0-9])(?:'
+    r'(?P<ato_tipo>R|AV)[\.\-]?\s?(?P<ato_num>\d{1,4})\s?/\s?\d[\d\.]{3,8}'
+    r'|(?P<ref_tipo>R|AV)[\.\-]\s?(?P<ref_num>\d{1,4})(?![\d/])'
+    r'|(?P<perigo>' + _alternancia(RADICAIS_PERIGO) + r')\w*'
+    r'|(?P<cancelamento>' + _alternancia(TERMOS_CANCELAMENTO) + r')(?![A-Z0-9])'
+    r')'
+)
+# Até onde uma palavra de cancelamento rege o termo seguinte: poucas palavras
+# adiante, sem passar de um fim de frase ("BAIXA RENDA. PENHORA..." não é baixa)
+_REGENCIA_MAX = 40
+_FIM_DE_FRASE = re.compile(r'[.;:](?!\d)')
+
+
+# ---------------- ETAPAS ----------------
+def _varrer(texto_limpo):
+    """Uma passada: devolve (candidatos a matrícula, âncoras de CPF)."""
+    matriculas = []
+    ancoras = []
+    for m in _TOKENS.finditer(texto_limpo):
+        if m.lastgroup == 'mat':
+            matriculas.append(m.group('mat'))
+        else:
+            ancoras.append((m.start(), m.end(), m.group('cpf_num')))
+    return matriculas, ancoras
+
+
+def _proprietarios_por_cpf(texto_limpo, ancoras):
+    """
+    Para cada âncora " CPF nnn" (na ordem), o nome é o trecho mais à esquerda,
+    de 6 a 200 caracteres de [A-Z espaço . -], que termina na âncora e começa
+    depois do fim do proprietário anterior.
+    """
+    proprietarios = []
+    fim_anterior = 0
+    for inicio_ancora, fim_ancora, cpf in ancoras:
+        inicio = max(fim_anterior, inicio_ancora - _NOME_MAX)
+        for m in _FORA_DO_NOME.finditer(texto_limpo, inicio, inicio_ancora):
+            inicio = m.end()
+        if inicio_ancora - inicio < _NOME_MIN:
+            continue
+        proprietarios.append({"nome": texto_limpo[inicio:inicio_ancora].strip().title(), "cpf": cpf})
+        fim_anterior = fim_ancora
+    return proprietarios
+
+
+def _cartorio(cabecalho):
+    m = _CARTORIO.search(cabecalho)
+    if m:
+        return f"{m.group(1)}º Ofício de Registro de Imóveis - RJ"
+    return "Registro de Imóveis - RJ"
+
+
+def _data_certidao(rodape):
+    m = _DATA_EXTENSO.search(rodape)
+    if m:
+        dia, mes, ano = m.groups()
+        return f"{dia} de {mes} de {ano}"
+    ultima = None
+    for ultima in _DATA_SIMPLES.finditer(rodape):
+        pass
+    if ultima:
+        return ultima.group(1)
+    return datetime.now().strftime('%d/%m/%Y')
+
+
+def _matricula(texto_limpo, candidatos):
+    if candidatos:
+        return Counter(candidatos).most_common(1)[0][0]
+    m = _MATRICULA_TOPO.search(texto_limpo)
+    return m.group(1) if m else "Não identificada"
+
+
+def _proprietarios_genericos(texto_limpo):
+    proprietarios = []
+    for gm in _PROPRIETARIO_GENERICO.findall(texto_limpo):
+        n = _CORTE_CPF.sub('', gm[1]).strip().title()
+        if len(n) > 4:
+            proprietarios.append({"nome": n})
+    return proprietarios
+
+
+def _endereco(texto_limpo):
+    m = _ENDERECO.search(texto_limpo)
+    if m:
+        return m.group(1).strip().title()
+    m = _ENDERECO_SOLTO.search(texto_limpo)
+    if m:
+        return m.group(0).strip().title()
+    return "Endereço não localizado"
+
+
+class _Ato:
+    __slots__ = ("rotulo", "numero", "perigos", "cancela_termos", "cancela_refs", "cancelados")
+
+    def __init__(self, rotulo, numero):
+        self.rotulo = rotulo
+        self.numero = numero
+        self.perigos = []          # ônus que o ato constitui
+        self.cancela_termos = set()  # ônus regidos por uma palavra de cancelamento
+        self.cancela_refs = set()    # atos citados por uma palavra de cancelamento
+        self.cancelados = {}  # termo -> rótulo do ato que cancelou
+
+
+def _rege(texto_limpo, fim_cancelamento, inicio):
+    """Se o termo em `inicio` ainda é regido pelo cancelamento que terminou em `fim_cancelamento`."""
+    if fim_cancelamento is None:
+        return False
+    entre = texto_limpo[fim_cancelamento:inicio]
+    return len(entre) <= _REGENCIA_MAX and not _FIM_DE_FRASE.search(entre)
+
+
+def _atos_com_termos(texto_limpo):
+    """Uma passada: divide o texto nos atos R./AV. e anota os termos de cada um."""
+    atual = _Ato(None, 0)  # texto antes do primeiro ato (cabeçalho, descrição do imóvel)
+    atos = [atual]
+    regente = None  # fim da palavra de cancelamento (ou do último termo regido por ela)
+    for m in _ONUS.finditer(texto_limpo):
+        if m.group('ato_num'):
+            atual = _Ato(f"{m.group('ato_tipo')}.{int(m.group('ato_num'))}", int(m.group('ato_num')))
+            atos.append(atual)
+            regente = None
+        elif m.group('cancelamento'):
+            regente = m.end()
+        elif _rege(texto_limpo, regente, m.start()):
+            # "CANCELAMENTO DA PENHORA OBJETO DO R.5": a regência segue pela enumeração
+            if m.group('ref_num'):
+                atual.cancela_refs.add(int(m.group('ref_num')))
+            else:
+                atual.cancela_termos.add(RADICAIS_PERIGO[m.group('perigo')])
+            regente = m.end()
+        elif m.group('perigo'):
+            termo = RADICAIS_PERIGO[m.group('perigo')]
+            if termo not in atual.perigos:
+                atual.perigos.append(termo)
+    return atos
+
+
+def _aplicar_cancelamentos(atos):
+    """
+    Cada ato cancela os ônus dos atos anteriores que cita junto da palavra de
+    cancelamento (R.5, AV.7), só os dos termos regidos se houver; sem citação,
+    o ato anterior mais recente ainda ativo com o ônus regido. Uma palavra de
+    cancelamento sem termo de perigo nem citação não cancela nada.
+    """
+    anteriores = []
+    for ato in atos:
+        termos = ato.cancela_termos
+        if ato.cancela_refs:
+            citados = [a for a in anteriores if a.numero in ato.cancela_refs]
+        else:
+            citados = []
+            for a in reversed(anteriores) if termos else ():
+                if termos & {t for t in a.perigos if t not in a.cancelados}:
+                    citados = [a]
+                    break
+        for a in citados:
+            for t in a.perigos:
+                if not termos or t in termos:
+                    a.cancelados.setdefault(t, ato.rotulo)
+        anteriores.append(ato)
+
+
+def detectar_onus(texto_limpo):
+    """
+    Ônus encontrados no texto (já normalizado), por ato: lista de
+    {"termo", "ato", "cancelado_por"}. "ato" é None para o texto antes do
+    primeiro R./AV.; "cancelado_por" é None se o ônus continua ativo.
+    """
+    atos = _atos_com_termos(texto_limpo)
+    _aplicar_cancelamentos(atos)
+    return [
+        {"termo": t, "ato": a.rotulo, "cancelado_por": a.cancelados.get(t)}
+        for a in atos
+        for t in a.perigos
+    ]
+
+
+def _onus(texto_limpo):
+    """Ônus ainda ativos, no formato do relatório: "PENHORA (R.5)"."""
+    return [
+        f"{o['termo']} ({o['ato']})" if o['ato'] else o['termo']
+        for o in detectar_onus(texto_limpo)
+        if o['cancelado_por'] is None
+    ]
+
+
+# ---------------- API ----------------
+def data_certidao(texto):
+    """Data da certidão, procurada no fim do texto (rodapé)."""
+    return _data_certidao(_ESPACOS.sub(' ', texto[-4000:]).upper()[-2000:])
+
+
+def extrair_campos(texto):
+    """Extrai cartório, matrícula, data, endereço, proprietários e ônus do texto da certidão."""
+    texto_limpo = _ESPACOS.sub(' ', texto).upper()
+
+    candidatos_matricula, ancoras_cpf = _varrer(texto_limpo)
+
+    proprietarios = _proprietarios_por_cpf(texto_limpo, ancoras_cpf)
+    if not proprietarios:
+        proprietarios = _proprietarios_genericos(texto_limpo)
+
+    onus_encontrados = _onus(texto_limpo)
+    diagnostico = "Pode Vender (Livre)" if not onus_encontrados else "Atenção (Possíveis Ônus)"
+    if not onus_encontrados:
+        onus_encontrados = ["Nada consta (Livre de Ônus Reais)"]
+
+    return {
+        "Cartório": _cartorio(texto_limpo[:1000]),
+        "Matrícula": _matricula(texto_limpo, candidatos_matricula),
+        "Data da Busca": datetime.now().strftime('%d/%m/%Y'),
+        "Data da Certidão": _data_certidao(texto_limpo[-2000:]),
+        "Endereço": _endereco(texto_limpo),
+        "Proprietários": proprietarios if proprietarios else [{"nome": "Verificar R.1 na imagem"}],
+        "Ônus Reais": onus_encontrados,
+        "Diagnóstico": diagnostico
+    }
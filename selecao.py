@@ -0,0 +1,140 @@
+"""
+Seleção do trecho da certidão que vai no prompt da IA, dentro de um orçamento
+de tokens por modelo.
+
+Em vez de cortar o texto no começo e no fim (o que perde os atos R./AV. do
+meio, onde estão penhoras e transmissões), o texto é limpo de linhas de lixo
+do OCR (carimbos, bordas, "(ep)", "[62]"...) e cada linha recebe uma
+prioridade pela relevância registral: cabeçalho de cada ato, ônus e
+cancelamentos, transmissões e CPFs, identificação do imóvel, datas. As
+linhas de maior prioridade entram até o orçamento acabar, e o resultado
+volta na ordem original, com "[...]" onde houve corte. Linhas de ônus vêm
+primeiro; depois todo ato aparece ao menos pelo cabeçalho antes de o
+orçamento ser gasto com detalhes das transmissões.
+
+Tokens são estimados por caracteres (CHARS_POR_TOKEN), sem tokenizador.
+"""
+
+import re
+import unicodedata
+
+CHARS_POR_TOKEN = 3.5
+MARCA_CORTE = "[...]"
+
+_CABECALHO_ATO = re.compile(r'^\s*(?:R|AV)[\.\-]?\s?\d{1,4}\s?/\s?\d', re.IGNORECASE)
+_PALAVRA = re.compile(r'[^\W\d_]{3,}')
+_NUMERO_OU_DATA = re.compile(r'\d{4,}|\d{1,2}/\d{1,2}/\d{2,4}')
+_DATA = re.compile(r'\d{1,2}/\d{1,2}/\d{4}|\d{1,2} DE [A-Z]+ DE \d{4}')
+
+# (prioridade, termos) — comparados sem acento e em maiúsculas
+_TERMOS = [
+    (90, ["PENHORA", "HIPOTECA", "INDISPONIBILIDADE", "ARRESTO", "EXECUCAO", "ALIENACAO FIDUCIARIA",
+          "USUFRUTO", "CANCELAMENTO", "CANCELAD", "BAIXA", "LEVANTAMENTO", "CAUCAO", "PROTESTO"]),
+    (70, ["COMPRA E VENDA", "PARTILHA", "DOACAO", "ADJUDICA", "PERMUTA", "TRANSMIT", "ADQUIR",
+          "PROPRIETARI", "INVENTARIO", "CPF", "CNPJ", "CASAD", "CONJUGE", "COMUNHAO", "FRACAO"]),
+    (60, ["MATRICULA", "IMOVEL", "OFICIO", "CARTORIO", "ENDERECO", "APARTAMENTO", "APT", "RUA ",
+          "AVENIDA", "AV.", "LOTE", "EDIFICIO"]),
+]
+_TERMOS_RE = [(p, re.compile("|".join(re.escape(t) for t in termos))) for p, termos in _TERMOS]
+
+
+def estimar_tokens(texto):
+    return int(len(texto) / CHARS_POR_TOKEN) + 1
+
+
+def _sem_acento(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii").upper()
+
+
+def linha_lixo(linha):
+    """Linha sem conteúdo útil: curta, sem palavra/número, ou quase só símbolos."""
+    s = linha.strip()
+    if len(s) < 5:
+        return True
+    if not (_PALAVRA.search(s) or _NUMERO_OU_DATA.search(s)):
+        return True
+    uteis = sum(1 for c in s if c.isalnum() or c.isspace())
+    return uteis / len(s) < 0.6
+
+
+def _prioridades(linhas):
+    """Prioridade de cada linha (maior = entra antes no prompt)."""
+    atos = [i for i, ln in enumerate(linhas) if _CABECALHO_ATO.match(ln)]
+    n_atos = len(atos)
+    prioridades = []
+    ato_atual = -1
+    for i, ln in enumerate(linhas):
+        if ato_atual + 1 < n_atos and i == atos[ato_atual + 1]:
+            ato_atual += 1
+        # Atos mais recentes mostram a situação atual do imóvel
+        recencia = 10 * (ato_atual + 1) / n_atos if n_atos else 0
+        base = ln.upper()
+        chave = _sem_acento(ln)
+        p = 0
+        for peso, termos in _TERMOS_RE:
+            if termos.search(chave):
+                p = peso
+                break
+        if ato_atual >= 0 and i == atos[ato_atual]:
+            # Cabeçalho de ato: acima de tudo se já anuncia um ônus ("R.5/... PENHORA")
+            prioridades.append((100 if p >= 90 else 75) + recencia)
+            continue
+        if not p and _DATA.search(base):
+            p = 40
+        if not p:
+            p = 10 + recencia if ato_atual >= 0 else 5
+        prioridades.append(p)
+    # Linhas vizinhas de uma linha importante costumam continuar o mesmo trecho
+    # (nome do adquirente quebrado na linha seguinte, etc.)
+    for i, p in enumerate(list(prioridades)):
+        if p >= 70:
+            for j in (i - 1, i + 1):
+                if 0 <= j < len(prioridades) and prioridades[j] < 30:
+                    prioridades[j] = 30
+    return prioridades
+
+
+def _linhas_limpas(texto):
+    linhas = [ln.strip() for ln in (texto or "").splitlines()]
+    return [ln for ln in linhas if not linha_lixo(ln)]
+
+
+def cabe(texto, orcamento_tokens):
+    """Se `selecionar_texto` devolveria o texto limpo inteiro, sem corte."""
+    return len("\n".join(_linhas_limpas(texto))) <= int(orcamento_tokens * CHARS_POR_TOKEN)
+
+
+def selecionar_texto(texto, orcamento_tokens):
+    """
+    Texto limpo e priorizado que cabe em `orcamento_tokens` (estimado).
+    Se o texto limpo inteiro couber, volta inteiro.
+    """
+    linhas = _linhas_limpas(texto)
+    limite = int(orcamento_tokens * CHARS_POR_TOKEN)
+    completo = "\n".join(linhas)
+    if len(completo) <= limite:
+        return completo
+
+    prioridades = _prioridades(linhas)
+    ordem = sorted(range(len(linhas)), key=lambda i: (-prioridades[i], i))
+    escolhidas = set()
+    usado = 0
+    custo_corte = len(MARCA_CORTE) + 1
+    for i in ordem:
+        # +1 da quebra de linha; um corte novo pode aparecer antes da linha
+        custo = len(linhas[i]) + 1 + custo_corte
+        if usado + custo > limite:
+            continue
+        escolhidas.add(i)
+        usado += custo
+
+    saida = []
+    anterior = -1
+    for i in sorted(escolhidas):
+        if i != anterior + 1:
+            saida.append(MARCA_CORTE)
+        saida.append(linhas[i])
+        anterior = i
+    if anterior != len(linhas) - 1:
+        saida.append(MARCA_CORTE)
+    return "\n".join(saida)
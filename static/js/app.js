@@ -8,8 +8,15 @@ document.addEventListener("DOMContentLoaded", () => {
   const result = document.getElementById("result");
   const copyBtn = document.getElementById("copyBtn");
   const downloadLink = document.getElementById("downloadLink");
+  // Prefixo do app quando montado em wsgi.py (ex.: "/app1"); vazio rodando sozinho
+  const raiz = document.body.dataset.raiz || "";
 
   let selectedFile = null;
+  const loadingText = loading.textContent;
+  const progressStages = [
+    "arquivo_salvo", "inicio", "texto_cache", "camada_texto",
+    "ocr_pagina", "ia_enviada", "regex", "relatorio",
+  ];
 
   selectFileBtn.addEventListener("click", () => {
     fileInput.click();
@@ -61,25 +68,77 @@ document.addEventListener("DOMContentLoaded", () => {
     formData.append("file", selectedFile);
 
     try {
-      const response = await fetch("/upload", {
+      // Modo job: o servidor responde na hora com o id e processa em segundo plano
+      const response = await fetch(`${raiz}/upload?async=1`, {
         method: "POST",
         body: formData,
       });
-      const data = await response.json();
+      let data = await response.json();
 
-      if (response.ok) {
+      if (response.status === 202) {
+        data = await waitForJob(data.status_url);
+      }
+
+      if (response.ok && data && !data.error) {
         showResult(data.relatorio, data.arquivo_relatorio);
       } else {
-        alert(data.error || "Erro ao processar o arquivo.");
+        alert((data && data.error) || "Erro ao processar o arquivo.");
       }
     } catch (err) {
       alert("Erro na comunicação com o servidor.");
     } finally {
       loading.classList.add("hidden");
+      loading.textContent = loadingText;
       uploadBtn.disabled = false;
     }
   });
 
+  // Acompanha o job até terminar: progresso pelo SSE e, de reserva, consulta
+  // periódica do status. Devolve o resultado ou {error}
+  function waitForJob(statusUrl) {
+    return new Promise((resolve) => {
+      let done = false;
+      let source = null;
+      let timer = null;
+
+      const finish = (result) => {
+        if (done) return;
+        done = true;
+        if (source) source.close();
+        clearInterval(timer);
+        resolve(result);
+      };
+
+      const check = async () => {
+        try {
+          const response = await fetch(statusUrl);
+          const job = await response.json();
+          if (!response.ok) {
+            finish({ error: job.error || "Erro ao consultar o processamento." });
+          } else if (job.status === "concluido") {
+            finish(job.resultado);
+          } else if (job.status === "erro") {
+            finish({ error: job.erro || "Erro ao processar o arquivo." });
+          }
+        } catch (err) {
+          // Falha momentânea de rede: tenta de novo no próximo ciclo
+        }
+      };
+
+      if (window.EventSource) {
+        source = new EventSource(`${statusUrl}/eventos`);
+        progressStages.forEach((stage) => {
+          source.addEventListener(stage, (e) => {
+            const data = JSON.parse(e.data);
+            if (data.mensagem) loading.textContent = `${data.mensagem}...`;
+          });
+        });
+        source.addEventListener("fim", check);
+      }
+      timer = setInterval(check, 5000);
+    });
+  }
+
   function showResult(data, arquivo) {
     result.classList.remove("hidden");
 
@@ -108,7 +167,7 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     // Link para download
-    downloadLink.href = `/download/${arquivo}`;
+    downloadLink.href = `${raiz}/download/${arquivo}`;
     downloadLink.download = arquivo;
   }
 
@@ -0,0 +1,43 @@
+"""
+Testes (pytest) dos pontos do pipeline que os benches de bench/ não cobrem
+sozinhos: disjuntor e repetições do cliente de IA, hedge e failover dos
+provedores, análise incremental por ato. Tudo local: a IA é o servidor falso
+(bench/fake_llm.py) ou funções de teste, e acervo e cache de IA ficam numa
+pasta temporária.
+
+Uso:
+    python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [RAIZ, os.path.join(RAIZ, "bench")]
+
+# Antes de importar os módulos do app, que leem a configuração no import
+_TEMP = tempfile.mkdtemp(prefix="testes_")
+os.environ["RELATORIOS_DB"] = os.path.join(_TEMP, "relatorios.db")
+os.environ["CACHE_DIR"] = os.path.join(_TEMP, "cache")
+os.environ["ATOS_INCREMENTAL"] = "1"
+os.environ["IA_BACKOFF_S"] = "0.01"
+
+import fake_llm  # noqa: E402
+
+
+@pytest.fixture
+def servidor_llm():
+    """Sobe servidores falsos da API de chat: servidor_llm(**opções) -> (servidor, url)."""
+    servidores = []
+
+    def iniciar(**opcoes):
+        servidor, url = fake_llm.iniciar(**opcoes)
+        servidores.append(servidor)
+        return servidor, url
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
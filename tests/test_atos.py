@@ -0,0 +1,48 @@
+import asyncio
+
+import atos
+import bench_incremental
+from bench_incremental import IA, certidoes
+
+
+def _retificada(texto):
+    """Certidão com um ato antigo relido de outro jeito (OCR refeito, retificação): passa a ser penhora."""
+    assert "ÓBITO:" in texto
+    return texto.replace("ÓBITO:", "PENHORA:", 1)
+
+
+def _completa(texto):
+    """Análise de uma vez, numa matrícula que não tem nada guardado."""
+    dados, resumo = atos.analisar(texto, IA(0), 2500)
+    assert resumo["novos"] == resumo["atos"]
+    return dados
+
+
+def test_incremental_igual_a_completa_em_certidao_modificada():
+    anterior, atual = certidoes(6, "127.150", etapas=2, atos_por_etapa=2)
+    dados, resumo = atos.analisar(anterior, IA(0), 2500)
+    assert dados is not None and resumo["novos"] == resumo["atos"]
+
+    ia = IA(0)
+    dados, resumo = atos.analisar(_retificada(atual), ia, 2500)
+    assert resumo["novos"] < resumo["atos"]  # os atos iguais vieram do acervo
+    completa = _completa(_retificada(certidoes(6, "127.151", etapas=2, atos_por_etapa=2)[-1]))
+
+    dados["Matrícula"] = completa["Matrícula"]
+    assert dados == completa
+    assert any(o.startswith("Penhora (AV.") for o in dados["Ônus Reais"])
+
+
+def test_incremental_async_igual_a_sincrona():
+    anterior, atual = certidoes(6, "127.152", etapas=2, atos_por_etapa=2)
+
+    async def chamar(prompt):
+        return bench_incremental._responder(prompt)
+
+    asyncio.run(atos.analisar_async(anterior, chamar, 2500))
+    dados, resumo = asyncio.run(atos.analisar_async(atual, chamar, 2500))
+    assert resumo["novos"] < resumo["atos"]
+    completa = _completa(certidoes(6, "127.153", etapas=2, atos_por_etapa=2)[-1])
+
+    dados["Matrícula"] = completa["Matrícula"]
+    assert dados == completa
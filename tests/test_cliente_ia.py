@@ -0,0 +1,91 @@
+import time
+import asyncio
+
+import pytest
+
+import cliente_ia
+from cliente_ia import Disjuntor, IAIndisponivel, post_json, post_json_async
+
+
+def test_disjuntor_abre_testa_e_fecha(servidor_llm):
+    servidor, url = servidor_llm(falhas=2, status=503)
+    disjuntor = Disjuntor("teste", falhas=2, aberto_s=0.2)
+
+    for _ in range(2):
+        with pytest.raises(IAIndisponivel, match="status 503"):
+            post_json(url, {}, {}, disjuntor, timeout=(1, 1), tentativas=1)
+    assert disjuntor.estado == "aberto"
+
+    # Aberto: recusa sem ir ao provedor
+    with pytest.raises(IAIndisponivel, match="disjuntor aberto"):
+        post_json(url, {}, {}, disjuntor, timeout=(1, 1), tentativas=1)
+    assert servidor.requisicoes == 2
+    assert disjuntor.recusadas == 1
+
+    # Passado aberto_s, a chamada de teste do meio aberto fecha o disjuntor
+    time.sleep(0.25)
+    assert post_json(url, {}, {}, disjuntor, timeout=(1, 1), tentativas=1).status_code == 200
+    assert disjuntor.estado == "fechado"
+    assert disjuntor.falhas_seguidas == 0
+
+
+def test_meio_aberto_deixa_passar_um_teste_e_falha_reabre():
+    disjuntor = Disjuntor("teste", falhas=1, aberto_s=0.05)
+    disjuntor.falha()
+    assert not disjuntor.permitir()
+
+    time.sleep(0.06)
+    assert disjuntor.permitir()
+    assert disjuntor.estado == "meio_aberto"
+    assert not disjuntor.permitir()  # só uma chamada de teste por vez
+
+    disjuntor.falha()
+    assert disjuntor.estado == "aberto"
+    assert disjuntor.aberturas == 2
+
+
+def test_excecao_fora_da_rede_solta_o_teste(monkeypatch):
+    class Quebrada:
+        def post(self, *args, **kwargs):
+            raise ValueError("payload inválido")
+
+    disjuntor = Disjuntor("teste", falhas=1, aberto_s=0.01)
+    disjuntor.falha()
+    time.sleep(0.02)
+    monkeypatch.setattr(cliente_ia, "sessao", Quebrada)
+    with pytest.raises(ValueError):
+        post_json("http://127.0.0.1:9/", {}, {}, disjuntor)
+    assert disjuntor.estado == "meio_aberto"
+    assert disjuntor.permitir()  # o teste foi solto: a próxima chamada pode testar
+
+
+def test_repete_status_transitorio(servidor_llm):
+    servidor, url = servidor_llm(falhas=2, status=503)
+    resp = post_json(url, {}, {}, Disjuntor("teste"), timeout=(1, 1), tentativas=3)
+    assert resp.status_code == 200
+    assert servidor.requisicoes == 3
+
+
+def test_sem_nova_tentativa_em_read_timeout(servidor_llm):
+    servidor, url = servidor_llm(atraso=1.0)
+    disjuntor = Disjuntor("teste")
+    inicio = time.monotonic()
+    with pytest.raises(IAIndisponivel, match="ReadTimeout"):
+        post_json(url, {}, {}, disjuntor, timeout=(1, 0.2), tentativas=3)
+    assert time.monotonic() - inicio < 0.9
+    assert servidor.requisicoes == 1
+    assert disjuntor.falhas_seguidas == 1
+
+
+def test_sem_nova_tentativa_em_read_timeout_async(servidor_llm):
+    servidor, url = servidor_llm(atraso=1.0)
+
+    async def chamar():
+        try:
+            await post_json_async(url, {}, {}, Disjuntor("teste"), timeout=(1, 0.2), tentativas=3)
+        finally:
+            await cliente_ia.fechar_cliente_async()
+
+    with pytest.raises(IAIndisponivel, match="ReadTimeout"):
+        asyncio.run(chamar())
+    assert servidor.requisicoes == 1
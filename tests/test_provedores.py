@@ -0,0 +1,111 @@
+import json
+import time
+import asyncio
+import threading
+
+import pytest
+
+import provedores
+from cliente_ia import Disjuntor, post_json
+
+RESPOSTA = json.dumps({"Matrícula": "127148", "Diagnóstico": "Pode Vender (Livre)"})
+
+
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    """Registro de provedores só do teste, com hedge rápido enquanto não há amostras."""
+    monkeypatch.setattr(provedores, "_provedores", {})
+    monkeypatch.setattr(provedores, "IA_HEDGE_PADRAO_S", 0.2)
+    monkeypatch.setattr(provedores, "IA_HEDGE_MIN_S", 0.05)
+
+
+@pytest.fixture
+def travado():
+    """Provedor que só responde quando o teste termina (solta a thread perdedora do hedge)."""
+    liberar = threading.Event()
+
+    def chamar(prompt):
+        liberar.wait(5)
+        return RESPOSTA
+    yield chamar
+    liberar.set()
+
+
+def provedor_http(url, nome):
+    """Provedor como o da Groq, contra o servidor falso."""
+    disjuntor = Disjuntor(nome)
+
+    def chamar(prompt):
+        resp = post_json(url, {"model": nome, "messages": [{"role": "user", "content": prompt}]},
+                         {}, disjuntor, timeout=(1, 2))
+        return provedores._conteudo_groq(resp)
+    return chamar
+
+
+def test_hedge_fica_com_a_reserva_quando_o_primario_trava(travado):
+    provedores.registrar_provedor("primario", travado, "primario", 0)
+    provedores.registrar_provedor("reserva", lambda prompt: RESPOSTA, "reserva", 0)
+
+    inicio = time.monotonic()
+    nome, resposta = provedores.chamar("hedge sync", ordem=["primario", "reserva"], modo="hedge")
+    assert (nome, resposta) == ("reserva", RESPOSTA)
+    assert time.monotonic() - inicio < 1.5
+    assert provedores._provedores["primario"].hedges == 1
+    assert provedores._provedores["reserva"].vitorias == 1
+
+
+def test_hedge_async_cancela_o_primario_travado():
+    async def travado(prompt):
+        await asyncio.sleep(5)
+        return RESPOSTA
+
+    async def reserva(prompt):
+        return RESPOSTA
+
+    provedores.registrar_provedor("primario", None, "primario", 0, chamar_async=travado)
+    provedores.registrar_provedor("reserva", None, "reserva", 0, chamar_async=reserva)
+
+    async def chamar():
+        inicio = time.monotonic()
+        resultado = await provedores.chamar_async("hedge async", ordem=["primario", "reserva"], modo="hedge")
+        pendentes = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.sleep(0)  # deixa o cancelamento do perdedor acontecer
+        return resultado, time.monotonic() - inicio, [t for t in pendentes if not t.done()]
+
+    (nome, resposta), segundos, vivas = asyncio.run(chamar())
+    assert (nome, resposta) == ("reserva", RESPOSTA)
+    assert segundos < 1.5
+    assert not vivas
+    assert provedores._provedores["primario"].hedges == 1
+
+
+def test_failover_em_5xx(servidor_llm):
+    servidor_ruim, url_ruim = servidor_llm(falhas=-1, status=503)
+    servidor_bom, url_bom = servidor_llm()
+    provedores.registrar_provedor("primario", provedor_http(url_ruim, "primario"), "primario", 0)
+    provedores.registrar_provedor("reserva", provedor_http(url_bom, "reserva"), "reserva", 0)
+
+    nome, resposta = provedores.chamar("failover 5xx", ordem=["primario", "reserva"], modo="failover")
+    assert nome == "reserva"
+    assert provedores.extrair_json(resposta)["Matrícula"] == "127148"
+    assert servidor_ruim.requisicoes == 3  # as tentativas do cliente, depois o próximo provedor
+    assert servidor_bom.requisicoes == 1
+    assert provedores._provedores["primario"].falhas == 1
+
+
+def test_latencia_so_de_chamadas_de_rede():
+    def lento(prompt):
+        time.sleep(0.2)
+        return RESPOSTA
+
+    provedores.registrar_provedor("lento", lento, "lento", 0)
+    p = provedores._provedores["lento"]
+    threads = [threading.Thread(target=p.chamar, args=("latência",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    p.chamar("latência")  # acerto de cache
+
+    assert p.chamadas == 5
+    assert p.latencia.total == 1  # seguidores do single-flight e o cache não entram
@@ -1,9 +1,41 @@
-from flask import Flask
+"""
+Host WSGI com os dois pipelines no mesmo grupo de processos:
+
+  /app1  app.py (Groq, com análise por regras de reserva)
+  /app2  app_gemini_new.py (Gemini)
+  /      redireciona para /app1/
+
+Cada app continua um Flask completo, montado pelo DispatcherMiddleware do
+werkzeug (o SCRIPT_NAME leva o prefixo, então url_for, o index.html e os
+status_url dos jobs saem com /app1 ou /app2). Por estarem no mesmo processo,
+os dois usam os mesmos módulos, e portanto os mesmos:
+
+  - pool de OCR (ocr.py): OCR_WORKERS processos para as duas rotas
+  - caches de extração e de IA (cache.py) e acervo (acervo.py)
+  - pasta de uploads (recebimento.UPLOAD_DIR) e fila de jobs (jobs.py)
+  - limite de admissão (admissao.py): CPU_CONCORRENCIA certidões na extração
+    e IA_CONCORRENCIA chamadas à IA, venha o tráfego de /app1 ou de /app2
+
+O teto de CPU é por processo: para ele valer na máquina inteira, rode um
+worker com threads (o padrão de gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+from werkzeug.exceptions import NotFound
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.utils import redirect
+
 from app import app as app1
 from app_gemini_new import app as app2
 
-application = Flask(__name__)
+PREFIXOS = {"/app1": app1, "/app2": app2}
+
+
+def _raiz(environ, start_response):
+    if environ.get("PATH_INFO", "/") in ("", "/"):
+        return redirect("/app1/")(environ, start_response)
+    return NotFound()(environ, start_response)
+
 
-# Registra os dois apps em rotas diferentes
-application.register_blueprint(app1, url_prefix='/app1')
-application.register_blueprint(app2, url_prefix='/app2')
+application = DispatcherMiddleware(_raiz, PREFIXOS)